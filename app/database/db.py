@@ -1,13 +1,87 @@
 # app/database/db.py
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.dialects.sqlite.base import SQLiteCompiler
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-DATABASE_URL = "sqlite:///./app.db"  
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 # This will create app.db in project root
 
+# -------------------- SQLite engine profile --------------------
+# "tuned": WAL journal (readers never block the writer), relaxed fsync,
+# larger page cache, memory-mapped reads, busy timeout, and BEGIN IMMEDIATE
+# for write sessions so concurrent writers queue instead of failing on lock upgrade.
+# "default": plain pysqlite behaviour (rollback journal, deferred BEGIN).
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+
+SQLITE_PROFILES = {
+    "default": {},
+    "tuned": {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", -64000)),     # negative = KiB (64 MB)
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 268435456)),    # bytes (256 MB)
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000)),   # ms
+        "temp_store": "MEMORY",
+    },
+}
+
+# Connection pool (threads from the DB executors and sync routes share it)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 8))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 16))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+
+is_sqlite = DATABASE_URL.startswith("sqlite")
+sqlite_pragmas = SQLITE_PROFILES[SQLITE_PROFILE] if is_sqlite else {}
+
+# In-memory SQLite ("sqlite://", ":memory:") gets SQLAlchemy's single-connection
+# pool, which takes no pool sizing arguments
+is_sqlite_memory = is_sqlite and make_url(DATABASE_URL).database in (None, "", ":memory:")
+pool_args = {} if is_sqlite_memory else {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+}
+
 engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if is_sqlite else {},
+    **pool_args,
 )
 
+
+class SQLiteHintCompiler(SQLiteCompiler):
+    """
+    Renders table hints, which the stock SQLite compiler drops:
+    query.with_hint(Model, "INDEXED BY <index>", "sqlite") pins the index
+    when the planner (no ANALYZE statistics) would pick another one.
+    """
+
+    def get_from_hint_text(self, table, text):
+        return text
+
+
+if is_sqlite:
+    engine.dialect.statement_compiler = SQLiteHintCompiler
+
+if sqlite_pragmas:
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself (see _begin_sqlite_transaction)
+        dbapi_connection.isolation_level = None
+
+        cursor = dbapi_connection.cursor()
+        for name, value in sqlite_pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin_sqlite_transaction(conn):
+        conn.exec_driver_sql(conn.get_execution_options().get("sqlite_begin", "BEGIN"))
+
+# Write sessions take the database write lock up front
+write_engine = engine.execution_options(sqlite_begin="BEGIN IMMEDIATE")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+WriteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+Base = declarative_base()
@@ -0,0 +1,53 @@
+# app/database/executor.py
+
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+from app.database.session import db_session, write_db_session
+
+# -------------------- Dedicated DB executors --------------------
+# Sync SQLAlchemy work runs here so async routes never block the event loop
+# (and with it the Binance WS ingest task).
+# Reads share a small pool; writes go through one thread so read-check-write
+# sequences (balance, holdings) never interleave within this process.
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", 4))
+
+_read_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db-read")
+_write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+
+
+def _call_with_session(fn: Callable, args, kwargs) -> Any:
+    with db_session() as db:
+        return fn(db, *args, **kwargs)
+
+
+def _call_with_write_session(fn: Callable, args, kwargs) -> Any:
+    with write_db_session() as db:
+        return fn(db, *args, **kwargs)
+
+
+async def run_db(fn: Callable, *args, **kwargs) -> Any:
+    """
+    Run fn(db, *args, **kwargs) on the read pool with a fresh Session.
+    fn must be synchronous and should return plain data (not live ORM objects).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_read_executor, partial(_call_with_session, fn, args, kwargs))
+
+
+async def run_db_write(fn: Callable, *args, **kwargs) -> Any:
+    """
+    Same as run_db, but serialized on the single writer thread.
+    The session begins with BEGIN IMMEDIATE (tuned SQLite profile), which
+    also serializes writers across processes.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_write_executor, partial(_call_with_write_session, fn, args, kwargs))
+
+
+def shutdown_db_executor():
+    _read_executor.shutdown(wait=True)
+    _write_executor.shutdown(wait=True)
@@ -1,6 +1,81 @@
 # app/database/init_db.py
-from app.database.db import Base, engine
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateIndex
+
+from app.database.db import Base, write_engine
+from app.models.account import DEFAULT_ACCOUNT_ID
+
+# Single-user schema -> accounts: tables that get an account_id column
+# (existing rows belong to the default account), tables that are derived
+# from the transaction log and are rebuilt instead, and indexes replaced
+# by account-prefixed ones.
+ACCOUNT_TABLES = ("balance", "transactions", "resting_orders")
+DERIVED_TABLES = ("open_lots", "positions")
+OBSOLETE_INDEXES = (
+    "ix_transactions_timestamp_id",
+    "ix_transactions_symbol_timestamp_id",
+)
+
+# Workers starting together may each find a table missing and race to create it
+SCHEMA_CREATE_ATTEMPTS = 5
+
+def migrate_accounts():
+    """
+    Upgrades a database created before accounts existed. Runs before
+    create_all(); dropped derived tables are recreated empty and refilled
+    by rebuild_ledger() on startup.
+    Every worker runs this at startup: columns are checked inside the
+    write transaction (BEGIN IMMEDIATE), and a "duplicate column" from a
+    worker that migrated first counts as migrated.
+    """
+    with write_engine.begin() as conn:
+        inspector = inspect(conn)
+
+        for table in ACCOUNT_TABLES:
+            if inspector.has_table(table) and "account_id" not in {c["name"] for c in inspector.get_columns(table)}:
+                try:
+                    conn.exec_driver_sql(
+                        f"ALTER TABLE {table} ADD COLUMN account_id INTEGER NOT NULL DEFAULT {DEFAULT_ACCOUNT_ID}"
+                    )
+                except OperationalError as e:
+                    # A failed statement does not abort the SQLite transaction
+                    if "duplicate column" not in str(e):
+                        raise
+                    continue
+                print(f"✅ Added account_id to {table}")
+
+        for table in DERIVED_TABLES:
+            if inspector.has_table(table) and "account_id" not in {c["name"] for c in inspector.get_columns(table)}:
+                conn.exec_driver_sql(f"DROP TABLE {table}")
+                print(f"✅ Dropped {table} (rebuilt per account)")
+
+        for index in OBSOLETE_INDEXES:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index}")
+
+def ensure_indexes():
+    """
+    Creates indexes declared on models that are missing from existing tables.
+    create_all() only builds indexes together with new tables.
+    IF NOT EXISTS: workers starting together do not race on the same index.
+    """
+    with write_engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database and tables created successfully!")
\ No newline at end of file
+    # Write engine (BEGIN IMMEDIATE): create_all reads the schema before
+    # creating tables, and a deferred transaction would fail with "database
+    # is locked" instead of waiting when several workers start together.
+    migrate_accounts()
+    for attempt in range(SCHEMA_CREATE_ATTEMPTS):
+        try:
+            Base.metadata.create_all(bind=write_engine)
+            break
+        except OperationalError as e:
+            # "default" profile (no BEGIN IMMEDIATE): another worker created one first
+            if "already exists" not in str(e) or attempt == SCHEMA_CREATE_ATTEMPTS - 1:
+                raise
+    ensure_indexes()
+    print("✅ Database and tables created successfully!")
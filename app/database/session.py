@@ -2,7 +2,7 @@
 
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
-from app.database.db import engine
+from app.database.db import engine, WriteSessionLocal
 
 # -------------------- Unified Session --------------------
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -23,6 +23,16 @@ def get_db():
 def db_session():
     """Manual context manager for DB operations outside FastAPI routes."""
     db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@contextmanager
+def write_db_session():
+    """Like db_session, but the transaction starts with the write lock held."""
+    db = WriteSessionLocal()
     try:
         yield db
     finally:
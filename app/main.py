@@ -2,23 +2,26 @@
 # Standard Library
 # =========================
 import os
+import base64
 import asyncio
-from typing import List, Dict
-from collections import defaultdict, deque
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Optional
 
 # =========================
 # FastAPI & Starlette
 # =========================
-from fastapi import FastAPI, Depends, APIRouter
+from fastapi import FastAPI, Depends, APIRouter, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 
 # =========================
 # SQLAlchemy
 # =========================
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+from sqlalchemy import tuple_, type_coerce, String
 
 # =========================
 # Pydantic
@@ -28,22 +31,44 @@ from pydantic import BaseModel
 # =========================
 # Database
 # =========================
-from app.database.db import Base, engine, SessionLocal
-from app.database.session import get_db
+from app.database.db import SessionLocal
+from app.database.init_db import init_db
+from app.database.session import write_db_session
+from app.database.executor import run_db, run_db_write, shutdown_db_executor
 
 # =========================
 # Models
 # =========================
-from app.models.balance import Balance
+from app.models.account import DEFAULT_ACCOUNT_ID
 from app.models.transaction import Transaction
-from app.models.crypto import Crypto
 
 # =========================
 # Services & Utils
 # =========================
-from app.services.crypto_ws import start_crypto_ws
-from app.utils.cache import get_symbol_price, get_crypto_prices
+from app.services.crypto_ws import (
+    start_crypto_ws, stop_crypto_ws, get_ingest_stats, get_open_candle, get_resting_order_trigger
+)
+from app.services.candle_store import CANDLE_INTERVALS, read_candles
+from app.services.price_stream import price_broadcaster
+from app.services.symbol_registry import get_symbol_registry, reload_symbol_registry
+from app.services.lot_ledger import get_positions, ledger_needs_rebuild, rebuild_ledger
+from app.services.portfolio_analytics import load_trade_history, compute_analytics
+from app.services.order_service import OrderRejected, get_balance_amount, get_or_create_balance, place_buy, place_sell, place_batch
+from app.services.accounts import (
+    STARTING_BALANCE, AccountNotFound, account_exists, is_known_account,
+    create_account, list_accounts, ensure_default_account
+)
+from app.services.resting_orders import (
+    ORDER_SIDES, ORDER_TYPES, create_resting_order, cancel_resting_order, list_resting_orders
+)
+from app.utils.cache import ALL_PRICES_TTL, get_symbol_price, get_symbol_prices, get_crypto_prices
+from app.utils.idempotency import run_idempotent
+from app.utils.versioning import (
+    ORDERS_VERSION, BALANCE_VERSION, PRICES_VERSION, SYMBOLS_VERSION,
+    version_key, bump_versions, bump_account_versions, versioned_response
+)
 from app.utils.redis_client import get_redis, close_redis
+from app.utils.metrics import Counter, Histogram, render_metrics
 
 # =========================
 # Routers
@@ -53,6 +78,21 @@ order_router = APIRouter()
 # ----------------- APP INIT -----------------
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Minimum seconds between pushes to one /ws/prices client
+PRICE_STREAM_INTERVAL = float(os.getenv("PRICE_STREAM_INTERVAL", 1.0))
+
+# /api/transactions page sizes
+TRANSACTIONS_PAGE_SIZE = 100
+TRANSACTIONS_MAX_PAGE_SIZE = 1000
+ORDER_BATCH_MAX_SIZE = int(os.getenv("ORDER_BATCH_MAX_SIZE", 1000))
+CANDLES_MAX_LIMIT = 5000
+
+# Hot-path metrics, scraped from /metrics
+ORDER_LATENCY = Histogram("order_seconds", "Order handler latency in seconds", ["side"])
+ORDERS = Counter("orders_total", "Orders handled, by outcome (filled / rejected)", ["side", "outcome"])
+ORDER_REJECTIONS = Counter("order_rejections_total", "Rejected orders by reason", ["side", "reason"])
+HOLDINGS_LATENCY = Histogram("holdings_seconds", "Holdings handler latency in seconds")
+
 app = FastAPI(
     title="Crypto Trading Simulator",
     description="Simulate crypto trading with virtual money",
@@ -68,6 +108,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(AccountNotFound)
+async def account_not_found_handler(request: Request, exc: AccountNotFound):
+    return JSONResponse(status_code=404, content={"error": "Unknown account", "account_id": exc.account_id})
+
 # ----------------- STATIC FILES -----------------
 app.mount(
     "/static",
@@ -103,15 +147,11 @@ def portfolio_page():
 #                 DASHBOARD API
 # =================================================
 
-@app.get("/dashboard/prices", tags=["Dashboard"])
-async def get_dashboard_prices(
-    db: Session = Depends(get_db)
-) -> List[Dict]:
+async def build_dashboard_prices() -> List[Dict]:
     """
     Returns list of cryptos with name, symbol, price, and 24h change
     """
-    cryptos = db.query(Crypto).all()
-    crypto_map = {c.binance_symbol: c for c in cryptos}
+    registry = get_symbol_registry()
 
     data = await get_crypto_prices()
     if not data:
@@ -126,8 +166,7 @@ async def get_dashboard_prices(
         if not symbol or price is None:
             continue
 
-        crypto = crypto_map.get(symbol)
-        name = crypto.name if crypto else symbol
+        name = registry.name_for(symbol, symbol)
 
         response.append({
             "name": name,
@@ -138,104 +177,278 @@ async def get_dashboard_prices(
 
     return response
 
+
+@app.get("/dashboard/prices", tags=["Dashboard"])
+async def get_dashboard_prices(request: Request):
+    """
+    Returns list of cryptos with name, symbol, price, and 24h change.
+    Versioned by snapshot flushes (ETag / 304, shared cached payload).
+    """
+    return await versioned_response(
+        request, "dashboard_prices", "dashboard_prices", [version_key(PRICES_VERSION)],
+        build_dashboard_prices, max_age=ALL_PRICES_TTL
+    )
+
+
+@app.websocket("/ws/prices")
+async def stream_prices(websocket: WebSocket):
+    """
+    Pushes price updates to the dashboard.
+    Sends one full snapshot, then batches of changed entries at most every
+    PRICE_STREAM_INTERVAL seconds. Ticks for a slow client are conflated per symbol.
+    """
+    await websocket.accept()
+    subscriber = price_broadcaster.subscribe()
+
+    try:
+        snapshot = await build_dashboard_prices()
+        await websocket.send_json({"type": "snapshot", "data": snapshot})
+
+        while True:
+            batch = await subscriber.next_batch()
+            await websocket.send_json({"type": "prices", "data": batch})
+            await asyncio.sleep(PRICE_STREAM_INTERVAL)
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"⚠️ Price stream closed: {e}")
+    finally:
+        price_broadcaster.unsubscribe(subscriber)
+
+@app.post("/api/symbols/reload", tags=["Dashboard"])
+async def reload_symbols():
+    """
+    Rebuilds the in-memory symbol registry (e.g. after running insert_crypto.py).
+    Other workers follow the bumped registry version within SYMBOLS_POLL_INTERVAL;
+    the ingest leader then resubscribes its shards to the new symbol list.
+    """
+    registry = await asyncio.to_thread(reload_symbol_registry)
+    await bump_versions(version_key(SYMBOLS_VERSION))
+    return {"symbols": len(registry)}
+
+# =================================================
+#                   ACCOUNTS
+# =================================================
+
+async def get_account_id(x_account_id: Optional[int] = Header(None)) -> int:
+    """
+    Account of the request from the X-Account-Id header (default account
+    when absent). Known ids are cached, so this is usually free.
+    """
+    account_id = DEFAULT_ACCOUNT_ID if x_account_id is None else x_account_id
+    if not is_known_account(account_id) and not await run_db(account_exists, account_id):
+        raise AccountNotFound(account_id)
+    return account_id
+
+
+class AccountRequest(BaseModel):
+    name: str
+    balance: float = STARTING_BALANCE
+
+
+@app.post("/api/accounts", tags=["Accounts"])
+async def post_account(account: AccountRequest):
+    """
+    Creates a simulated trader. Send its id as X-Account-Id on balance,
+    order, portfolio and transaction requests.
+    """
+    name = account.name.strip()
+    if not name or account.balance < 0:
+        return JSONResponse(status_code=400, content={"error": "Invalid account request"})
+
+    result = await run_db_write(create_account, name, account.balance)
+    if result is None:
+        return JSONResponse(status_code=409, content={"error": "Account name already exists"})
+    return result
+
+
+@app.get("/api/accounts", tags=["Accounts"])
+async def get_accounts():
+    return {"accounts": await run_db(list_accounts)}
+
 # =================================================
 #                PORTFOLIO API
 # =================================================
 router = APIRouter()
 
 @router.get("/portfolio/holdings", tags=["Portfolio"])
-async def get_portfolio_holdings():
+async def get_portfolio_holdings(request: Request, account_id: int = Depends(get_account_id)):
     """
-    Returns unsold crypto holdings using FIFO (universal user)
+    Returns the account's unsold crypto holdings using FIFO.
+    Reads the persisted positions, so cost is O(held symbols), not O(history).
+    Versioned by the account's fills and price snapshot flushes.
     """
-    db: Session = SessionLocal()
-    try:
-        #Fetch all transactions ordered by time (no users)
-        transactions = (
-            db.query(Transaction)
-            .order_by(Transaction.timestamp.asc(), Transaction.id.asc())
-            .all()
+    with HOLDINGS_LATENCY.time():
+        return await versioned_response(
+            request, "holdings", f"holdings:{account_id}",
+            [version_key(ORDERS_VERSION, account_id), version_key(PRICES_VERSION)],
+            lambda: _build_holdings(account_id), max_age=ALL_PRICES_TTL
         )
 
-        #FIFO processing per crypto
-        portfolio_lots = defaultdict(deque)
-
-        for tx in transactions:
-            symbol = tx.crypto_symbol.upper()  # Ensure uppercase
-
-            if tx.transaction_type == "BUY":
-                portfolio_lots[symbol].append({
-                    "quantity": tx.quantity,
-                    "price": tx.price
-                })
-
-            elif tx.transaction_type == "SELL":
-                qty_to_sell = tx.quantity
-                while qty_to_sell > 0 and portfolio_lots[symbol]:
-                    buy_lot = portfolio_lots[symbol][0]
-
-                    if buy_lot["quantity"] <= qty_to_sell:
-                        qty_to_sell -= buy_lot["quantity"]
-                        portfolio_lots[symbol].popleft()
-                    else:
-                        buy_lot["quantity"] -= qty_to_sell
-                        qty_to_sell = 0
-
-        #Build holdings with live prices
-        holdings = []
-
-        for symbol, lots in portfolio_lots.items():
-            total_qty = sum(lot["quantity"] for lot in lots)
-            if total_qty <= 0:
-                continue
-
-            avg_price = sum(
-                lot["quantity"] * lot["price"] for lot in lots
-            ) / total_qty
-
-            #Query live price from Redis WS cache using symbol + 'USDT'
-            symbol_usdt = f"{symbol}USDT"
-            price_data = await get_symbol_price(symbol_usdt)
-            live_price = None
-            if price_data:
-                live_price = float(
-                    price_data.get("c") or
-                    price_data.get("p") or
-                    price_data.get("price", 0)
-                )
-
-            holdings.append({
-                "symbol": symbol,
-                "quantity": round(total_qty, 8),
-                "avg_price": round(avg_price, 2),
-                "live_price": live_price,
-                "profit_loss": (
-                    round((live_price - avg_price) * total_qty, 2)
-                    if live_price is not None else 0
-                )
-            })
-
-        return {"holdings": holdings}
 
-    finally:
-        db.close()
+async def _build_holdings(account_id: int) -> dict:
+    #Positions are maintained by the order endpoints (FIFO ledger)
+    positions = await run_db(get_positions, account_id)
+
+    #Live prices for every held symbol in one Redis round trip
+    price_map = await get_symbol_prices(f"{p['symbol']}USDT" for p in positions)
+
+    #Build holdings with live prices
+    holdings = []
+
+    for position in positions:
+        symbol = position["symbol"]
+        total_qty = position["quantity"]
+        avg_price = position["cost_basis"] / total_qty
+
+        #Live price from Redis WS cache using symbol + 'USDT'
+        price_data = price_map.get(f"{symbol}USDT")
+        live_price = None
+        if price_data:
+            live_price = float(
+                price_data.get("c") or
+                price_data.get("p") or
+                price_data.get("price", 0)
+            )
+
+        holdings.append({
+            "symbol": symbol,
+            "quantity": round(total_qty, 8),
+            "avg_price": round(avg_price, 2),
+            "live_price": live_price,
+            "profit_loss": (
+                round((live_price - avg_price) * total_qty, 2)
+                if live_price is not None else 0
+            )
+        })
+
+    return {"holdings": holdings}
+
+
+@router.get("/portfolio/analytics", tags=["Portfolio"])
+async def get_portfolio_analytics(account_id: int = Depends(get_account_id)):
+    """
+    Portfolio analytics over the account's full transaction history:
+    realized/unrealized P&L (FIFO), per-symbol cost basis, turnover,
+    time-weighted and money-weighted returns.
+    """
+    history = await run_db(load_trade_history, account_id)
+
+    price_map = await get_symbol_prices(f"{s}USDT" for s in history.symbols)
+    prices = {}
+    for symbol in history.symbols:
+        price_data = price_map.get(f"{symbol}USDT")
+        if price_data:
+            prices[symbol] = float(
+                price_data.get("c") or
+                price_data.get("p") or
+                price_data.get("price", 0)
+            )
+
+    #Array math releases the GIL for most of its time; keep it off the loop
+    return await asyncio.to_thread(compute_analytics, history, prices, time.time())
 
 # =================================================
 #             TRANSACTION HISTORY API
 # =================================================
 
+def _encode_cursor(timestamp_raw: str, tx_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp_raw}|{tx_id}".encode()).decode()
+
+def _decode_cursor(cursor: str):
+    timestamp_raw, tx_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+    return timestamp_raw, int(tx_id)
+
+
 @app.get("/api/transactions", tags=["Transactions"])
-def get_all_transactions():
-    db = SessionLocal()
-    try:
-        transactions = (
-            db.query(Transaction)
-            .order_by(Transaction.timestamp.desc())
-            .all()
+async def get_all_transactions(
+    request: Request,
+    limit: int = Query(TRANSACTIONS_PAGE_SIZE, ge=1, le=TRANSACTIONS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    symbol: Optional[str] = None,
+    side: Optional[str] = None,
+    account_id: int = Depends(get_account_id)
+):
+    """
+    Returns the account's transactions newest first, one page at a time.
+    Keyset pagination on (timestamp, id): pass the X-Next-Cursor response
+    header back as ?cursor= to get the next (older) page.
+    Optional filters: since (ISO datetime), symbol (e.g. BTC), side (buy/sell).
+    Versioned by the account's fills (ETag / 304 per query).
+    """
+    return await versioned_response(
+        request, "transactions", f"transactions:{account_id}:{request.url.query}",
+        [version_key(ORDERS_VERSION, account_id)],
+        lambda: run_db(_build_transactions, limit, cursor, since, symbol, side, account_id)
+    )
+
+
+def _build_transactions(
+    db: Session,
+    limit: int,
+    cursor: Optional[str],
+    since: Optional[datetime],
+    symbol: Optional[str],
+    side: Optional[str],
+    account_id: int
+):
+    # Compare timestamps as stored text so cursors round-trip exactly
+    timestamp_col = type_coerce(Transaction.timestamp, String)
+
+    query = (
+        db.query(Transaction, timestamp_col.label("timestamp_raw"))
+        .filter(Transaction.account_id == account_id)
+    )
+
+    if symbol:
+        # Without statistics SQLite prefers the (account_id, timestamp, id) index
+        # for its ORDER BY and scans every trade of the account for one symbol
+        query = (
+            query
+            .filter(Transaction.crypto_symbol == symbol.upper().replace("USDT", ""))
+            .with_hint(Transaction, "INDEXED BY ix_transactions_account_symbol_timestamp_id", "sqlite")
         )
 
-        return [
+    if side:
+        if side.upper() not in ("BUY", "SELL"):
+            return JSONResponse(
+                status_code=400,
+                content={"error": "Invalid side, must be 'buy' or 'sell'"}
+            )
+        query = query.filter(Transaction.transaction_type == side.upper())
+
+    if since:
+        if since.tzinfo:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        query = query.filter(timestamp_col >= since.isoformat(sep=" "))
+
+    if cursor:
+        try:
+            cursor_timestamp, cursor_id = _decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return JSONResponse(status_code=400, content={"error": "Invalid cursor"})
+        query = query.filter(
+            tuple_(timestamp_col, Transaction.id) < (cursor_timestamp, cursor_id)
+        )
+
+    rows = (
+        query
+        .order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+    headers = {}
+    if len(rows) == limit:
+        last_tx, last_timestamp = rows[-1]
+        headers["X-Next-Cursor"] = _encode_cursor(last_timestamp, last_tx.id)
+
+    return JSONResponse(
+        content=jsonable_encoder([
             {
+                "id": t.id,
                 "transaction_type": t.transaction_type.lower(),
                 "crypto_symbol": t.crypto_symbol,
                 "quantity": t.quantity,
@@ -244,10 +457,78 @@ def get_all_transactions():
                 "timestamp": t.timestamp,
                 "status": "completed"
             }
-            for t in transactions
-        ]
-    finally:
-        db.close()
+            for t, _ in rows
+        ]),
+        headers=headers
+    )
+
+# =================================================
+#                   CANDLES
+# =================================================
+
+@app.get("/api/candles", tags=["Market Data"])
+def get_candles(
+    symbol: str,
+    interval: str = "1m",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    limit: int = Query(500, ge=1, le=CANDLES_MAX_LIMIT)
+):
+    """
+    OHLC candles for a symbol (BTC or BTCUSDT), oldest first.
+    start/end are unix seconds on the candle open time (end exclusive);
+    without start, the latest `limit` candles are returned. On the ingest
+    leader the candle still being built is appended.
+    """
+    if interval not in CANDLE_INTERVALS:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"Invalid interval, must be one of {', '.join(CANDLE_INTERVALS)}"}
+        )
+
+    coin = get_symbol_registry().resolve(symbol)
+    if not coin:
+        return JSONResponse(status_code=400, content={"error": "Unknown symbol"})
+
+    candles = read_candles(coin.binance_symbol, interval, start, end, limit)
+
+    current = get_open_candle(coin.binance_symbol, interval)
+    if (
+        current
+        and (not candles or current.open_time > candles[-1].open_time)
+        and (start is None or current.open_time >= start)
+        and (end is None or current.open_time < end)
+        and (start is None or len(candles) < limit)
+    ):
+        candles.append(current)
+        if len(candles) > limit:
+            candles.pop(0)
+
+    return {
+        "symbol": coin.binance_symbol,
+        "interval": interval,
+        "candles": [c.as_dict() for c in candles]
+    }
+
+# =================================================
+#                 INGEST STATS
+# =================================================
+
+@app.get("/api/ingest/stats", tags=["Ingest"])
+def ingest_stats():
+    """
+    Market-data ingest metrics (tick conflation and Redis flushes).
+    """
+    return get_ingest_stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus text exposition: ingest, Redis cache and order hot paths.
+    Per process; every worker is scraped on its own.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 # =================================================
 #              STARTUP / SHUTDOWN
@@ -255,8 +536,21 @@ def get_all_transactions():
 
 @app.on_event("startup")
 async def startup_event():
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables ensured")
+    # Single-user databases get account_id columns (derived tables are dropped and rebuilt below)
+    init_db()
+    with SessionLocal() as db:
+        ensure_default_account(db)
+
+    # Positions not seeded yet (first start, migration, or a start that failed
+    # before the rebuild): seed them from the transaction log. Checked and
+    # rebuilt under the write lock, so only one worker rebuilds.
+    with write_db_session() as db:
+        if ledger_needs_rebuild(db):
+            count = rebuild_ledger(db)
+            print(f"✅ Ledger rebuilt ({count} open lots)")
+
+    registry = reload_symbol_registry()
+    print(f"✅ Symbol registry loaded ({len(registry)} symbols)")
 
     for attempt in range(3):
         try:
@@ -269,13 +563,15 @@ async def startup_event():
     else:
         raise RuntimeError("❌ Redis is required")
 
-    asyncio.create_task(start_crypto_ws())
-    print("✅ Binance WebSocket started")
+    await start_crypto_ws()
+    print("✅ Market data started (leader ingests, other workers follow)")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     print("Shutting down, closing Redis")
+    await stop_crypto_ws()
     await close_redis()
+    shutdown_db_executor()
 
 
 app.include_router(router, prefix="/api")
@@ -285,24 +581,32 @@ balance_router = APIRouter()
 
 
 @balance_router.get("/balance", tags=["Balance"])
-def get_balance(db: Session = Depends(get_db)):
-    balance = db.query(Balance).first()
+async def get_balance(request: Request, account_id: int = Depends(get_account_id)):
+    """Versioned by the account's balance changes (ETag / 304)."""
+    return await versioned_response(
+        request, "balance", f"balance:{account_id}", [version_key(BALANCE_VERSION, account_id)],
+        lambda: run_db(_read_balance, account_id)
+    )
 
-    if not balance:
-        balance = Balance(amount=100000.0)
-        db.add(balance)
-        db.commit()
-        db.refresh(balance)
 
-    return {"balance": round(balance.amount, 2)}
+def _read_balance(db: Session, account_id: int) -> dict:
+    #Read pool: no balance row yet means the starting balance, nothing is inserted here
+    return {"balance": round(get_balance_amount(db, account_id), 2)}
 
 
 @balance_router.post("/balance/update", tags=["Balance"])
-def update_balance(payload: dict, db: Session = Depends(get_db)):
+async def update_balance(payload: dict, account_id: int = Depends(get_account_id)):
     """
     Update virtual balance by adding or removing funds.
     Payload: { "action": "add" | "remove", "amount": float }
     """
+    result = await run_db_write(_update_balance, payload, account_id)
+    if not isinstance(result, JSONResponse):
+        await bump_account_versions(account_id, orders=False)
+    return result
+
+
+def _update_balance(db: Session, payload: dict, account_id: int):
     action = payload.get("action")
     try:
         amount = float(payload.get("amount", 0))
@@ -319,12 +623,7 @@ def update_balance(payload: dict, db: Session = Depends(get_db)):
         )
 
     # Ensure balance exists
-    balance = db.query(Balance).first()
-    if not balance:
-        balance = Balance(amount=100000.0)
-        db.add(balance)
-        db.commit()
-        db.refresh(balance)
+    balance = get_or_create_balance(db, account_id)
 
     if action == "add":
         balance.amount += amount
@@ -358,139 +657,236 @@ class OrderRequest(BaseModel):
     quantity: float
 
 
+def _reject(side: str, reason: str, content: dict) -> JSONResponse:
+    ORDERS.inc((side, "rejected"))
+    ORDER_REJECTIONS.inc((side, reason))
+    return JSONResponse(status_code=400, content=content)
+
+
+def _rejection_reason(content: dict) -> str:
+    #"Insufficient balance" -> insufficient_balance
+    return str(content.get("error", "rejected")).lower().replace(" ", "_")
+
+
 # ----------------------------
 # BUY CRYPTO
 # ----------------------------
 @order_router.post("/order/buy", tags=["Order"])
-async def buy_crypto(order: OrderRequest, db: Session = Depends(get_db)):
+async def buy_crypto(
+    order: OrderRequest,
+    account_id: int = Depends(get_account_id),
+    idempotency_key: Optional[str] = Header(None)
+):
+    with ORDER_LATENCY.time(("buy",)):
+        return await run_idempotent(
+            idempotency_key, account_id, "/order/buy", order, lambda: _buy_crypto(order, account_id)
+        )
+
+
+async def _buy_crypto(order: OrderRequest, account_id: int):
     symbol = order.symbol.upper()
     quantity = order.quantity
 
     if not symbol or quantity <= 0:
-        return JSONResponse(status_code=400, content={"error": "Invalid buy request"})
+        return _reject("buy", "invalid_request", {"error": "Invalid buy request"})
 
     #Get live price from Redis WS cache
     price_data = await get_symbol_price(symbol)
     if not price_data:
-        return JSONResponse(status_code=400, content={"error": "Live price not available"})
+        return _reject("buy", "no_price", {"error": "Live price not available"})
 
     price = float(price_data.get("c") or price_data.get("p") or price_data.get("price", 0))
-    total_cost = price * quantity
-
-    #Ensure balance exists
-    balance = db.query(Balance).first()
-    if not balance:
-        balance = Balance(amount=100000.0)
-        db.add(balance)
-        db.commit()
-        db.refresh(balance)
-
-    #Balance check
-    if balance.amount < total_cost:
-        return JSONResponse(
-            status_code=400,
-            content={
-                "error": "Insufficient balance",
-                "required": round(total_cost, 2),
-                "available": round(balance.amount, 2)
-            }
-        )
 
-    #Deduct balance
-    balance.amount -= total_cost
+    #Balance check, debit, insert and lot update in one DB transaction (off the event loop)
+    try:
+        result = await run_db_write(place_buy, symbol, quantity, price, account_id)
+    except OrderRejected as e:
+        return _reject("buy", _rejection_reason(e.content), e.content)
 
-    #Insert BUY transaction
-    tx = Transaction(
-        transaction_type="BUY",
-        crypto_symbol=symbol.replace("USDT", ""),
-        quantity=quantity,
-        price=price
-    )
-    db.add(tx)
-    db.commit()
-
-    return {
-        "message": "Order executed",
-        "side": "BUY",
-        "symbol": symbol,
-        "quantity": round(quantity, 8),
-        "price": round(price, 2),
-        "spent": round(total_cost, 2),
-        "balance": round(balance.amount, 2)
-    }
+    ORDERS.inc(("buy", "filled"))
+    await bump_account_versions(account_id)
+    return result
 
 
 # ----------------------------
 # SELL CRYPTO
 # ----------------------------
 @order_router.post("/order/sell", tags=["Order"])
-async def sell_crypto(order: OrderRequest, db: Session = Depends(get_db)):
+async def sell_crypto(
+    order: OrderRequest,
+    account_id: int = Depends(get_account_id),
+    idempotency_key: Optional[str] = Header(None)
+):
+    with ORDER_LATENCY.time(("sell",)):
+        return await run_idempotent(
+            idempotency_key, account_id, "/order/sell", order, lambda: _sell_crypto(order, account_id)
+        )
+
+
+async def _sell_crypto(order: OrderRequest, account_id: int):
     symbol = order.symbol.upper()
     quantity = order.quantity
 
     if not symbol or quantity <= 0:
-        return JSONResponse(status_code=400, content={"error": "Invalid sell request"})
+        return _reject("sell", "invalid_request", {"error": "Invalid sell request"})
+
+    #Get live price
+    price_data = await get_symbol_price(symbol)
+    if not price_data:
+        return _reject("sell", "no_price", {"error": "Live price not available"})
+
+    price = float(price_data.get("c") or price_data.get("p") or price_data.get("price", 0))
+
+    #Holdings check, credit, insert and lot update in one DB transaction (off the event loop)
+    try:
+        result = await run_db_write(place_sell, symbol, quantity, price, account_id)
+    except OrderRejected as e:
+        return _reject("sell", _rejection_reason(e.content), e.content)
+
+    ORDERS.inc(("sell", "filled"))
+    await bump_account_versions(account_id)
+    return result
+
+
+# ----------------------------
+# BATCH ORDERS
+# ----------------------------
+class BatchOrder(BaseModel):
+    symbol: str
+    side: str
+    quantity: float
+
 
-    base_symbol = symbol.replace("USDT", "")
+class BatchOrderRequest(BaseModel):
+    orders: List[BatchOrder]
+    atomic: bool = False
 
-    #Calculate available quantity
-    bought_qty = (
-        db.query(func.coalesce(func.sum(Transaction.quantity), 0))
-        .filter(Transaction.crypto_symbol == base_symbol, Transaction.transaction_type == "BUY")
-        .scalar()
+
+@order_router.post("/order/batch", tags=["Order"])
+async def batch_orders(
+    batch: BatchOrderRequest,
+    account_id: int = Depends(get_account_id),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """
+    Executes many market orders with one price snapshot and one commit.
+    Orders run in list order against running balance / position totals;
+    results are per order. atomic=true: any rejection rejects the batch.
+    """
+    return await run_idempotent(
+        idempotency_key, account_id, "/order/batch", batch, lambda: _batch_orders(batch, account_id)
     )
 
-    sold_qty = (
-        db.query(func.coalesce(func.sum(Transaction.quantity), 0))
-        .filter(Transaction.crypto_symbol == base_symbol, Transaction.transaction_type == "SELL")
-        .scalar()
+
+async def _batch_orders(batch: BatchOrderRequest, account_id: int):
+    if not batch.orders or len(batch.orders) > ORDER_BATCH_MAX_SIZE:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"A batch must contain 1 to {ORDER_BATCH_MAX_SIZE} orders"}
+        )
+
+    with ORDER_LATENCY.time(("batch",)):
+        orders = [(o.side.upper(), o.symbol.upper(), o.quantity) for o in batch.orders]
+
+        #One price snapshot for the whole batch (price book, then one Redis MGET)
+        price_map = await get_symbol_prices(symbol for _, symbol, _ in orders)
+        prices = {
+            symbol: float(data.get("c") or data.get("p") or data.get("price", 0))
+            for symbol, data in price_map.items()
+        }
+
+        result = await run_db_write(place_batch, orders, prices, account_id, batch.atomic)
+
+    for order in result["results"]:
+        side = order["side"].lower() if order["side"] in ("BUY", "SELL") else "invalid"
+        if order["status"] == "rejected":
+            ORDERS.inc((side, "rejected"))
+            ORDER_REJECTIONS.inc((side, _rejection_reason(order)))
+        elif order["status"] == "executed":
+            ORDERS.inc((side, "filled"))
+
+    if not result["committed"]:
+        return JSONResponse(status_code=400, content=result)
+    if result["executed"]:
+        await bump_account_versions(account_id)
+    return result
+
+
+# ----------------------------
+# RESTING ORDERS (LIMIT / STOP_LOSS / TAKE_PROFIT)
+# ----------------------------
+class RestingOrderRequest(BaseModel):
+    symbol: str
+    side: str
+    order_type: str
+    quantity: float
+    trigger_price: float
+
+
+@order_router.post("/order/resting", tags=["Order"])
+async def place_resting_order(
+    order: RestingOrderRequest,
+    account_id: int = Depends(get_account_id),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """
+    Rests an order until a tick reaches trigger_price, then fills it at
+    that tick's price. LIMIT / TAKE_PROFIT buy at or below and sell at or
+    above the trigger; STOP_LOSS sells at or below / buys at or above.
+    """
+    return await run_idempotent(
+        idempotency_key, account_id, "/order/resting", order, lambda: _place_resting_order(order, account_id)
     )
 
-    available_qty = bought_qty - sold_qty
 
-    if available_qty < quantity:
+async def _place_resting_order(order: RestingOrderRequest, account_id: int):
+    side = order.side.upper()
+    order_type = order.order_type.upper()
+
+    if side not in ORDER_SIDES or order_type not in ORDER_TYPES:
         return JSONResponse(
             status_code=400,
-            content={"error": "Not enough holdings", "available": round(available_qty, 8)}
+            content={"error": f"side must be one of {', '.join(ORDER_SIDES)}, "
+                              f"order_type one of {', '.join(ORDER_TYPES)}"}
         )
+    if order.quantity <= 0 or order.trigger_price <= 0:
+        return JSONResponse(status_code=400, content={"error": "Invalid resting order"})
 
-    #Get live price
-    price_data = await get_symbol_price(symbol)
-    if not price_data:
-        return JSONResponse(status_code=400, content={"error": "Live price not available"})
+    coin = get_symbol_registry().resolve(order.symbol)
+    if not coin:
+        return JSONResponse(status_code=400, content={"error": "Unknown symbol"})
 
-    price = float(price_data.get("c") or price_data.get("p") or price_data.get("price", 0))
-    total_credit = price * quantity
-
-    #Credit balance
-    balance = db.query(Balance).first()
-    if not balance:
-        balance = Balance(amount=100000.0)
-        db.add(balance)
-        db.commit()
-        db.refresh(balance)
-
-    balance.amount += total_credit
-
-    #Insert SELL transaction
-    tx = Transaction(
-        transaction_type="SELL",
-        crypto_symbol=base_symbol,
-        quantity=quantity,
-        price=price
+    result = await run_db_write(
+        create_resting_order, account_id, coin.binance_symbol, side, order_type, order.quantity, order.trigger_price
     )
-    db.add(tx)
-    db.commit()
 
-    return {
-        "message": "Order executed",
-        "side": "SELL",
-        "symbol": symbol,
-        "quantity": round(quantity, 8),
-        "price": round(price, 2),
-        "received": round(total_credit, 2),
-        "balance": round(balance.amount, 2)
-    }
+    #Leader: index it now; other workers are picked up by the leader's DB sync
+    trigger = get_resting_order_trigger()
+    if trigger:
+        trigger.add(result)
+
+    return result
+
+
+@order_router.get("/order/resting", tags=["Order"])
+async def get_resting_orders(
+    status: Optional[str] = Query(None, description="OPEN, FILLED, CANCELLED or REJECTED"),
+    account_id: int = Depends(get_account_id)
+):
+    return {"orders": await run_db(list_resting_orders, account_id, status.upper() if status else None)}
+
+
+@order_router.delete("/order/resting/{order_id}", tags=["Order"])
+async def delete_resting_order(order_id: int, account_id: int = Depends(get_account_id)):
+    result = await run_db_write(cancel_resting_order, account_id, order_id)
+    if result is None:
+        return JSONResponse(status_code=404, content={"error": "Order not found"})
+
+    trigger = get_resting_order_trigger()
+    if trigger:
+        trigger.discard(order_id)
+
+    return result
 
 
 # ----------------------------
@@ -1,3 +1,7 @@
 # app/models/__init__.py
+from .account import Account
 from .crypto import Crypto
 from .transaction import Transaction
+from .open_lot import OpenLot
+from .position import Position
+from .resting_order import RestingOrder
@@ -0,0 +1,26 @@
+# app/models/account.py
+
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.database.db import Base
+
+# Account used when a request carries no X-Account-Id header; rows from the
+# single-user schema are migrated to it
+DEFAULT_ACCOUNT_ID = 1
+
+class Account(Base):
+    """
+    A simulated trader. Balance, transactions, lots, positions and resting
+    orders are partitioned by account_id.
+    """
+    __tablename__ = "accounts"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    name = Column(String, nullable=False, unique=True)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
@@ -1,10 +1,16 @@
 # app/models/balance.py
-from sqlalchemy import Column, Float, Integer
+from sqlalchemy import Column, Float, Integer, ForeignKey, Index
 from app.database.db import Base
 
 class Balance(Base):
     __tablename__ = "balance"
     
     id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     amount = Column(Float, default=100000.0)  
-    # starting virtual money as default
\ No newline at end of file
+    # starting virtual money as default
+
+    __table_args__ = (
+        # One balance row per account
+        Index("ix_balance_account_id", "account_id", unique=True),
+    )
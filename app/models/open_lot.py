@@ -0,0 +1,32 @@
+# app/models/open_lot.py
+
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
+from app.database.db import Base
+
+class OpenLot(Base):
+    """
+    Unsold remainder of a BUY transaction.
+    Maintained by the order endpoints so holdings never replay the full log.
+    """
+    __tablename__ = "open_lots"
+
+    # Lots are consumed in ascending id order (FIFO)
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Originating BUY transaction
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=False, unique=True)
+
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+
+    crypto_symbol = Column(String, nullable=False)
+
+    # Remaining (unsold) quantity of the lot
+    quantity = Column(Float, nullable=False)
+
+    # Executed BUY price
+    price = Column(Float, nullable=False)
+
+    __table_args__ = (
+        # FIFO scan of one account's lots for a symbol
+        Index("ix_open_lots_account_symbol_id", "account_id", "crypto_symbol", "id"),
+    )
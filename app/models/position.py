@@ -0,0 +1,19 @@
+# app/models/position.py
+
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from app.database.db import Base
+
+class Position(Base):
+    """
+    Net holding per (account, symbol), maintained inside the order transaction.
+    cost_basis is the FIFO cost of the open quantity (sum of open lots).
+    """
+    __tablename__ = "positions"
+
+    account_id = Column(Integer, ForeignKey("accounts.id"), primary_key=True)
+
+    crypto_symbol = Column(String, primary_key=True)
+
+    quantity = Column(Float, nullable=False, default=0.0)
+
+    cost_basis = Column(Float, nullable=False, default=0.0)
@@ -0,0 +1,64 @@
+# app/models/resting_order.py
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, CheckConstraint, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database.db import Base
+
+class RestingOrder(Base):
+    """
+    Limit / stop-loss / take-profit order waiting for its trigger price.
+    Open orders are mirrored in the ingest leader's in-memory trigger index;
+    when a tick crosses trigger_price the order is filled through the
+    normal order path at that tick's price.
+    """
+    __tablename__ = "resting_orders"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+
+    # Binance symbol, e.g. BTCUSDT (matched against ticks)
+    symbol = Column(String, nullable=False)
+
+    side = Column(
+        String,
+        CheckConstraint("side IN ('BUY','SELL')"),
+        nullable=False
+    )
+
+    order_type = Column(
+        String,
+        CheckConstraint("order_type IN ('LIMIT','STOP_LOSS','TAKE_PROFIT')"),
+        nullable=False
+    )
+
+    quantity = Column(Float, nullable=False)
+
+    trigger_price = Column(Float, nullable=False)
+
+    # OPEN -> FILLED | CANCELLED | REJECTED (e.g. insufficient balance at trigger time)
+    status = Column(
+        String,
+        CheckConstraint("status IN ('OPEN','FILLED','CANCELLED','REJECTED')"),
+        nullable=False,
+        default="OPEN"
+    )
+
+    fill_price = Column(Float, nullable=True)
+
+    error = Column(String, nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    closed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Open orders are loaded (and synced across workers) by id
+        Index("ix_resting_orders_status_id", "status", "id"),
+        # Listing one account's orders, newest first
+        Index("ix_resting_orders_account_id", "account_id", "id"),
+    )
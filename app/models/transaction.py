@@ -1,6 +1,6 @@
 # app/models/transaction.py
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.db import Base
@@ -10,6 +10,9 @@ class Transaction(Base):
 
     id = Column(Integer, primary_key=True, index=True)
 
+    # Owning account
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+
     # FK to crypto table using symbol
     crypto_symbol = Column(String, ForeignKey("cryptos.symbol"), nullable=False, index=True)
 
@@ -34,4 +37,16 @@ class Transaction(Base):
     )
 
     # Relationship to Crypto
-    crypto = relationship("Crypto")
\ No newline at end of file
+    crypto = relationship("Crypto")
+
+    __table_args__ = (
+        # Keyset pagination of /api/transactions within an account: (timestamp, id) DESC.
+        # Covers every column the endpoint returns, so pages never touch the table,
+        # and the account prefix keeps a page's cost independent of other accounts.
+        Index(
+            "ix_transactions_account_timestamp_id",
+            "account_id", "timestamp", "id", "crypto_symbol", "transaction_type", "quantity", "price"
+        ),
+        # Same ordering filtered by symbol
+        Index("ix_transactions_account_symbol_timestamp_id", "account_id", "crypto_symbol", "timestamp", "id"),
+    )
\ No newline at end of file
@@ -0,0 +1,81 @@
+# app/services/accounts.py
+
+from typing import List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.models.account import Account, DEFAULT_ACCOUNT_ID
+from app.models.balance import Balance
+
+# =========================
+# ACCOUNTS
+# Accounts are never deleted, so ids seen once are cached per process and
+# checking the X-Account-Id header hits the database only on first use.
+# =========================
+STARTING_BALANCE = 100000.0
+
+# The default account is created at startup (ensure_default_account)
+_known_accounts: Set[int] = {DEFAULT_ACCOUNT_ID}
+
+
+class AccountNotFound(Exception):
+    """Request named an account that does not exist (returned as a 404)."""
+
+    def __init__(self, account_id: int):
+        super().__init__(f"Unknown account {account_id}")
+        self.account_id = account_id
+
+
+def is_known_account(account_id: int) -> bool:
+    """Cache-only check (no I/O)."""
+    return account_id in _known_accounts
+
+
+def account_exists(db: Session, account_id: int) -> bool:
+    if account_id in _known_accounts:
+        return True
+    if db.get(Account, account_id) is None:
+        return False
+    _known_accounts.add(account_id)
+    return True
+
+
+def ensure_default_account(db: Session):
+    """Creates account DEFAULT_ACCOUNT_ID (owner of pre-account data) if missing."""
+    if db.get(Account, DEFAULT_ACCOUNT_ID) is None:
+        db.add(Account(id=DEFAULT_ACCOUNT_ID, name="default"))
+        db.commit()
+
+
+def _as_dict(account: Account, balance: Optional[float]) -> dict:
+    return {
+        "id": account.id,
+        "name": account.name,
+        "balance": round(balance, 2) if balance is not None else STARTING_BALANCE,
+        "created_at": account.created_at,
+    }
+
+
+def create_account(db: Session, name: str, starting_balance: float = STARTING_BALANCE) -> Optional[dict]:
+    """Creates an account with its balance row and commits; None if the name is taken."""
+    if db.query(Account.id).filter(Account.name == name).first():
+        return None
+
+    account = Account(name=name)
+    db.add(account)
+    db.flush()  # assigns account.id
+    db.add(Balance(account_id=account.id, amount=starting_balance))
+    db.commit()
+    db.refresh(account)
+
+    _known_accounts.add(account.id)
+    return _as_dict(account, starting_balance)
+
+
+def list_accounts(db: Session) -> List[dict]:
+    rows = (
+        db.query(Account, Balance.amount)
+        .outerjoin(Balance, Balance.account_id == Account.id)
+        .order_by(Account.id)
+    )
+    return [_as_dict(account, amount) for account, amount in rows]
@@ -0,0 +1,227 @@
+# app/services/candle_store.py
+
+import os
+import asyncio
+import mmap
+import struct
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.config import BASE_DIR
+from app.services.ticker_decoder import Tick
+
+# =========================
+# CANDLE STORE
+# Ticks are aggregated into OHLC candles per (symbol, interval). Closed
+# candles are appended to one file per (symbol, interval) as fixed-width
+# little-endian records, so a file is an array sorted by open time and a
+# range read is a binary search over a memory map.
+#
+# Record: open_time (unix s, int64), open, high, low, close (float64),
+# ticks (uint32). The ticker stream carries no per-trade volume, so the
+# "volume" column is the number of ticks that fell into the candle.
+# =========================
+CANDLE_DIR = Path(os.getenv("CANDLE_DIR", BASE_DIR / "data" / "candles"))
+CANDLE_INTERVALS = {"1s": 1, "1m": 60, "1h": 3600}
+CANDLE_FLUSH_INTERVAL = float(os.getenv("CANDLE_FLUSH_INTERVAL", 1.0))  # seconds
+
+CANDLE_RECORD = struct.Struct("<qddddI")
+_OPEN_TIME = struct.Struct("<q")
+
+
+class Candle:
+    __slots__ = ("open_time", "open", "high", "low", "close", "ticks")
+
+    def __init__(self, open_time: int, open: float, high: float, low: float, close: float, ticks: int = 1):
+        self.open_time = open_time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.ticks = ticks
+
+    def pack(self) -> bytes:
+        return CANDLE_RECORD.pack(self.open_time, self.open, self.high, self.low, self.close, self.ticks)
+
+    def as_dict(self) -> dict:
+        return {
+            "time": self.open_time,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "ticks": self.ticks
+        }
+
+
+def candle_path(symbol: str, interval: str, directory: Path = CANDLE_DIR) -> Path:
+    return Path(directory) / interval / f"{symbol.upper()}.bin"
+
+# =========================
+# AGGREGATION (tick path)
+# =========================
+
+class CandleAggregator:
+    """
+    Tick sink for the ingest pipeline. offer() only updates in-memory
+    candles; closed candles are written by flush() off the event loop.
+    """
+
+    def __init__(self, directory: Path = CANDLE_DIR, flush_interval: float = CANDLE_FLUSH_INTERVAL):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self._open: Dict[Tuple[str, str], Candle] = {}
+        self._closed: List[Tuple[str, str, Candle]] = []
+        self._last_written: Dict[Path, int] = {}  # open_time of the last record per file
+
+        # Metrics
+        self.ticks = 0
+        self.late_ticks = 0       # older than the candle already open, dropped
+        self.written = 0
+        self.write_errors = 0
+
+    def offer(self, tick: Tick):
+        self.ticks += 1
+        ts = tick.event_time // 1000 if tick.event_time else int(time.time())
+        price = tick.price
+
+        for interval, seconds in CANDLE_INTERVALS.items():
+            key = (tick.symbol, interval)
+            bucket = ts - ts % seconds
+            candle = self._open.get(key)
+
+            if candle is None or bucket > candle.open_time:
+                if candle is not None:
+                    self._closed.append((tick.symbol, interval, candle))
+                self._open[key] = Candle(bucket, price, price, price, price)
+            elif bucket == candle.open_time:
+                if price > candle.high:
+                    candle.high = price
+                elif price < candle.low:
+                    candle.low = price
+                candle.close = price
+                candle.ticks += 1
+            else:
+                self.late_ticks += 1
+
+    def current(self, symbol: str, interval: str) -> Optional[Candle]:
+        """The candle still being built (not on disk yet)."""
+        return self._open.get((symbol.upper(), interval))
+
+    async def flush(self):
+        if not self._closed:
+            return
+
+        closed, self._closed = self._closed, []
+        try:
+            await asyncio.to_thread(self._write, closed)
+        except Exception as e:
+            self.write_errors += 1
+            self._closed[:0] = closed  # retry on the next flush
+            print(f"⚠️ Candle write error: {e}")
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _write(self, closed: List[Tuple[str, str, Candle]]):
+        batches: Dict[Path, List[Candle]] = {}
+        for symbol, interval, candle in closed:
+            batches.setdefault(candle_path(symbol, interval, self.directory), []).append(candle)
+
+        for path, candles in batches.items():
+            last = self._last_written.get(path)
+            if last is None:
+                last = self._prepare(path)
+
+            data = bytearray()
+            for candle in candles:
+                # Keeps the file sorted, e.g. after a restart inside an open bucket
+                if candle.open_time > last:
+                    data += candle.pack()
+                    last = candle.open_time
+
+            if data:
+                with open(path, "ab") as f:
+                    f.write(data)
+                self.written += len(data) // CANDLE_RECORD.size
+            self._last_written[path] = last
+
+    @staticmethod
+    def _prepare(path: Path) -> int:
+        """Create the file if needed, drop a torn tail record and return the last open time."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            aligned = size - size % CANDLE_RECORD.size
+            if aligned != size:
+                f.truncate(aligned)
+            if not aligned:
+                return -1
+            f.seek(aligned - CANDLE_RECORD.size)
+            return _OPEN_TIME.unpack(f.read(_OPEN_TIME.size))[0]
+
+    def stats(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "open_candles": len(self._open),
+            "pending": len(self._closed),
+            "written": self.written,
+            "write_errors": self.write_errors
+        }
+
+# =========================
+# RANGE READS
+# =========================
+
+def _bisect(buf, count: int, open_time: int) -> int:
+    """First record index whose open_time >= open_time."""
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _OPEN_TIME.unpack_from(buf, mid * CANDLE_RECORD.size)[0] < open_time:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def read_candles(
+    symbol: str,
+    interval: str,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    limit: int = 1000,
+    directory: Path = CANDLE_DIR
+) -> List[Candle]:
+    """
+    Candles with start <= open_time < end (unix seconds), oldest first.
+    Without a start, the latest `limit` candles before end are returned.
+    Only the pages holding the requested slice are touched.
+    """
+    path = candle_path(symbol, interval, directory)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return []
+
+    with f:
+        count = os.fstat(f.fileno()).st_size // CANDLE_RECORD.size
+        if not count:
+            return []
+
+        with mmap.mmap(f.fileno(), count * CANDLE_RECORD.size, access=mmap.ACCESS_READ) as buf:
+            hi = _bisect(buf, count, end) if end is not None else count
+            if start is None:
+                lo = max(0, hi - limit)  # latest candles before end
+            else:
+                lo = _bisect(buf, count, start)
+                hi = min(hi, lo + limit)
+
+            return [
+                Candle(*CANDLE_RECORD.unpack_from(buf, i * CANDLE_RECORD.size))
+                for i in range(lo, hi)
+            ]
@@ -1,23 +1,66 @@
 # app/services/crypto_ws.py
 
+import os
 import asyncio
-import json
+import random
+import time
 import websockets
-from typing import List
+from typing import Dict, List, Optional
 
 from app.config import settings
-from app.database.db import SessionLocal
-from app.models.crypto import Crypto
-from app.utils.cache import set_symbol_price, get_crypto_prices, set_crypto_prices
+from app.services.symbol_registry import get_symbol_registry, reload_symbol_registry
+from app.utils import price_book
+from app.services.price_stream import price_broadcaster
+from app.services.ticker_decoder import decode_ticker_frame
+from app.services.tick_conflator import TickConflator
+from app.services.candle_store import CandleAggregator
+from app.services.tick_recorder import TickRecorder, make_tick_recorder
+from app.services.resting_orders import RestingOrderTrigger
+from app.services.leader import LeaderElector
+from app.utils.cache import get_crypto_prices
+from app.utils.versioning import SYMBOLS_VERSION, get_versions, version_key
+from app.utils.metrics import MetricFamily, register_collector
+
+# Symbols per combined-stream connection (Binance allows up to 1024 streams,
+# but shorter URLs and smaller shards limit the blast radius of a reconnect)
+WS_SYMBOLS_PER_SHARD = int(os.getenv("WS_SYMBOLS_PER_SHARD", 50))
+
+# Only the elected process ingests; the others mirror the Redis snapshot
+LEADER_KEY = "MARKETDATA:LEADER"
+FOLLOWER_POLL_INTERVAL = float(os.getenv("FOLLOWER_POLL_INTERVAL", 1.0))  # seconds
+
+# Every process polls the registry version bumped by /api/symbols/reload
+SYMBOLS_POLL_INTERVAL = float(os.getenv("SYMBOLS_POLL_INTERVAL", 5.0))  # seconds
+
+# Reconnect backoff: base * 2^attempt, capped, with jitter
+WS_BACKOFF_BASE = float(os.getenv("WS_BACKOFF_BASE", 1.0))
+WS_BACKOFF_MAX = float(os.getenv("WS_BACKOFF_MAX", 60.0))
 
 # =========================
-# COMBINED CRYPTO WS
+# COMBINED CRYPTO WS (one shard)
 # =========================
 
 class CombinedCryptoWebSocket:
-    def __init__(self, symbols: List[str]):
+    def __init__(self, symbols: List[str], sinks: List, shard_id: int = 0):
         self.symbols = [s.lower() for s in symbols]
         self.ws_url = settings.BINANCE_WS_URL
+        self.sinks = sinks  # objects with offer(tick): conflator, candle aggregator, ...
+        self.shard_id = shard_id
+
+        # Health / stats
+        self.state = "idle"            # idle | connecting | connected | backoff
+        self.reconnects = 0
+        self.messages = 0
+        self.errors = 0
+        self.connected_at: Optional[float] = None
+        self.last_message_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.lag_ms = 0.0              # exchange event time -> ingest, smoothed
+        self.symbol_lag_ms: Dict[str, float] = {}  # last lag per symbol
+        self.message_rate = 0.0        # messages/sec over the last window
+        self._attempt = 0
+        self._rate_started = time.monotonic()
+        self._rate_count = 0
 
     def _build_stream_url(self) -> str:
         """
@@ -27,76 +70,410 @@ class CombinedCryptoWebSocket:
         streams = "/".join(stream_names)
         return f"{self.ws_url}/stream?streams={streams}"
 
+    def _backoff_delay(self) -> float:
+        delay = min(WS_BACKOFF_MAX, WS_BACKOFF_BASE * (2 ** self._attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _record_message(self, event_time: Optional[int], symbol: str):
+        self.messages += 1
+        now = time.monotonic()
+        self.last_message_at = now
+
+        if event_time:
+            lag = time.time() * 1000 - event_time
+            self.symbol_lag_ms[symbol] = lag
+            self.lag_ms = lag if self.messages == 1 else 0.9 * self.lag_ms + 0.1 * lag
+
+        self._rate_count += 1
+        window = now - self._rate_started
+        if window >= 1.0:
+            self.message_rate = self._rate_count / window
+            self._rate_started = now
+            self._rate_count = 0
+
     async def run(self):
         url = self._build_stream_url()
-        print(f"✅WS connecting to combined stream ({len(self.symbols)} symbols)")
+        label = f"shard {self.shard_id} ({len(self.symbols)} symbols)"
 
         while True:
+            self.state = "connecting"
+            print(f"✅WS connecting to combined stream {label}")
             try:
                 async with websockets.connect(url, ping_interval=20, ping_timeout=20) as ws:
-                    print(f"✅ WS connected to combined stream ({len(self.symbols)} symbols)")
+                    self.state = "connected"
+                    self.connected_at = time.monotonic()
+                    print(f"✅ WS connected to combined stream {label}")
                     async for msg in ws:
                         try:
-                            data = json.loads(msg)
-                            # Binance combined stream wraps data in "data" key
-                            payload = data.get("data")
-                            if not payload or "s" not in payload:
+                            # Only symbol / price / change / event time are kept
+                            tick = decode_ticker_frame(msg)
+                            if tick is None:
                                 continue
 
-                            symbol_upper = payload["s"].upper()
+                            self._attempt = 0  # healthy again, reset backoff
+                            self._record_message(tick.event_time, tick.symbol)
 
-                            # Cache per-symbol
-                            await set_symbol_price(symbol_upper, payload, ttl=10)
+                            # In-process price book (read first by order/holdings handlers)
+                            price_book.update_price(tick.symbol, tick.price, tick.change, tick.event_time)
 
-                            # Update global snapshot
-                            await self.update_global_snapshot(symbol_upper, payload)
+                            # Dashboard price stream subscribers
+                            price_broadcaster.publish(tick.symbol, tick.snapshot_entry())
+
+                            # Redis cache (conflated), candles, ...
+                            for sink in self.sinks:
+                                sink.offer(tick)
 
                         except Exception as e:
+                            self.errors += 1
                             print(f"⚠️ Failed processing message: {e}")
 
+                    raise ConnectionError("stream closed by server")
+
+            except asyncio.CancelledError:
+                self.state = "idle"
+                raise
             except Exception as e:
-                print(f"⚠️ WS reconnecting combined stream in 3s: {e}")
-                await asyncio.sleep(3)
+                self.state = "backoff"
+                self.reconnects += 1
+                self.connected_at = None
+                self.last_error = str(e)
+                delay = self._backoff_delay()
+                self._attempt += 1
+                print(f"⚠️ WS {label} reconnecting in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "shard": self.shard_id,
+            "symbols": len(self.symbols),
+            "state": self.state,
+            "reconnects": self.reconnects,
+            "messages": self.messages,
+            "errors": self.errors,
+            "message_rate": round(self.message_rate, 2),
+            "lag_ms": round(self.lag_ms, 1),
+            "seconds_since_message": round(now - self.last_message_at, 3) if self.last_message_at else None,
+            "uptime_seconds": round(now - self.connected_at, 1) if self.connected_at else None,
+            "last_error": self.last_error,
+        }
+
+# =========================
+# SHARD SUPERVISOR
+# =========================
+
+class MarketDataSupervisor:
+    """
+    Splits the symbol list across several combined-stream connections.
+    Each shard reconnects on its own backoff; a shard task that dies
+    unexpectedly is restarted.
+    Every tick is offered to the conflator and to any extra sinks; sinks
+    with a run() coroutine (periodic flushers) are started alongside.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        conflator: TickConflator,
+        sinks: List = (),
+        symbols_per_shard: int = WS_SYMBOLS_PER_SHARD
+    ):
+        self.conflator = conflator
+        self.sinks = [conflator, *sinks]
+        self.symbols_per_shard = symbols_per_shard
+        self.shards = self._make_shards(symbols)
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._sink_tasks: List[asyncio.Task] = []
+        self._watch_task: Optional[asyncio.Task] = None
 
-    async def update_global_snapshot(self, symbol: str, data: dict):
+    def _make_shards(self, symbols: List[str]) -> List[CombinedCryptoWebSocket]:
+        n = self.symbols_per_shard
+        return [
+            CombinedCryptoWebSocket(symbols[i:i + n], self.sinks, shard_id=shard_id)
+            for shard_id, i in enumerate(range(0, len(symbols), n))
+        ]
+
+    def _start_shards(self):
+        for shard in self.shards:
+            self._tasks[shard.shard_id] = asyncio.create_task(shard.run())
+
+    async def _stop_shards(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def start(self):
+        self._sink_tasks = [asyncio.create_task(sink.run()) for sink in self.sinks if hasattr(sink, "run")]
+        self._start_shards()
+        self._watch_task = asyncio.create_task(self._watch())
+        print(f"✅ Market data supervisor started ({len(self.shards)} shards)")
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(5)
+            for shard in self.shards:
+                task = self._tasks[shard.shard_id]
+                if task.done() and not task.cancelled():
+                    print(f"⚠️ WS shard {shard.shard_id} crashed, restarting: {task.exception()}")
+                    self._tasks[shard.shard_id] = asyncio.create_task(shard.run())
+
+    async def reshard(self, symbols: List[str]):
         """
-        Updates the aggregated snapshot for dashboard.
+        Reconnects with a new symbol list (registry reload). Sinks keep
+        running, so buffered ticks, candles and resting orders carry over.
         """
-        snapshot_list = await get_crypto_prices() or []
-        snapshot_dict = {item["symbol"]: item for item in snapshot_list if "symbol" in item}
+        await self._stop_shards()
+        self.shards = self._make_shards(symbols)
+        self._start_shards()
+        print(f"✅ Market data resharded ({len(symbols)} symbols, {len(self.shards)} shards)")
 
-        snapshot_dict[symbol] = {
-            "symbol": symbol,
-            "price": float(data.get("c", 0)),
-            "change": data.get("P", "0%")
-        }
+    async def stop(self):
+        tasks = [self._watch_task, *self._sink_tasks, *self._tasks.values()]
+        for task in tasks:
+            if task:
+                task.cancel()
+        await asyncio.gather(*(t for t in tasks if t), return_exceptions=True)
+        self._tasks.clear()
+        self._sink_tasks.clear()
 
-        await set_crypto_prices(list(snapshot_dict.values()))
+        # Write out whatever is still buffered
+        for sink in self.sinks:
+            if hasattr(sink, "flush"):
+                await sink.flush()
+
+    def stats(self) -> dict:
+        shards = [shard.stats() for shard in self.shards]
+        return {
+            "shards": shards,
+            "connected_shards": sum(1 for s in shards if s["state"] == "connected"),
+            "symbols": sum(s["symbols"] for s in shards),
+            "message_rate": round(sum(s["message_rate"] for s in shards), 2),
+            "reconnects": sum(s["reconnects"] for s in shards),
+        }
 
 # =========================
-# DB LOADER
+# SYMBOL LOADER
 # =========================
 
 def get_all_binance_symbols() -> List[str]:
-    db = SessionLocal()
-    try:
-        symbols = db.query(Crypto.binance_symbol).all()
-        return [s[0].lower() for s in symbols]
-    finally:
-        db.close()
+    return [s.lower() for s in get_symbol_registry().binance_symbols]
+
+# =========================
+# FOLLOWER MODE
+# =========================
+
+async def follow_snapshot():
+    """
+    Non-leader processes: mirror the Redis snapshot into the local price
+    book and price stream so reads stay in-process without a feed connection.
+    """
+    last_seen: Dict[str, tuple] = {}
+
+    while True:
+        try:
+            for entry in await get_crypto_prices() or []:
+                symbol = entry.get("symbol")
+                value = (entry.get("price"), entry.get("change"))
+                if not symbol or last_seen.get(symbol) == value:
+                    continue
+
+                last_seen[symbol] = value
+                price_book.update_price(symbol, entry["price"], entry.get("change", "0%"))
+                price_broadcaster.publish(symbol, entry)
+
+        except Exception as e:
+            print(f"⚠️ Snapshot follower error: {e}")
+
+        await asyncio.sleep(FOLLOWER_POLL_INTERVAL)
+
+# =========================
+# SYMBOL REGISTRY RELOADS
+# =========================
+
+async def watch_symbol_registry():
+    """
+    Every process: when another worker reloaded the registry (version bump),
+    reload it here too; the leader also reshards its ingest.
+    """
+    key = version_key(SYMBOLS_VERSION)
+    seen = None
+
+    while True:
+        try:
+            (version,) = await get_versions([key])
+            if seen is not None and version != seen:
+                registry = await asyncio.to_thread(reload_symbol_registry)
+                print(f"✅ Symbol registry reloaded ({len(registry)} symbols)")
+                if market_data_supervisor is not None:
+                    await market_data_supervisor.reshard(get_all_binance_symbols())
+            seen = version
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Symbol registry watch error: {e}")
+
+        await asyncio.sleep(SYMBOLS_POLL_INTERVAL)
 
 # =========================
 # STARTUP HELPER
 # =========================
 
-crypto_ws_manager: CombinedCryptoWebSocket | None = None
+market_data_supervisor: MarketDataSupervisor | None = None
+candle_aggregator: CandleAggregator | None = None
+tick_recorder: TickRecorder | None = None
+resting_order_trigger: RestingOrderTrigger | None = None
+leader_elector: LeaderElector | None = None
+_elector_task: asyncio.Task | None = None
+_follower_task: asyncio.Task | None = None
+_registry_task: asyncio.Task | None = None
+
+
+def _start_follower():
+    global _follower_task
+    if _follower_task is None:
+        _follower_task = asyncio.create_task(follow_snapshot())
+
+
+def _stop_follower():
+    global _follower_task
+    if _follower_task is not None:
+        _follower_task.cancel()
+        _follower_task = None
+
+
+async def _on_elected():
+    global market_data_supervisor, candle_aggregator, tick_recorder, resting_order_trigger
+
+    _stop_follower()
+    candle_aggregator = CandleAggregator()
+    resting_order_trigger = RestingOrderTrigger()
+    tick_recorder = make_tick_recorder()
+    sinks = [resting_order_trigger, candle_aggregator]
+    if tick_recorder:
+        sinks.append(tick_recorder)
+
+    market_data_supervisor = MarketDataSupervisor(
+        get_all_binance_symbols(),
+        TickConflator(),
+        sinks=sinks
+    )
+    market_data_supervisor.start()
+
+
+async def _on_demoted():
+    global market_data_supervisor, candle_aggregator, tick_recorder, resting_order_trigger
+
+    if market_data_supervisor is not None:
+        await market_data_supervisor.stop()
+        market_data_supervisor = None
+    candle_aggregator = None
+    tick_recorder = None
+    resting_order_trigger = None
+    _start_follower()
+
 
 async def start_crypto_ws():
-    global crypto_ws_manager
+    """
+    Joins leader election for the market-data feed. The leader runs the
+    sharded ingest; every other worker/replica follows the Redis snapshot.
+    """
+    global leader_elector, _elector_task, _registry_task
+
+    if not get_all_binance_symbols():
+        raise RuntimeError("❌ No crypto symbols found in registry")
+
+    _start_follower()
+    _registry_task = asyncio.create_task(watch_symbol_registry())
+    leader_elector = LeaderElector(LEADER_KEY, _on_elected, _on_demoted)
+    _elector_task = asyncio.create_task(leader_elector.run())
+
+
+async def stop_crypto_ws():
+    """Stop ingest and hand leadership to another process."""
+    if _elector_task is not None:
+        _elector_task.cancel()
+    if _registry_task is not None:
+        _registry_task.cancel()
+    if leader_elector is not None:
+        await leader_elector.release()
+    _stop_follower()
+
+
+def get_open_candle(symbol: str, interval: str):
+    """Candle still being aggregated in this process (leader only)."""
+    return candle_aggregator.current(symbol, interval) if candle_aggregator else None
+
+
+def get_resting_order_trigger() -> RestingOrderTrigger | None:
+    """Trigger index of this process (leader only); other workers rely on its DB sync."""
+    return resting_order_trigger
+
+
+def get_ingest_stats() -> dict:
+    """Ingest metrics for /api/ingest/stats."""
+    return {
+        "leader": leader_elector.stats() if leader_elector else None,
+        "ingest": market_data_supervisor.stats() if market_data_supervisor else None,
+        "conflation": market_data_supervisor.conflator.stats() if market_data_supervisor else None,
+        "candles": candle_aggregator.stats() if candle_aggregator else None,
+        "recorder": tick_recorder.stats() if tick_recorder else None,
+        "resting_orders": resting_order_trigger.stats() if resting_order_trigger else None
+    }
+
+# =========================
+# PROMETHEUS COLLECTOR
+# =========================
+
+def collect_ingest_metrics():
+    """
+    Read at scrape time from the counters the ingest loop already keeps,
+    so the tick path does no extra work for /metrics.
+    """
+    yield MetricFamily("marketdata_leader", "gauge", "1 if this process runs the market-data ingest", [
+        ("", {}, 1 if market_data_supervisor is not None else 0)
+    ])
+    if market_data_supervisor is None:
+        return
+
+    shards = market_data_supervisor.shards
+    per_shard = [
+        ("marketdata_messages_total", "counter", "Ticker frames ingested", "messages"),
+        ("marketdata_message_rate", "gauge", "Ticker frames per second over the last window", "message_rate"),
+        ("marketdata_reconnects_total", "counter", "WebSocket reconnects", "reconnects"),
+        ("marketdata_errors_total", "counter", "Frames that failed processing", "errors"),
+    ]
+    for name, type, help, attr in per_shard:
+        yield MetricFamily(name, type, help, [
+            ("", {"shard": str(shard.shard_id)}, getattr(shard, attr)) for shard in shards
+        ])
+    yield MetricFamily("marketdata_shard_connected", "gauge", "1 if the shard's WebSocket is connected", [
+        ("", {"shard": str(shard.shard_id)}, 1 if shard.state == "connected" else 0) for shard in shards
+    ])
+    yield MetricFamily("marketdata_lag_seconds", "gauge", "Exchange event time to ingest, last tick per symbol", [
+        ("", {"symbol": symbol}, lag / 1000) for shard in shards for symbol, lag in shard.symbol_lag_ms.items()
+    ])
+
+    conflator = market_data_supervisor.conflator
+    yield MetricFamily("marketdata_conflator_ticks_total", "counter", "Ticks offered to the Redis conflator", [
+        ("", {}, conflator.received)
+    ])
+    yield MetricFamily("marketdata_conflator_merged_total", "counter", "Ticks superseded before a flush", [
+        ("", {}, conflator.merged)
+    ])
+    yield MetricFamily("marketdata_conflator_flush_errors_total", "counter", "Failed Redis flushes", [
+        ("", {}, conflator.flush_errors)
+    ])
+
+    if resting_order_trigger is not None:
+        yield MetricFamily("resting_orders_open", "gauge", "Resting orders in the trigger index", [
+            ("", {}, len(resting_order_trigger.index))
+        ])
+        yield MetricFamily("resting_orders_triggered_total", "counter", "Resting orders triggered by a tick", [
+            ("", {}, resting_order_trigger.triggered)
+        ])
 
-    symbols = get_all_binance_symbols()
-    if not symbols:
-        raise RuntimeError("❌ No crypto symbols found in DB")
 
-    crypto_ws_manager = CombinedCryptoWebSocket(symbols)
-    asyncio.create_task(crypto_ws_manager.run())
\ No newline at end of file
+register_collector(collect_ingest_metrics)
@@ -0,0 +1,124 @@
+# app/services/leader.py
+
+import os
+import asyncio
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from app.utils.redis_client import get_redis
+
+# =========================
+# LEADER ELECTION (Redis lock with TTL renewal)
+# =========================
+LEADER_TTL_MS = int(os.getenv("LEADER_TTL_MS", 5000))
+LEADER_RETRY_INTERVAL = float(os.getenv("LEADER_RETRY_INTERVAL", 1.0))  # seconds
+
+# Extend / release only if we still own the lock
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderElector:
+    """
+    One process across all workers/replicas holds `key` at a time.
+    The leader renews the lock every ttl/3 (each renew bounded by that
+    interval) and steps down once ttl/2 has passed without a successful
+    renew; followers retry every LEADER_RETRY_INTERVAL, so a dead leader is
+    replaced within about ttl + retry interval.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        ttl_ms: int = LEADER_TTL_MS
+    ):
+        self.key = key
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.ttl_ms = ttl_ms
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self.elections = 0
+        self._last_renewed = 0.0
+
+    async def _try_acquire(self) -> bool:
+        r = await get_redis()
+        return bool(await r.set(self.key, self.token, nx=True, px=self.ttl_ms))
+
+    async def _renew(self) -> bool:
+        r = await get_redis()
+        return bool(await r.eval(_RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms))
+
+    async def _become_leader(self):
+        self.is_leader = True
+        self.elections += 1
+        self._last_renewed = time.monotonic()
+        print(f"✅ Elected leader for {self.key} ({self.token})")
+        await self.on_elected()
+
+    async def _step_down(self, reason: str):
+        self.is_leader = False
+        print(f"⚠️ Lost leadership for {self.key}: {reason}")
+        await self.on_demoted()
+
+    async def run(self):
+        renew_interval = self.ttl_ms / 3000
+
+        while True:
+            renewing = self.is_leader
+            try:
+                if renewing:
+                    # A hung Redis call must not keep us leading past the lock's expiry
+                    sent = time.monotonic()
+                    if await asyncio.wait_for(self._renew(), renew_interval):
+                        self._last_renewed = sent
+                    else:
+                        await self._step_down("lock taken over or expired")
+                elif await self._try_acquire():
+                    await self._become_leader()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Leader election error: {e!r}")
+
+            # Whatever the renew outcome (error, timeout): stop ingesting well
+            # before the lock could expire and another worker take over
+            if renewing and self.is_leader and (time.monotonic() - self._last_renewed) * 1000 > self.ttl_ms / 2:
+                await self._step_down("renewal timed out")
+
+            await asyncio.sleep(renew_interval if self.is_leader else LEADER_RETRY_INTERVAL)
+
+    async def release(self):
+        """Give up the lock (graceful shutdown) so a follower takes over at once."""
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        await self.on_demoted()
+        try:
+            r = await get_redis()
+            await r.eval(_RELEASE_SCRIPT, 1, self.key, self.token)
+        except Exception as e:
+            print(f"⚠️ Leader release failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "role": "leader" if self.is_leader else "follower",
+            "token": self.token,
+            "elections": self.elections,
+        }
@@ -0,0 +1,280 @@
+# app/services/lot_ledger.py
+
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models.account import DEFAULT_ACCOUNT_ID
+from app.models.open_lot import OpenLot
+from app.models.position import Position
+from app.models.transaction import Transaction
+from app.utils.metrics import Gauge
+
+LEDGER_REBUILD_SECONDS = Gauge("ledger_rebuild_seconds", "Duration of the last full FIFO replay (rebuild_ledger)")
+LEDGER_REBUILD_TRANSACTIONS = Gauge("ledger_rebuild_transactions", "Transactions replayed by the last rebuild_ledger")
+
+# ----------------------------
+# FIFO LOT LEDGER + POSITIONS (PER ACCOUNT)
+# All functions run inside the caller's DB transaction (no commit),
+# except rebuild_ledger.
+# ----------------------------
+
+def record_buy(db: Session, tx: Transaction) -> OpenLot:
+    """
+    Opens a lot for a BUY transaction and adds it to the account's position.
+    """
+    db.flush()  # assigns tx.id
+
+    symbol = tx.crypto_symbol.upper()
+
+    lot = OpenLot(
+        transaction_id=tx.id,
+        account_id=tx.account_id,
+        crypto_symbol=symbol,
+        quantity=tx.quantity,
+        price=tx.price
+    )
+    db.add(lot)
+
+    cost = tx.quantity * tx.price
+    db.execute(
+        insert(Position)
+        .values(account_id=tx.account_id, crypto_symbol=symbol, quantity=tx.quantity, cost_basis=cost)
+        .on_conflict_do_update(
+            index_elements=[Position.account_id, Position.crypto_symbol],
+            set_={
+                "quantity": Position.quantity + tx.quantity,
+                "cost_basis": Position.cost_basis + cost
+            }
+        )
+    )
+    return lot
+
+
+def reserve_sell(db: Session, symbol: str, quantity: float, account_id: int = DEFAULT_ACCOUNT_ID) -> bool:
+    """
+    Atomically checks and decrements the position in one indexed UPDATE.
+    Returns False (and changes nothing) if fewer than quantity units are held,
+    so concurrent sells cannot oversell.
+    """
+    result = db.execute(
+        update(Position)
+        .where(
+            Position.account_id == account_id,
+            Position.crypto_symbol == symbol.upper(),
+            Position.quantity >= quantity
+        )
+        .values(quantity=Position.quantity - quantity)
+    )
+    return result.rowcount == 1
+
+
+def record_sell(db: Session, symbol: str, quantity: float, account_id: int = DEFAULT_ACCOUNT_ID) -> float:
+    """
+    Consumes open lots FIFO for a SELL already reserved with reserve_sell,
+    and removes their cost from the position.
+    Returns the cost basis of the consumed quantity.
+    """
+    db.flush()  # lots opened earlier in this transaction (batches, replays)
+
+    symbol = symbol.upper()
+    lots = (
+        db.query(OpenLot)
+        .filter(OpenLot.account_id == account_id, OpenLot.crypto_symbol == symbol)
+        .order_by(OpenLot.id.asc())
+    )
+
+    qty_to_sell = quantity
+    cost_basis = 0.0
+
+    for lot in lots:
+        if qty_to_sell <= 0:
+            break
+
+        if lot.quantity <= qty_to_sell:
+            qty_to_sell -= lot.quantity
+            cost_basis += lot.quantity * lot.price
+            db.delete(lot)
+        else:
+            lot.quantity -= qty_to_sell
+            cost_basis += qty_to_sell * lot.price
+            qty_to_sell = 0
+
+    db.execute(
+        update(Position)
+        .where(Position.account_id == account_id, Position.crypto_symbol == symbol)
+        .values(cost_basis=Position.cost_basis - cost_basis)
+    )
+    return cost_basis
+
+
+def record_batch(db: Session, account_id: int, transactions: List[Transaction]):
+    """
+    Ledger update for many flushed transactions of one account, in
+    execution order; same result as record_buy / record_sell for each.
+    Open lots are read once per sold symbol, FIFO is applied in memory,
+    and each symbol's position is updated with one upsert.
+    Sells must already be validated against the held quantity.
+    """
+    sold = {tx.crypto_symbol.upper() for tx in transactions if tx.transaction_type == "SELL"}
+
+    lots: Dict[str, deque] = defaultdict(deque)
+    if sold:
+        existing = (
+            db.query(OpenLot)
+            .filter(OpenLot.account_id == account_id, OpenLot.crypto_symbol.in_(sold))
+            .order_by(OpenLot.id.asc())
+        )
+        for lot in existing:
+            lots[lot.crypto_symbol].append(lot)
+
+    new_lots = []
+    quantity_delta = defaultdict(float)
+    cost_delta = defaultdict(float)
+
+    for tx in transactions:
+        symbol = tx.crypto_symbol.upper()
+
+        if tx.transaction_type == "BUY":
+            lot = OpenLot(
+                transaction_id=tx.id,
+                account_id=account_id,
+                crypto_symbol=symbol,
+                quantity=tx.quantity,
+                price=tx.price
+            )
+            new_lots.append(lot)
+            lots[symbol].append(lot)
+            quantity_delta[symbol] += tx.quantity
+            cost_delta[symbol] += tx.quantity * tx.price
+            continue
+
+        quantity_delta[symbol] -= tx.quantity
+        symbol_lots = lots[symbol]
+        qty_to_sell = tx.quantity
+        while qty_to_sell > 0 and symbol_lots:
+            lot = symbol_lots[0]
+
+            if lot.quantity <= qty_to_sell:
+                qty_to_sell -= lot.quantity
+                cost_delta[symbol] -= lot.quantity * lot.price
+                symbol_lots.popleft()
+                if lot.id is not None:
+                    db.delete(lot)
+                lot.quantity = 0.0
+            else:
+                lot.quantity -= qty_to_sell
+                cost_delta[symbol] -= qty_to_sell * lot.price
+                qty_to_sell = 0
+
+    # New lots after existing ones, in execution order, so ids keep FIFO order
+    db.add_all(lot for lot in new_lots if lot.quantity > 0)
+
+    for symbol, quantity in quantity_delta.items():
+        db.execute(
+            insert(Position)
+            .values(account_id=account_id, crypto_symbol=symbol, quantity=quantity, cost_basis=cost_delta[symbol])
+            .on_conflict_do_update(
+                index_elements=[Position.account_id, Position.crypto_symbol],
+                set_={
+                    "quantity": Position.quantity + quantity,
+                    "cost_basis": Position.cost_basis + cost_delta[symbol]
+                }
+            )
+        )
+
+
+def get_position_quantity(db: Session, symbol: str, account_id: int = DEFAULT_ACCOUNT_ID) -> float:
+    """Held quantity for a symbol (one primary-key read)."""
+    position: Optional[Position] = db.get(Position, (account_id, symbol.upper()))
+    return position.quantity if position else 0.0
+
+
+def get_positions(db: Session, account_id: int = DEFAULT_ACCOUNT_ID) -> list[dict]:
+    """Open positions (quantity > 0) of an account as plain dicts."""
+    return [
+        {"symbol": p.crypto_symbol, "quantity": p.quantity, "cost_basis": p.cost_basis}
+        for p in db.query(Position).filter(Position.account_id == account_id, Position.quantity > 0)
+    ]
+
+
+def ledger_needs_rebuild(db: Session) -> bool:
+    """
+    True when positions were never seeded from an existing transaction log:
+    new or migrated tables, or an earlier start that stopped before
+    rebuild_ledger committed. (Sold-out positions keep their row.)
+    """
+    return db.query(Position.account_id).first() is None and db.query(Transaction.id).first() is not None
+
+
+def rebuild_ledger(db: Session) -> int:
+    """
+    Regenerates open_lots and positions of every account by replaying the
+    full transaction log FIFO. Positions are summed from the surviving lots
+    (quantity and cost alike), so oversells in old history are not netted
+    against later buys.
+    Returns the number of open lots written.
+    """
+    started = time.perf_counter()
+    replayed = 0
+    db.query(OpenLot).delete()
+    db.query(Position).delete()
+
+    transactions = (
+        db.query(Transaction)
+        .order_by(Transaction.timestamp.asc(), Transaction.id.asc())
+        .yield_per(1000)
+    )
+
+    portfolio_lots = defaultdict(deque)
+
+    for tx in transactions:
+        replayed += 1
+        key = (tx.account_id, tx.crypto_symbol.upper())
+
+        if tx.transaction_type == "BUY":
+            portfolio_lots[key].append(
+                OpenLot(
+                    transaction_id=tx.id,
+                    account_id=tx.account_id,
+                    crypto_symbol=key[1],
+                    quantity=tx.quantity,
+                    price=tx.price
+                )
+            )
+
+        elif tx.transaction_type == "SELL":
+            lots = portfolio_lots[key]
+            qty_to_sell = tx.quantity
+            while qty_to_sell > 0 and lots:
+                buy_lot = lots[0]
+
+                if buy_lot.quantity <= qty_to_sell:
+                    qty_to_sell -= buy_lot.quantity
+                    lots.popleft()
+                else:
+                    buy_lot.quantity -= qty_to_sell
+                    qty_to_sell = 0
+
+    # Lots are inserted oldest first per (account, symbol), so ids keep FIFO order
+    open_lots = [lot for lots in portfolio_lots.values() for lot in lots]
+    db.add_all(open_lots)
+
+    db.add_all(
+        Position(
+            account_id=account_id,
+            crypto_symbol=symbol,
+            quantity=sum(lot.quantity for lot in lots),
+            cost_basis=sum(lot.quantity * lot.price for lot in lots)
+        )
+        for (account_id, symbol), lots in portfolio_lots.items()
+    )
+    db.commit()
+
+    LEDGER_REBUILD_SECONDS.set(time.perf_counter() - started)
+    LEDGER_REBUILD_TRANSACTIONS.set(replayed)
+    return len(open_lots)
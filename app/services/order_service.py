@@ -0,0 +1,264 @@
+# app/services/order_service.py
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.account import DEFAULT_ACCOUNT_ID
+from app.models.balance import Balance
+from app.models.transaction import Transaction
+from app.models.position import Position
+from app.services.accounts import STARTING_BALANCE
+from app.services.lot_ledger import record_buy, record_sell, record_batch, reserve_sell, get_position_quantity
+
+# ----------------------------
+# ORDER EXECUTION (PER ACCOUNT)
+# Synchronous; called through app.database.executor.run_db from routes.
+# ----------------------------
+
+class OrderRejected(Exception):
+    """Order failed validation. content is returned to the client as a 400 body."""
+
+    def __init__(self, content: dict):
+        super().__init__(content.get("error"))
+        self.content = content
+
+
+def get_or_create_balance(db: Session, account_id: int = DEFAULT_ACCOUNT_ID) -> Balance:
+    """Returns the account's balance row, creating it with the starting amount."""
+    balance = db.query(Balance).filter(Balance.account_id == account_id).first()
+    if not balance:
+        balance = Balance(account_id=account_id, amount=STARTING_BALANCE)
+        db.add(balance)
+        db.commit()
+        db.refresh(balance)
+    return balance
+
+
+def get_balance_amount(db: Session, account_id: int = DEFAULT_ACCOUNT_ID) -> float:
+    """
+    Read-only: the account's cash, or the starting amount if its balance row
+    does not exist yet (rows are created by writes, on the writer thread).
+    """
+    amount = db.query(Balance.amount).filter(Balance.account_id == account_id).scalar()
+    return STARTING_BALANCE if amount is None else amount
+
+
+def execute_buy(
+    db: Session,
+    symbol: str,
+    quantity: float,
+    price: float,
+    timestamp: Optional[datetime] = None,
+    account_id: int = DEFAULT_ACCOUNT_ID
+) -> dict:
+    """
+    Debits the account's balance, inserts the BUY and opens its FIFO lot.
+    Does not commit; raises OrderRejected on insufficient balance.
+    timestamp overrides the DB clock (replays stamp trades with tick time).
+    """
+    total_cost = price * quantity
+
+    #Ensure balance exists
+    balance = get_or_create_balance(db, account_id)
+
+    #Balance check
+    if balance.amount < total_cost:
+        raise OrderRejected({
+            "error": "Insufficient balance",
+            "required": round(total_cost, 2),
+            "available": round(balance.amount, 2)
+        })
+
+    #Deduct balance
+    balance.amount -= total_cost
+
+    #Insert BUY transaction
+    tx = Transaction(
+        account_id=account_id,
+        transaction_type="BUY",
+        crypto_symbol=symbol.replace("USDT", ""),
+        quantity=quantity,
+        price=price
+    )
+    if timestamp is not None:
+        tx.timestamp = timestamp
+    db.add(tx)
+
+    #Open FIFO lot in the same DB transaction
+    record_buy(db, tx)
+
+    return {
+        "message": "Order executed",
+        "side": "BUY",
+        "symbol": symbol,
+        "quantity": round(quantity, 8),
+        "price": round(price, 2),
+        "spent": round(total_cost, 2),
+        "balance": round(balance.amount, 2)
+    }
+
+
+def execute_sell(
+    db: Session,
+    symbol: str,
+    quantity: float,
+    price: float,
+    timestamp: Optional[datetime] = None,
+    account_id: int = DEFAULT_ACCOUNT_ID
+) -> dict:
+    """
+    Checks holdings, credits the account's balance, inserts the SELL and consumes FIFO lots.
+    Does not commit; raises OrderRejected when holdings are insufficient.
+    timestamp overrides the DB clock (replays stamp trades with tick time).
+    """
+    base_symbol = symbol.replace("USDT", "")
+
+    #Check and decrement the position in one statement (no oversell)
+    if not reserve_sell(db, base_symbol, quantity, account_id):
+        available_qty = get_position_quantity(db, base_symbol, account_id)
+        raise OrderRejected({"error": "Not enough holdings", "available": round(available_qty, 8)})
+
+    total_credit = price * quantity
+
+    #Credit balance
+    balance = get_or_create_balance(db, account_id)
+    balance.amount += total_credit
+
+    #Insert SELL transaction
+    tx = Transaction(
+        account_id=account_id,
+        transaction_type="SELL",
+        crypto_symbol=base_symbol,
+        quantity=quantity,
+        price=price
+    )
+    if timestamp is not None:
+        tx.timestamp = timestamp
+    db.add(tx)
+
+    #Consume FIFO lots in the same DB transaction
+    record_sell(db, base_symbol, quantity, account_id)
+
+    return {
+        "message": "Order executed",
+        "side": "SELL",
+        "symbol": symbol,
+        "quantity": round(quantity, 8),
+        "price": round(price, 2),
+        "received": round(total_credit, 2),
+        "balance": round(balance.amount, 2)
+    }
+
+
+def place_buy(db: Session, symbol: str, quantity: float, price: float, account_id: int = DEFAULT_ACCOUNT_ID) -> dict:
+    """execute_buy + commit."""
+    result = execute_buy(db, symbol, quantity, price, account_id=account_id)
+    db.commit()
+    return result
+
+
+def place_sell(db: Session, symbol: str, quantity: float, price: float, account_id: int = DEFAULT_ACCOUNT_ID) -> dict:
+    """execute_sell + commit."""
+    result = execute_sell(db, symbol, quantity, price, account_id=account_id)
+    db.commit()
+    return result
+
+
+def place_batch(
+    db: Session,
+    orders: List[Tuple[str, str, float]],
+    prices: Dict[str, float],
+    account_id: int = DEFAULT_ACCOUNT_ID,
+    atomic: bool = False
+) -> dict:
+    """
+    Executes (side, symbol, quantity) orders in list order with one commit.
+    Prices come from one snapshot taken by the caller. Orders are checked
+    against running balance / position totals kept in memory (same rules
+    as execute_buy / execute_sell), then all fills are written at once:
+    one multi-row insert of transactions, one ledger pass (record_batch)
+    and the final balance. A rejected order is skipped, unless atomic, in
+    which case any rejection rejects the whole batch and nothing is written.
+    """
+    #Balance row first: get_or_create_balance commits when it creates one
+    balance = get_or_create_balance(db, account_id)
+    cash = balance.amount
+
+    base_symbols = {symbol.replace("USDT", "") for _, symbol, _ in orders}
+    held = dict(
+        db.query(Position.crypto_symbol, Position.quantity)
+        .filter(Position.account_id == account_id, Position.crypto_symbol.in_(base_symbols))
+    )
+
+    results = []
+    fills = []
+
+    for side, symbol, quantity in orders:
+        price = prices.get(symbol)
+        base_symbol = symbol.replace("USDT", "")
+        error = None
+
+        if price is None:
+            error = {"error": "Live price not available"}
+        elif side not in ("BUY", "SELL") or quantity <= 0:
+            error = {"error": "Invalid order"}
+        elif side == "BUY":
+            total_cost = price * quantity
+            if cash < total_cost:
+                error = {"error": "Insufficient balance", "required": round(total_cost, 2), "available": round(cash, 2)}
+            else:
+                cash -= total_cost
+                held[base_symbol] = held.get(base_symbol, 0.0) + quantity
+                amount = {"spent": round(total_cost, 2)}
+        else:
+            available_qty = held.get(base_symbol, 0.0)
+            if available_qty < quantity:
+                error = {"error": "Not enough holdings", "available": round(available_qty, 8)}
+            else:
+                total_credit = price * quantity
+                cash += total_credit
+                held[base_symbol] = available_qty - quantity
+                amount = {"received": round(total_credit, 2)}
+
+        if error:
+            results.append({"status": "rejected", "side": side, "symbol": symbol, "quantity": quantity, **error})
+            continue
+
+        fills.append((side, base_symbol, quantity, price))
+        results.append({
+            "status": "executed",
+            "message": "Order executed",
+            "side": side,
+            "symbol": symbol,
+            "quantity": round(quantity, 8),
+            "price": round(price, 2),
+            **amount,
+            "balance": round(cash, 2)
+        })
+
+    rejected = len(results) - len(fills)
+    if atomic and rejected:
+        for result in results:
+            if result["status"] == "executed":
+                #Nothing was written: no fill message, no balance after it
+                result["status"] = "rolled_back"
+                result["message"] = "Order not executed: atomic batch rejected"
+                del result["balance"]
+        return {"committed": False, "executed": 0, "rejected": rejected, "results": results}
+
+    if fills:
+        balance.amount = cash
+
+        transactions = [
+            Transaction(account_id=account_id, transaction_type=side, crypto_symbol=base_symbol, quantity=quantity, price=price)
+            for side, base_symbol, quantity, price in fills
+        ]
+        db.add_all(transactions)
+        db.flush()  # assigns ids for the lots
+
+        record_batch(db, account_id, transactions)
+        db.commit()
+
+    return {"committed": True, "executed": len(fills), "rejected": rejected, "results": results}
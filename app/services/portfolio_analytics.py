@@ -0,0 +1,384 @@
+# app/services/portfolio_analytics.py
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.models.account import DEFAULT_ACCOUNT_ID
+from app.models.transaction import Transaction
+
+# =========================
+# PORTFOLIO ANALYTICS
+# The whole transaction history is loaded into flat arrays (time order)
+# and every metric is computed with array operations, no per-trade loop.
+#
+# The crypto book is the portfolio: buys are inflows (cash spent), sells
+# are outflows (cash received), holdings are marked at live prices.
+# =========================
+UNIX_EPOCH_JULIAN = 2440587.5
+SECONDS_PER_YEAR = 365.25 * 86400
+IRR_MAX_ITERATIONS = 50
+IRR_TOLERANCE = 1e-10
+
+# Accounts whose history arrays are kept per process (see TradeHistoryCache)
+TRADE_HISTORY_CACHE_MAX_ACCOUNTS = int(os.getenv("TRADE_HISTORY_CACHE_MAX_ACCOUNTS", 16))
+
+# One fetched row; the DBAPI cursor fills this directly (no Row objects)
+_HISTORY_ROW = np.dtype([
+    ("id", np.int64),
+    ("timestamp", np.float64),
+    ("symbol", object),
+    ("quantity", np.float64),
+    ("price", np.float64),
+])
+
+
+class TradeHistory(NamedTuple):
+    symbols: List[str]          # code -> symbol
+    symbol_idx: np.ndarray      # int, per trade
+    quantity: np.ndarray        # signed: + buy, - sell
+    price: np.ndarray
+    timestamp: np.ndarray       # unix seconds
+
+
+def _fetch_trades(db: Session, account_id: int, after_id: Optional[int] = None) -> np.ndarray:
+    """Trades in execution order (only ids above after_id when given)."""
+    query = (
+        select(
+            Transaction.id,
+            (func.julianday(Transaction.timestamp) - UNIX_EPOCH_JULIAN) * 86400.0,
+            Transaction.crypto_symbol,
+            case(
+                (Transaction.transaction_type == "BUY", Transaction.quantity),
+                else_=-Transaction.quantity
+            ),
+            Transaction.price
+        )
+        .where(Transaction.account_id == account_id)
+        .order_by(Transaction.timestamp, Transaction.id)
+    )
+    if after_id is not None:
+        # A few new rows: primary key range, not a walk of the account index
+        query = query.where(Transaction.id > after_id).with_hint(Transaction, "NOT INDEXED", "sqlite")
+
+    # Core execute, then read the DBAPI cursor straight into one structured
+    # array: no ORM or Row processing, no per-row tuple zipping
+    result = db.connection().execute(query)
+    try:
+        return np.fromiter(result.cursor, dtype=_HISTORY_ROW)
+    finally:
+        result.close()
+
+
+def _extend_history(history: TradeHistory, rows: np.ndarray) -> TradeHistory:
+    """history with rows (later in time) appended; new symbols get new codes."""
+    codes = {symbol: i for i, symbol in enumerate(history.symbols)}
+    symbol_idx = np.fromiter(
+        (codes.setdefault(s, len(codes)) for s in rows["symbol"]),
+        dtype=np.int64,
+        count=len(rows)
+    )
+    return TradeHistory(
+        list(codes),
+        np.concatenate((history.symbol_idx, symbol_idx)),
+        np.concatenate((history.quantity, rows["quantity"])),
+        np.concatenate((history.price, rows["price"])),
+        np.concatenate((history.timestamp, rows["timestamp"]))
+    )
+
+
+def _empty_history() -> TradeHistory:
+    empty = np.empty(0)
+    return TradeHistory([], np.empty(0, dtype=np.int64), empty, empty, empty)
+
+
+def read_trade_history(db: Session, account_id: int = DEFAULT_ACCOUNT_ID) -> TradeHistory:
+    """All transactions of an account in execution order, as arrays (uncached)."""
+    return _extend_history(_empty_history(), _fetch_trades(db, account_id))
+
+# =========================
+# HISTORY CACHE
+# Trades are append-only, so a process keeps each account's arrays and
+# later only reads rows with a higher id. New rows usually sort after the
+# cached ones and are appended; anything else (clock skew between workers,
+# a recreated database) reloads the account.
+# =========================
+
+class TradeHistoryCache:
+    """LRU of (database, account) -> (history, highest transaction id)."""
+
+    def __init__(self, max_accounts: int = TRADE_HISTORY_CACHE_MAX_ACCOUNTS):
+        self.max_accounts = max_accounts
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[TradeHistory, int]]" = OrderedDict()
+        self._lock = threading.Lock()   # loads run on several DB executor threads
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self, db: Session, account_id: int) -> TradeHistory:
+        key = (str(db.get_bind().url), account_id)
+        with self._lock:
+            entry = self._entries.get(key)
+
+        history = None
+        # (An empty cached history is simply reloaded: cheap, and its id range is unknown)
+        if entry is not None and entry[1] and self._still_present(db, account_id, entry[1]):
+            cached, last_id = entry
+            rows = _fetch_trades(db, account_id, last_id)
+            if not len(rows):
+                history = cached
+            elif rows["timestamp"][0] >= cached.timestamp[-1]:
+                history = _extend_history(cached, rows)
+                last_id = int(rows["id"].max())
+
+        if history is None:
+            rows = _fetch_trades(db, account_id)
+            history = _extend_history(_empty_history(), rows)
+            last_id = int(rows["id"].max()) if len(rows) else 0
+
+        with self._lock:
+            self._entries[key] = (history, last_id)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_accounts:
+                self._entries.popitem(last=False)
+        return history
+
+    @staticmethod
+    def _still_present(db: Session, account_id: int, last_id: int) -> bool:
+        """The newest cached row still exists (else the table was rebuilt)."""
+        return db.query(Transaction.id).filter(
+            Transaction.id == last_id, Transaction.account_id == account_id
+        ).first() is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+trade_history_cache = TradeHistoryCache()
+
+
+def load_trade_history(db: Session, account_id: int = DEFAULT_ACCOUNT_ID) -> TradeHistory:
+    """All transactions of an account in execution order, as arrays (cached per process)."""
+    return trade_history_cache.load(db, account_id)
+
+# =========================
+# HELPERS
+# =========================
+
+def _fifo_cost_curve(g_qty: np.ndarray, g_price: np.ndarray):
+    """
+    Trades grouped by symbol (time order inside each group). Buys are laid
+    end to end on one cumulative-quantity axis; the FIFO cost of the first
+    x units on that axis is a piecewise-linear function, evaluated with
+    one searchsorted for any number of points.
+    """
+    buys = g_qty > 0
+    b_qty = g_qty[buys]
+    b_price = g_price[buys]
+    b_cum = np.cumsum(b_qty)
+    b_cost_cum = np.cumsum(b_qty * b_price)
+
+    def cost(x: np.ndarray) -> np.ndarray:
+        if not len(b_cum):
+            return np.zeros_like(x)
+        k = np.minimum(np.searchsorted(b_cum, x, side="left"), len(b_cum) - 1)
+        return b_cost_cum[k] - (b_cum[k] - x) * b_price[k]
+
+    return cost
+
+
+def _group_cumsum(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Cumulative sum restarting at every group start."""
+    total = np.cumsum(values)
+    base = total[starts] - values[starts]
+    return total - np.repeat(base, counts)
+
+
+def _finite(value: Optional[float]) -> Optional[float]:
+    return round(value, 6) if value is not None and np.isfinite(value) else None
+
+
+def _irr(cash_flows: np.ndarray, years: np.ndarray) -> Optional[float]:
+    """
+    Annual rate r with sum(cf / (1 + r) ** years) == 0.
+    Newton on v = ln(1 + r), bisection if Newton does not converge.
+    """
+    if not (cash_flows > 0).any() or not (cash_flows < 0).any() or not years.any():
+        return None
+
+    def npv(v):
+        return np.dot(cash_flows, np.exp(-years * v))
+
+    v = 0.0
+    for _ in range(IRR_MAX_ITERATIONS):
+        discounted = cash_flows * np.exp(-years * v)
+        value = discounted.sum()
+        slope = -np.dot(discounted, years)
+        if not np.isfinite(value) or slope == 0:
+            break
+        step = value / slope
+        v -= step
+        if abs(step) < IRR_TOLERANCE:
+            return float(np.expm1(v))
+
+    lo, hi = -10.0, 10.0
+    f_lo = npv(lo)
+    if not np.isfinite(f_lo) or np.sign(f_lo) == np.sign(npv(hi)):
+        return None
+    for _ in range(200):
+        mid = (lo + hi) / 2
+        f_mid = npv(mid)
+        if np.sign(f_mid) == np.sign(f_lo):
+            lo, f_lo = mid, f_mid
+        else:
+            hi = mid
+        if hi - lo < IRR_TOLERANCE:
+            break
+    return float(np.expm1((lo + hi) / 2))
+
+# =========================
+# ANALYTICS
+# =========================
+
+def compute_analytics(history: TradeHistory, prices: Dict[str, float], now: float) -> dict:
+    """
+    Realized/unrealized P&L (FIFO), cost basis, turnover, time-weighted and
+    money-weighted returns. prices maps symbol -> live price; symbols
+    without one are marked at their last traded price.
+    """
+    n = len(history.price)
+    if not n:
+        return {"transactions": 0, "totals": None, "returns": None, "symbols": []}
+
+    n_symbols = len(history.symbols)
+    sym = history.symbol_idx
+    qty = history.quantity
+    price = history.price
+    flow = qty * price                  # + cash into the book, - cash out
+    notional = np.abs(flow)
+    sells = qty < 0
+
+    # ---- Group by symbol (stable: time order kept inside each group) ----
+    # Small integer keys get numpy's radix sort instead of a merge sort
+    keys = sym.astype(np.uint16) if n_symbols <= np.iinfo(np.uint16).max else sym
+    order = np.argsort(keys, kind="stable")
+    g_sym = sym[order]
+    g_qty = qty[order]
+    g_price = price[order]
+    counts = np.bincount(sym, minlength=n_symbols)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    # ---- Positions and revaluation gains between trades ----
+    pos_after = _group_cumsum(g_qty, starts, counts)
+    pos_before = pos_after - g_qty
+    prev_price = np.roll(g_price, 1)
+    prev_price[starts] = g_price[starts]
+    gain = np.empty(n)
+    gain[order] = pos_before * (g_price - prev_price)
+
+    # ---- FIFO cost of every sell ----
+    fifo_cost = _fifo_cost_curve(g_qty, g_price)
+    g_bought = np.where(g_qty > 0, g_qty, 0.0)
+    bought_before_symbol = (np.cumsum(g_bought) - g_bought)[starts]
+    bought_total = np.bincount(g_sym, weights=g_bought, minlength=n_symbols)
+
+    g_sold = np.where(g_qty < 0, -g_qty, 0.0)
+    sold_cum = _group_cumsum(g_sold, starts, counts)
+    g_sells = g_sold > 0
+    axis_base = np.repeat(bought_before_symbol, counts)[g_sells]
+    axis_end = np.repeat(bought_before_symbol + bought_total, counts)[g_sells]
+    sold_after = axis_base + sold_cum[g_sells]
+    x_after = np.minimum(sold_after, axis_end)
+    x_before = np.minimum(sold_after - g_sold[g_sells], axis_end)
+
+    g_sold_cost = np.zeros(n)
+    g_sold_cost[g_sells] = fifo_cost(x_after) - fifo_cost(x_before)
+    sold_cost = np.empty(n)
+    sold_cost[order] = g_sold_cost
+
+    # ---- Per-symbol totals ----
+    quantity = np.bincount(sym, weights=qty, minlength=n_symbols)
+    quantity[np.abs(quantity) < 1e-12] = 0.0
+    buy_cost = np.bincount(sym, weights=np.where(sells, 0.0, flow), minlength=n_symbols)
+    sold_cost_total = np.bincount(sym, weights=sold_cost, minlength=n_symbols)
+    proceeds = np.bincount(sym, weights=np.where(sells, -flow, 0.0), minlength=n_symbols)
+    cost_basis = np.where(quantity > 0, buy_cost - sold_cost_total, 0.0)
+    realized = proceeds - sold_cost_total
+    turnover = np.bincount(sym, weights=notional, minlength=n_symbols)
+
+    last_price = g_price[starts + counts - 1]
+    live = np.array([prices.get(s, np.nan) for s in history.symbols], dtype=np.float64)
+    has_live = np.isfinite(live)
+    mark = np.where(has_live, live, last_price)
+    market_value = quantity * mark
+    unrealized = market_value - cost_basis
+
+    # ---- Time-weighted return: chain sub-period returns between flows ----
+    value_after = np.cumsum(gain + flow)
+    value_before = np.concatenate(([0.0], value_after[:-1]))
+    final_gain = float(np.dot(quantity, mark - last_price))
+    sub_gains = np.append(gain, final_gain)
+    sub_base = np.append(value_before, value_after[-1])
+
+    active = sub_base > 1e-9 * notional.mean()
+    sub_returns = np.zeros(n + 1)
+    np.divide(sub_gains, sub_base, out=sub_returns, where=active)
+    twr = float(np.expm1(np.log1p(np.maximum(sub_returns, -1 + 1e-15)).sum()))
+
+    # ---- Money-weighted return: IRR of the investor's cash flows ----
+    cash_flows = np.append(-flow, market_value.sum())
+    years = (np.append(history.timestamp, now) - history.timestamp[0]) / SECONDS_PER_YEAR
+    period_years = years[-1]
+
+    # Short periods annualize to huge numbers; non-finite results become null
+    with np.errstate(over="ignore", invalid="ignore"):
+        mwr = _irr(cash_flows, years)
+        twr_annualized = (
+            float(np.expm1(np.log1p(twr) / period_years))
+            if period_years > 0 and twr > -1 else None
+        )
+
+    symbols = [
+        {
+            "symbol": history.symbols[i],
+            "quantity": round(float(quantity[i]), 8),
+            "cost_basis": round(float(cost_basis[i]), 2),
+            "avg_cost": round(float(cost_basis[i] / quantity[i]), 2) if quantity[i] > 0 else None,
+            "mark_price": float(mark[i]),
+            "live_price": bool(has_live[i]),
+            "market_value": round(float(market_value[i]), 2),
+            "realized_pnl": round(float(realized[i]), 2),
+            "unrealized_pnl": round(float(unrealized[i]), 2),
+            "turnover": round(float(turnover[i]), 2),
+            "trades": int(counts[i])
+        }
+        for i in np.argsort(-market_value, kind="stable")
+    ]
+
+    return {
+        "transactions": n,
+        "period_start": float(history.timestamp[0]),
+        "period_end": now,
+        "totals": {
+            "realized_pnl": round(float(realized.sum()), 2),
+            "unrealized_pnl": round(float(unrealized.sum()), 2),
+            "total_pnl": round(float(realized.sum() + unrealized.sum()), 2),
+            "cost_basis": round(float(cost_basis.sum()), 2),
+            "market_value": round(float(market_value.sum()), 2),
+            "turnover": round(float(turnover.sum()), 2),
+            "buy_volume": round(float(buy_cost.sum()), 2),
+            "sell_volume": round(float(proceeds.sum()), 2)
+        },
+        "returns": {
+            "twr": _finite(twr),
+            "twr_annualized": _finite(twr_annualized),
+            "mwr_annualized": _finite(mwr)
+        },
+        "symbols": symbols
+    }
@@ -0,0 +1,63 @@
+# app/services/price_stream.py
+
+import asyncio
+from typing import Dict, List, Set
+
+# =========================
+# PRICE STREAM (server push)
+# =========================
+
+class PriceSubscriber:
+    """
+    One connected client.
+    Updates are conflated per symbol: while the client is slow, newer ticks
+    overwrite older pending ones, so memory is bounded by the symbol count.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, dict] = {}
+        self._ready = asyncio.Event()
+        self.merged = 0  # ticks replaced before they were sent
+
+    def offer(self, symbol: str, entry: dict):
+        if symbol in self._pending:
+            self.merged += 1
+        self._pending[symbol] = entry
+        self._ready.set()
+
+    async def next_batch(self) -> List[dict]:
+        """Wait for pending updates and take all of them."""
+        await self._ready.wait()
+        self._ready.clear()
+        batch = list(self._pending.values())
+        self._pending = {}
+        return batch
+
+
+class PriceBroadcaster:
+    """
+    Fan-out of snapshot entries from CombinedCryptoWebSocket to subscribers.
+    publish() never awaits, so a slow client cannot stall the ingest loop.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[PriceSubscriber] = set()
+
+    def subscribe(self) -> PriceSubscriber:
+        subscriber = PriceSubscriber()
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: PriceSubscriber):
+        self._subscribers.discard(subscriber)
+
+    def publish(self, symbol: str, entry: dict):
+        for subscriber in self._subscribers:
+            subscriber.offer(symbol, entry)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+price_broadcaster = PriceBroadcaster()
@@ -0,0 +1,292 @@
+# app/services/replay.py
+"""
+Tick replay / backtesting over the order path.
+
+Reads recorded tick files (JSON lines: combined-stream frames or the
+compact {"s","c","P","E"} form written by TickRecorder), merges them in
+event-time order and, for every tick, updates the price cache and calls
+a strategy that trades through the same execute_buy / execute_sell used
+by the order endpoints. Trades go to a separate database, stamped with
+tick time, so a replay is deterministic for the same files, strategy and
+seed.
+
+Usage:
+    python -m app.services.replay data/ticks --strategy app.services.replay:buy_and_hold
+    python -m app.services.replay ticks-20260101.jsonl --strategy mystrats:momentum --speed 10
+"""
+
+import os
+import argparse
+import asyncio
+import gzip
+import heapq
+import importlib
+import json
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database.db import Base
+from app.services.lot_ledger import get_position_quantity, get_positions
+from app.services.order_service import OrderRejected, execute_buy, execute_sell, get_or_create_balance
+from app.services.portfolio_analytics import compute_analytics, read_trade_history
+from app.services.tick_conflator import TickConflator
+from app.services.ticker_decoder import Tick, decode_ticker_frame
+from app.utils import price_book
+import app.models  # noqa: F401  (register tables)
+import app.models.balance  # noqa: F401
+
+# Scratch database for replays; recreated on every run
+REPLAY_DATABASE_URL = os.getenv("REPLAY_DATABASE_URL", "sqlite:///./replay.db")
+REPLAY_COMMIT_EVERY = 1000  # ticks between commits
+
+Strategy = Callable[["ReplayContext", Tick], None]
+
+# =========================
+# TICK SOURCES
+# =========================
+
+def _open(path: Path):
+    return gzip.open(path, "rt", encoding="utf-8") if path.suffix == ".gz" else open(path, encoding="utf-8")
+
+
+def read_tick_file(path: Path) -> Iterator[Tick]:
+    """Ticks of one file in file order; lines without an event time are skipped."""
+    with _open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            tick = decode_ticker_frame(line)
+            if tick is not None and tick.event_time:
+                yield tick
+
+
+def iter_ticks(paths: Iterable[str]) -> Iterator[Tick]:
+    """
+    Ticks from every file (directories are expanded to their *.jsonl[.gz]
+    files), merged by event time. Ties keep file order, so the sequence is
+    the same on every run.
+    """
+    files: List[Path] = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files += sorted(f for f in p.iterdir() if f.name.endswith((".jsonl", ".jsonl.gz")))
+        else:
+            files.append(p)
+
+    return heapq.merge(*(read_tick_file(f) for f in files), key=lambda t: t.event_time)
+
+
+def load_strategy(spec: str) -> Strategy:
+    """'package.module:function' -> function(ctx, tick)."""
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Strategy must be 'module:function', got {spec!r}")
+    return getattr(importlib.import_module(module_name), attr)
+
+# =========================
+# STRATEGY CONTEXT
+# =========================
+
+class ReplayContext:
+    """What a strategy sees: replay clock, last prices, orders and a seeded RNG."""
+
+    def __init__(self, db: Session, seed: int):
+        self.db = db
+        self.random = random.Random(seed)
+        self.state: dict = {}          # free-form strategy state
+        self.prices: Dict[str, float] = {}
+        self.time_ms = 0
+        self.orders = 0
+        self.rejected = 0
+
+    @property
+    def now(self) -> datetime:
+        """Replay time (naive UTC, like DB timestamps)."""
+        return datetime.fromtimestamp(self.time_ms / 1000, timezone.utc).replace(tzinfo=None)
+
+    def price(self, symbol: str) -> Optional[float]:
+        """Last replayed price, e.g. price('BTCUSDT')."""
+        return self.prices.get(symbol.upper())
+
+    def position(self, symbol: str) -> float:
+        return get_position_quantity(self.db, symbol.upper().replace("USDT", ""))
+
+    @property
+    def balance(self) -> float:
+        return get_or_create_balance(self.db).amount
+
+    def buy(self, symbol: str, quantity: float) -> Optional[dict]:
+        return self._execute(execute_buy, symbol, quantity)
+
+    def sell(self, symbol: str, quantity: float) -> Optional[dict]:
+        return self._execute(execute_sell, symbol, quantity)
+
+    def _execute(self, execute, symbol: str, quantity: float) -> Optional[dict]:
+        """Fills at the last price; returns None when the order is rejected."""
+        symbol = symbol.upper()
+        price = self.prices.get(symbol)
+        if price is None or quantity <= 0:
+            self.rejected += 1
+            return None
+
+        try:
+            result = execute(self.db, symbol, quantity, price, timestamp=self.now)
+        except OrderRejected:
+            self.rejected += 1
+            return None
+
+        self.orders += 1
+        return result
+
+# =========================
+# ENGINE
+# =========================
+
+class ReplayEngine:
+    """
+    speed: 0 = as fast as possible, 1 = real time, N = N x real time.
+    publish_redis: also write ticks to the Redis price cache (conflated,
+    flushed on the replay clock), for apps reading the same Redis.
+    """
+
+    def __init__(
+        self,
+        strategy: Strategy,
+        database_url: str = REPLAY_DATABASE_URL,
+        speed: float = 0.0,
+        seed: int = 0,
+        publish_redis: bool = False,
+        commit_every: int = REPLAY_COMMIT_EVERY
+    ):
+        self.strategy = strategy
+        self.speed = speed
+        self.seed = seed
+        self.commit_every = commit_every
+        self.conflator = TickConflator() if publish_redis else None
+
+        self.engine = create_engine(database_url)
+        if database_url.startswith("sqlite"):
+            @event.listens_for(self.engine, "connect")
+            def _scratch_pragmas(dbapi_connection, connection_record):
+                # Throwaway database: skip fsyncs
+                dbapi_connection.execute("PRAGMA synchronous=OFF")
+
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+    def reset(self):
+        Base.metadata.drop_all(bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+
+    async def run(self, ticks: Iterable[Tick]) -> dict:
+        self.reset()
+        db = self.SessionLocal()
+        ctx = ReplayContext(db, self.seed)
+
+        count = 0
+        first_event = None
+        last_flush = 0
+        started = time.perf_counter()
+
+        try:
+            for tick in ticks:
+                if first_event is None:
+                    first_event = tick.event_time
+
+                # Pace on the replay clock
+                if self.speed > 0:
+                    due = started + (tick.event_time - first_event) / 1000 / self.speed
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                ctx.time_ms = tick.event_time
+                ctx.prices[tick.symbol] = tick.price
+                price_book.update_price(tick.symbol, tick.price, tick.change, tick.event_time)
+
+                if self.conflator is not None:
+                    self.conflator.offer(tick)
+                    if tick.event_time - last_flush >= self.conflator.flush_interval * 1000:
+                        await self.conflator.flush()
+                        last_flush = tick.event_time
+
+                self.strategy(ctx, tick)
+
+                count += 1
+                if count % self.commit_every == 0:
+                    db.commit()
+
+            db.commit()
+            if self.conflator is not None:
+                await self.conflator.flush()
+
+            elapsed = time.perf_counter() - started
+            replayed_seconds = (ctx.time_ms - first_event) / 1000 if first_event is not None else 0.0
+
+            history = read_trade_history(db)
+            analytics = compute_analytics(
+                history,
+                {s.replace("USDT", ""): p for s, p in ctx.prices.items()},
+                ctx.time_ms / 1000
+            )
+
+            return {
+                "ticks": count,
+                "symbols": len(ctx.prices),
+                "replayed_seconds": round(replayed_seconds, 3),
+                "wall_seconds": round(elapsed, 3),
+                "speedup": round(replayed_seconds / elapsed, 1) if elapsed else None,
+                "orders": ctx.orders,
+                "rejected": ctx.rejected,
+                "balance": round(ctx.balance, 2),
+                "positions": get_positions(db),
+                "analytics": analytics
+            }
+        finally:
+            db.close()
+
+# =========================
+# EXAMPLE STRATEGY
+# =========================
+
+def buy_and_hold(ctx: ReplayContext, tick: Tick):
+    """Spends 1% of the balance on each symbol the first time it ticks."""
+    seen = ctx.state.setdefault("seen", set())
+    if tick.symbol in seen:
+        return
+
+    seen.add(tick.symbol)
+    ctx.buy(tick.symbol, ctx.balance * 0.01 / tick.price)
+
+# =========================
+# CLI
+# =========================
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="tick files or directories")
+    parser.add_argument("--strategy", default="app.services.replay:buy_and_hold", help="module:function(ctx, tick)")
+    parser.add_argument("--speed", type=float, default=0.0, help="0 = as fast as possible, N = N x real time")
+    parser.add_argument("--db", default=REPLAY_DATABASE_URL, help="scratch database URL (recreated)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for ctx.random")
+    parser.add_argument("--redis", action="store_true", help="also publish replayed prices to Redis")
+    args = parser.parse_args()
+
+    engine = ReplayEngine(
+        load_strategy(args.strategy),
+        database_url=args.db,
+        speed=args.speed,
+        seed=args.seed,
+        publish_redis=args.redis
+    )
+    result = asyncio.run(engine.run(iter_ticks(args.paths)))
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
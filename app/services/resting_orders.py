@@ -0,0 +1,331 @@
+# app/services/resting_orders.py
+
+import os
+import asyncio
+import time
+from heapq import heapify, heappop, heappush
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database.executor import run_db, run_db_write
+from app.models.resting_order import RestingOrder
+from app.services.order_service import OrderRejected, execute_buy, execute_sell
+from app.services.ticker_decoder import Tick
+from app.utils.versioning import bump_account_versions
+
+# =========================
+# RESTING ORDERS (PER ACCOUNT)
+# Limit, stop-loss and take-profit orders are stored in resting_orders and
+# mirrored, on the ingest leader, in a per-symbol trigger index checked on
+# every tick. A triggered order is filled through execute_buy / execute_sell
+# at the tick's price, on the DB writer thread, never on the tick path.
+#
+# Trigger direction (fires when the price reaches trigger_price):
+#   BUY  LIMIT / TAKE_PROFIT  price <= trigger     SELL LIMIT / TAKE_PROFIT  price >= trigger
+#   BUY  STOP_LOSS            price >= trigger     SELL STOP_LOSS            price <= trigger
+# =========================
+ORDER_SIDES = ("BUY", "SELL")
+ORDER_TYPES = ("LIMIT", "STOP_LOSS", "TAKE_PROFIT")
+
+# Seconds between polls for orders placed in other workers/replicas
+RESTING_ORDER_SYNC_INTERVAL = float(os.getenv("RESTING_ORDER_SYNC_INTERVAL", 1.0))
+
+BELOW = "below"
+ABOVE = "above"
+
+
+def trigger_direction(side: str, order_type: str) -> str:
+    """BELOW: fires when price <= trigger; ABOVE: when price >= trigger."""
+    if order_type == "STOP_LOSS":
+        return ABOVE if side == "BUY" else BELOW
+    return BELOW if side == "BUY" else ABOVE
+
+# =========================
+# DB OPERATIONS
+# Synchronous; called through app.database.executor from routes and the
+# trigger sink.
+# =========================
+
+def _as_dict(order: RestingOrder) -> dict:
+    return {
+        "id": order.id,
+        "account_id": order.account_id,
+        "symbol": order.symbol,
+        "side": order.side,
+        "order_type": order.order_type,
+        "quantity": round(order.quantity, 8),
+        "trigger_price": order.trigger_price,
+        "status": order.status,
+        "fill_price": order.fill_price,
+        "error": order.error,
+        "created_at": order.created_at,
+        "closed_at": order.closed_at,
+    }
+
+
+def create_resting_order(
+    db: Session,
+    account_id: int,
+    symbol: str,
+    side: str,
+    order_type: str,
+    quantity: float,
+    trigger_price: float
+) -> dict:
+    """
+    Stores an OPEN order and commits. Balance / holdings are checked when
+    the order triggers, not here (nothing is reserved while it rests).
+    """
+    order = RestingOrder(
+        account_id=account_id,
+        symbol=symbol,
+        side=side,
+        order_type=order_type,
+        quantity=quantity,
+        trigger_price=trigger_price,
+        status="OPEN"
+    )
+    db.add(order)
+    db.commit()
+    db.refresh(order)
+    return _as_dict(order)
+
+
+def cancel_resting_order(db: Session, account_id: int, order_id: int) -> Optional[dict]:
+    """
+    Cancels an OPEN order and commits. Returns None when the account has
+    no such order; a closed order is returned unchanged.
+    """
+    order = db.get(RestingOrder, order_id)
+    if order is None or order.account_id != account_id:
+        return None
+
+    if order.status == "OPEN":
+        order.status = "CANCELLED"
+        order.closed_at = func.now()
+        db.commit()
+        db.refresh(order)
+
+    return _as_dict(order)
+
+
+def list_resting_orders(db: Session, account_id: int, status: Optional[str] = None, limit: int = 500) -> List[dict]:
+    """An account's orders newest first, optionally filtered by status."""
+    query = db.query(RestingOrder).filter(RestingOrder.account_id == account_id)
+    if status:
+        query = query.filter(RestingOrder.status == status)
+    return [_as_dict(o) for o in query.order_by(RestingOrder.id.desc()).limit(limit)]
+
+
+def load_open_orders(db: Session, after_id: int = 0) -> List[Tuple[int, str, str, float]]:
+    """(id, symbol, direction, trigger_price) of OPEN orders with id > after_id."""
+    rows = db.connection().execute(
+        RestingOrder.__table__.select()
+        .with_only_columns(
+            RestingOrder.id, RestingOrder.symbol, RestingOrder.side,
+            RestingOrder.order_type, RestingOrder.trigger_price
+        )
+        .where(RestingOrder.status == "OPEN", RestingOrder.id > after_id)
+        .order_by(RestingOrder.id)
+    )
+    return [
+        (order_id, symbol, trigger_direction(side, order_type), trigger_price)
+        for order_id, symbol, side, order_type, trigger_price in rows
+    ]
+
+
+def execute_resting_order(db: Session, order_id: int, price: float) -> Optional[dict]:
+    """
+    Fills a triggered order at price and commits. An order that was
+    cancelled (or filled) meanwhile is skipped and None is returned.
+    Rejections (insufficient balance / holdings) close the order as REJECTED.
+    """
+    order = db.get(RestingOrder, order_id)
+    if order is None or order.status != "OPEN":
+        return None
+
+    execute = execute_buy if order.side == "BUY" else execute_sell
+    try:
+        execute(db, order.symbol, order.quantity, price, account_id=order.account_id)
+        order.status = "FILLED"
+        order.fill_price = price
+    except OrderRejected as e:
+        order.status = "REJECTED"
+        order.error = e.content.get("error")
+
+    order.closed_at = func.now()
+    db.commit()
+    db.refresh(order)
+    return _as_dict(order)
+
+# =========================
+# TRIGGER INDEX
+# Per symbol, two heaps: BELOW orders as a max-heap on trigger price,
+# ABOVE orders as a min-heap. A tick only compares the price with the two
+# heap tops (O(1) when nothing fires); each fired order costs one
+# O(log n) pop. Cancellation is lazy: the id leaves _live and the heap
+# entry is dropped when it surfaces (or on compaction).
+# =========================
+
+class TriggerIndex:
+    COMPACT_MIN_STALE = 1024
+
+    def __init__(self):
+        self._below: Dict[str, list] = {}   # symbol -> [(-trigger, id)]
+        self._above: Dict[str, list] = {}   # symbol -> [(trigger, id)]
+        self._live: Dict[int, Tuple[str, str, float]] = {}  # id -> (symbol, direction, trigger)
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._live
+
+    def add(self, order_id: int, symbol: str, direction: str, trigger_price: float):
+        if order_id in self._live:
+            return
+        self._live[order_id] = (symbol, direction, trigger_price)
+        if direction == BELOW:
+            heappush(self._below.setdefault(symbol, []), (-trigger_price, order_id))
+        else:
+            heappush(self._above.setdefault(symbol, []), (trigger_price, order_id))
+
+    def discard(self, order_id: int):
+        if self._live.pop(order_id, None) is None:
+            return
+        self._stale += 1
+        if self._stale >= self.COMPACT_MIN_STALE and self._stale > len(self._live):
+            self._compact()
+
+    def check(self, symbol: str, price: float) -> List[int]:
+        """Removes and returns the ids of orders triggered by price (oldest first per level)."""
+        fired = []
+
+        below = self._below.get(symbol)
+        while below and -below[0][0] >= price:
+            order_id = heappop(below)[1]
+            if self._live.pop(order_id, None) is not None:
+                fired.append(order_id)
+            else:
+                self._stale -= 1
+
+        above = self._above.get(symbol)
+        while above and above[0][0] <= price:
+            order_id = heappop(above)[1]
+            if self._live.pop(order_id, None) is not None:
+                fired.append(order_id)
+            else:
+                self._stale -= 1
+
+        return fired
+
+    def _compact(self):
+        """Rebuilds the heaps without cancelled entries."""
+        for heaps in (self._below, self._above):
+            for symbol, heap in heaps.items():
+                heap[:] = [entry for entry in heap if entry[1] in self._live]
+                heapify(heap)
+        self._stale = 0
+
+# =========================
+# INGEST SINK
+# =========================
+
+class RestingOrderTrigger:
+    """
+    Ingest sink (leader only): offer() checks the index on every tick and
+    queues fired orders; run() loads open orders, executes the queue on the
+    DB writer thread and picks up orders placed by other processes.
+    """
+
+    def __init__(self, sync_interval: float = RESTING_ORDER_SYNC_INTERVAL):
+        self.index = TriggerIndex()
+        self.sync_interval = sync_interval
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._synced_id = 0
+
+        # Metrics
+        self.triggered = 0
+        self.filled = 0
+        self.rejected = 0
+        self.skipped = 0          # cancelled / already closed when executed
+        self.errors = 0
+
+    def offer(self, tick: Tick):
+        """Tick path: heap-top comparisons only, no I/O."""
+        fired = self.index.check(tick.symbol, tick.price)
+        if fired:
+            self.triggered += len(fired)
+            for order_id in fired:
+                self._queue.put_nowait((order_id, tick.price))
+
+    def add(self, order: dict):
+        """Tracks an order created in this process (OPEN orders only)."""
+        if order["status"] == "OPEN":
+            self.index.add(
+                order["id"], order["symbol"],
+                trigger_direction(order["side"], order["order_type"]), order["trigger_price"]
+            )
+
+    def discard(self, order_id: int):
+        self.index.discard(order_id)
+
+    async def sync(self):
+        """Adds OPEN orders not seen yet (placed here or in another worker)."""
+        orders = await run_db(load_open_orders, self._synced_id)
+        for order_id, symbol, direction, trigger_price in orders:
+            self.index.add(order_id, symbol, direction, trigger_price)
+        if orders:
+            self._synced_id = orders[-1][0]
+
+    async def _execute(self, order_id: int, price: float):
+        try:
+            result = await run_db_write(execute_resting_order, order_id, price)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Resting order {order_id} failed, will retry on a later tick: {e}")
+            self._synced_id = min(self._synced_id, order_id - 1)  # reloaded by the next sync
+            return
+
+        if result is None:
+            self.skipped += 1
+        elif result["status"] == "FILLED":
+            self.filled += 1
+            await bump_account_versions(result["account_id"])
+        else:
+            self.rejected += 1
+
+    async def run(self):
+        """Executor / sync loop; runs for the lifetime of the ingest task."""
+        await self.sync()
+        print(f"✅ Resting orders loaded ({len(self.index)} open)")
+        last_sync = time.monotonic()
+
+        while True:
+            timeout = max(0.0, last_sync + self.sync_interval - time.monotonic())
+            try:
+                order_id, price = await asyncio.wait_for(self._queue.get(), timeout)
+                await self._execute(order_id, price)
+            except asyncio.TimeoutError:
+                pass
+
+            if time.monotonic() - last_sync >= self.sync_interval:
+                try:
+                    await self.sync()
+                except Exception as e:
+                    print(f"⚠️ Resting order sync failed: {e}")
+                last_sync = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "open": len(self.index),
+            "queued": self._queue.qsize(),
+            "triggered": self.triggered,
+            "filled": self.filled,
+            "rejected": self.rejected,
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
@@ -0,0 +1,89 @@
+# app/services/symbol_registry.py
+
+from types import MappingProxyType
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from app.constants.coin import COINS
+from app.database.db import SessionLocal
+from app.models.crypto import Crypto
+
+# =========================
+# SYMBOL REGISTRY
+# Built once (startup / explicit reload) so hot endpoints never query
+# the cryptos table for metadata.
+# =========================
+
+class CoinInfo(NamedTuple):
+    name: str
+    symbol: str           # universal symbol, e.g. BTC
+    binance_symbol: str   # e.g. BTCUSDT
+
+
+class SymbolRegistry:
+    """Immutable O(1) lookups by universal symbol and by Binance symbol."""
+
+    def __init__(self, coins: Iterable[CoinInfo]):
+        by_symbol = {}
+        by_binance = {}
+
+        # First occurrence wins (the cryptos table allows duplicates)
+        for coin in coins:
+            by_symbol.setdefault(coin.symbol.upper(), coin)
+            by_binance.setdefault(coin.binance_symbol.upper(), coin)
+
+        self._by_symbol = MappingProxyType(by_symbol)
+        self._by_binance = MappingProxyType(by_binance)
+
+    def by_symbol(self, symbol: str) -> Optional[CoinInfo]:
+        return self._by_symbol.get(symbol.upper())
+
+    def by_binance_symbol(self, binance_symbol: str) -> Optional[CoinInfo]:
+        return self._by_binance.get(binance_symbol.upper())
+
+    def resolve(self, symbol: str) -> Optional[CoinInfo]:
+        """Accepts either form, e.g. BTCUSDT or BTC."""
+        return self.by_binance_symbol(symbol) or self.by_symbol(symbol)
+
+    def name_for(self, binance_symbol: str, default: Optional[str] = None) -> Optional[str]:
+        coin = self._by_binance.get(binance_symbol.upper())
+        return coin.name if coin else default
+
+    @property
+    def coins(self) -> Tuple[CoinInfo, ...]:
+        return tuple(self._by_binance.values())
+
+    @property
+    def binance_symbols(self) -> Tuple[str, ...]:
+        return tuple(self._by_binance.keys())
+
+    def __len__(self) -> int:
+        return len(self._by_binance)
+
+
+_registry: Optional[SymbolRegistry] = None
+
+
+def _load_coins() -> list[CoinInfo]:
+    """Coins from the cryptos table, falling back to app/constants/coin.py."""
+    with SessionLocal() as db:
+        rows = db.query(Crypto).order_by(Crypto.id.asc()).all()
+        coins = [CoinInfo(c.name, c.symbol, c.binance_symbol) for c in rows]
+
+    if not coins:
+        coins = [CoinInfo(meta["name"], symbol, meta["binance_symbol"]) for symbol, meta in COINS.items()]
+
+    return coins
+
+
+def reload_symbol_registry() -> SymbolRegistry:
+    """Rebuild the registry from the source of truth and swap it in."""
+    global _registry
+    _registry = SymbolRegistry(_load_coins())
+    return _registry
+
+
+def get_symbol_registry() -> SymbolRegistry:
+    """Current registry (loaded on first use if startup did not load it)."""
+    if _registry is None:
+        return reload_symbol_registry()
+    return _registry
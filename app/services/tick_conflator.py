@@ -0,0 +1,102 @@
+# app/services/tick_conflator.py
+
+import os
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.services.ticker_decoder import Tick
+from app.utils.cache import set_symbol_prices
+from app.utils.versioning import PRICES_VERSION, version_key, bump_versions
+
+# =========================
+# TICK CONFLATION
+# Keeps only the latest tick per symbol and writes dirty symbols to Redis
+# in one pipeline every TICK_FLUSH_INTERVAL_MS, instead of several round
+# trips per tick.
+# =========================
+TICK_FLUSH_INTERVAL_MS = int(os.getenv("TICK_FLUSH_INTERVAL_MS", 250))
+SYMBOL_PRICE_TTL = 10  # seconds, per-symbol Redis key
+
+
+class TickConflator:
+    def __init__(
+        self,
+        flush_interval_ms: int = TICK_FLUSH_INTERVAL_MS,
+        on_flush: Optional[Callable[[List[Tick], float], None]] = None
+    ):
+        self.flush_interval = flush_interval_ms / 1000
+        self.on_flush = on_flush  # called with (ticks, flushed_at) after each successful flush
+        self._dirty: Dict[str, Tick] = {}
+
+        # Metrics
+        self.received = 0         # ticks offered
+        self.merged = 0           # ticks overwritten by a newer one before flush
+        self.flushed = 0          # symbol writes sent to Redis
+        self.flushes = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def offer(self, tick: Tick):
+        """Record a tick (no I/O)."""
+        self.received += 1
+        if tick.symbol in self._dirty:
+            self.merged += 1
+        self._dirty[tick.symbol] = tick
+
+    async def flush(self):
+        """Write every dirty symbol in one Redis pipeline."""
+        if not self._dirty:
+            return
+
+        ticks, self._dirty = self._dirty, {}
+
+        started = time.perf_counter()
+        try:
+            await set_symbol_prices(
+                {symbol: tick.as_dict() for symbol, tick in ticks.items()},
+                {symbol: tick.snapshot_entry() for symbol, tick in ticks.items()},
+                ttl=SYMBOL_PRICE_TTL
+            )
+        except Exception as e:
+            self.flush_errors += 1
+            # Put the batch back unless a newer tick arrived meanwhile
+            for symbol, tick in ticks.items():
+                self._dirty.setdefault(symbol, tick)
+            print(f"⚠️ Tick flush failed ({len(ticks)} symbols): {e}")
+            return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.flushed += len(ticks)
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+        # Polled price endpoints (ETag / payload cache) move to the new snapshot
+        await bump_versions(version_key(PRICES_VERSION))
+
+        if self.on_flush:
+            self.on_flush(list(ticks.values()), time.time())
+
+    async def run(self):
+        """Flush loop; runs for the lifetime of the ingest task."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "flush_interval_ms": self.flush_interval * 1000,
+            "ticks_received": self.received,
+            "ticks_merged": self.merged,
+            "symbols_flushed": self.flushed,
+            "pending": len(self._dirty),
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+        }
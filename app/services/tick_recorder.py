@@ -0,0 +1,71 @@
+# app/services/tick_recorder.py
+
+import os
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.services.ticker_decoder import Tick
+
+# =========================
+# TICK RECORDER
+# Optional ingest sink: appends every tick as one JSON line (the compact
+# {"s","c","P","E"} form) to a file per UTC day, for app.services.replay.
+# Enabled on the leader when TICK_RECORD_DIR is set.
+# =========================
+TICK_RECORD_DIR = os.getenv("TICK_RECORD_DIR")
+TICK_RECORD_FLUSH_INTERVAL = float(os.getenv("TICK_RECORD_FLUSH_INTERVAL", 1.0))  # seconds
+
+
+class TickRecorder:
+    def __init__(self, directory: str, flush_interval: float = TICK_RECORD_FLUSH_INTERVAL):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, List[str]] = {}  # file name -> lines
+
+        # Metrics
+        self.recorded = 0
+        self.write_errors = 0
+
+    def offer(self, tick: Tick):
+        event_time = tick.event_time or int(time.time() * 1000)
+        name = time.strftime("ticks-%Y%m%d.jsonl", time.gmtime(event_time / 1000))
+        self._pending.setdefault(name, []).append(
+            json.dumps(tick.as_dict(), separators=(",", ":"))
+        )
+
+    async def flush(self):
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        try:
+            await asyncio.to_thread(self._write, pending)
+        except Exception as e:
+            self.write_errors += 1
+            print(f"⚠️ Tick recorder write error: {e}")
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _write(self, pending: Dict[str, List[str]]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for name, lines in pending.items():
+            with open(self.directory / name, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            self.recorded += len(lines)
+
+    def stats(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "pending": sum(len(lines) for lines in self._pending.values()),
+            "write_errors": self.write_errors
+        }
+
+
+def make_tick_recorder() -> Optional[TickRecorder]:
+    return TickRecorder(TICK_RECORD_DIR) if TICK_RECORD_DIR else None
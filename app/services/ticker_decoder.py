@@ -0,0 +1,56 @@
+# app/services/ticker_decoder.py
+
+from typing import Optional
+
+# Faster decoder when installed; stdlib json otherwise
+try:
+    from orjson import loads as _loads
+    DECODER = "orjson"
+except ImportError:
+    from json import loads as _loads
+    DECODER = "json"
+
+# =========================
+# BINANCE TICKER FRAMES
+# =========================
+
+class Tick:
+    """The four ticker fields we use, out of the ~20 Binance sends."""
+    __slots__ = ("symbol", "price", "change", "event_time")
+
+    def __init__(self, symbol: str, price: float, change: str, event_time: Optional[int]):
+        self.symbol = symbol          # e.g. BTCUSDT
+        self.price = price            # last price ("c")
+        self.change = change          # 24h change percent ("P")
+        self.event_time = event_time  # exchange event time, ms ("E")
+
+    def as_dict(self) -> dict:
+        """Compact form cached in Redis (same keys as the Binance payload)."""
+        return {"s": self.symbol, "c": self.price, "P": self.change, "E": self.event_time}
+
+    def snapshot_entry(self) -> dict:
+        """Entry in the dashboard snapshot / price stream."""
+        return {"symbol": self.symbol, "price": self.price, "change": self.change}
+
+
+def decode_ticker_frame(msg) -> Optional[Tick]:
+    """
+    Decodes one combined-stream message ({"stream": ..., "data": {...}}),
+    or a bare ticker payload as written to recorded tick files.
+    Returns None for frames that are not ticker payloads.
+    """
+    data = _loads(msg)
+    payload = data.get("data", data)
+    if not payload:
+        return None
+
+    symbol = payload.get("s")
+    if not symbol:
+        return None
+
+    return Tick(
+        symbol.upper(),
+        float(payload.get("c", 0)),
+        payload.get("P", "0%"),
+        payload.get("E")
+    )
@@ -1,8 +1,10 @@
 # app/utils/cache.py
 import json
-from typing import Any, Optional
+from typing import Any, Dict, Iterable, Optional
 from datetime import datetime
 from app.utils.redis_client import get_redis  # async access only
+from app.utils import price_book
+from app.utils.metrics import Histogram
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,22 +13,27 @@ logger = logging.getLogger(__name__)
 # Key prefixes
 # =========================
 SYMBOL_KEY_PREFIX = "CRYPTO:SYMBOL:"    # per-symbol WS cache
-ALL_PRICES_KEY = "CRYPTO:PRICES:ALL"   # aggregated snapshot for dashboard
+ALL_PRICES_KEY = "CRYPTO:PRICES:MAP"   # aggregated snapshot for dashboard (hash: symbol -> JSON)
 ALL_PRICES_TTL = 5                      # seconds
 
+# Round-trip latency per Redis command (pipelines count as one)
+REDIS_LATENCY = Histogram("redis_command_seconds", "Redis command latency in seconds", ["command"])
+
 # =========================
 # Generic cache helpers
 # =========================
 async def set_cached_data(key: str, data: Any, ttl: int = 30):
     """Cache data as JSON in Redis with optional TTL in seconds."""
     r = await get_redis()
-    await r.set(key, json.dumps(data), ex=ttl)
+    with REDIS_LATENCY.time(("set",)):
+        await r.set(key, json.dumps(data), ex=ttl)
     logger.debug(f"Redis SET key={key} ttl={ttl}")
 
 async def get_cached_data(key: str) -> Optional[Any]:
     """Retrieve cached JSON data from Redis."""
     r = await get_redis()
-    data = await r.get(key)
+    with REDIS_LATENCY.time(("get",)):
+        data = await r.get(key)
     if data:
         logger.debug(f"Redis HIT key={key}")
     else:
@@ -36,7 +43,8 @@ async def get_cached_data(key: str) -> Optional[Any]:
 async def delete_cached_data(key: str):
     """Delete a cache key."""
     r = await get_redis()
-    await r.delete(key)
+    with REDIS_LATENCY.time(("del",)):
+        await r.delete(key)
     logger.debug(f"Redis DEL key={key}")
 
 # =========================
@@ -48,10 +56,66 @@ async def set_symbol_price(symbol: str, data: Any, ttl: int = 10):
     await set_cached_data(key, data, ttl=ttl)
 
 async def get_symbol_price(symbol: str) -> Optional[Any]:
-    """Retrieve live price for a single symbol from cache."""
+    """
+    Retrieve live price for a single symbol.
+    Served from the in-process price book when fresh, otherwise from Redis.
+    """
+    record = price_book.get_price(symbol)
+    if record is not None:
+        return record.as_dict()
+
     key = f"{SYMBOL_KEY_PREFIX}{symbol.upper()}"
     return await get_cached_data(key)
 
+async def set_symbol_prices(data: Dict[str, Any], snapshot: Optional[Dict[str, Any]] = None, ttl: int = 10):
+    """
+    Cache many symbols in one pipelined round trip: a SET per symbol and,
+    when given, their dashboard snapshot entries (HSET + TTL refresh).
+    """
+    if not data and not snapshot:
+        return
+
+    r = await get_redis()
+    async with r.pipeline(transaction=False) as pipe:
+        for symbol, value in data.items():
+            pipe.set(f"{SYMBOL_KEY_PREFIX}{symbol.upper()}", json.dumps(value), ex=ttl)
+        if snapshot:
+            pipe.hset(ALL_PRICES_KEY, mapping={s.upper(): json.dumps(v) for s, v in snapshot.items()})
+            pipe.expire(ALL_PRICES_KEY, ALL_PRICES_TTL)
+        with REDIS_LATENCY.time(("pipeline",)):
+            await pipe.execute()
+    logger.debug(f"Redis pipeline SET keys={len(data)} HSET fields={len(snapshot or {})}")
+
+async def get_symbol_prices(symbols: Iterable[str]) -> Dict[str, Any]:
+    """
+    Retrieve live prices for many symbols.
+    Fresh price book entries are used directly; the rest cost one MGET round trip.
+    Returns {SYMBOL: data} for hits only.
+    """
+    result = {}
+    missing = []
+
+    for symbol in dict.fromkeys(s.upper() for s in symbols):
+        record = price_book.get_price(symbol)
+        if record is not None:
+            result[symbol] = record.as_dict()
+        else:
+            missing.append(symbol)
+
+    if not missing:
+        return result
+
+    r = await get_redis()
+    with REDIS_LATENCY.time(("mget",)):
+        values = await r.mget([f"{SYMBOL_KEY_PREFIX}{s}" for s in missing])
+    logger.debug(f"Redis MGET keys={len(missing)}")
+
+    for symbol, value in zip(missing, values):
+        if value:
+            result[symbol] = json.loads(value)
+
+    return result
+
 async def invalidate_symbol_price(symbol: str):
     """Delete cached WS price for a given symbol."""
     key = f"{SYMBOL_KEY_PREFIX}{symbol.upper()}"
@@ -59,15 +123,44 @@ async def invalidate_symbol_price(symbol: str):
 
 # =========================
 # Global snapshot cache (all cryptos for dashboard)
+# Stored as a hash so each tick is one HSET instead of a read-modify-write
+# of the whole list.
 # =========================
+async def set_crypto_price(symbol: str, data: Any):
+    """Update a single symbol in the snapshot (HSET + TTL refresh, one round trip)."""
+    r = await get_redis()
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.hset(ALL_PRICES_KEY, symbol.upper(), json.dumps(data))
+        pipe.expire(ALL_PRICES_KEY, ALL_PRICES_TTL)
+        with REDIS_LATENCY.time(("pipeline",)):
+            await pipe.execute()
+    logger.debug(f"Redis HSET key={ALL_PRICES_KEY} field={symbol.upper()}")
+
 async def set_crypto_prices(data: Any):
     """Cache snapshot of all crypto prices (for dashboard)."""
-    await set_cached_data(ALL_PRICES_KEY, data, ttl=ALL_PRICES_TTL)
+    mapping = {item["symbol"].upper(): json.dumps(item) for item in data if "symbol" in item}
+    if not mapping:
+        return
+
+    r = await get_redis()
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.hset(ALL_PRICES_KEY, mapping=mapping)
+        pipe.expire(ALL_PRICES_KEY, ALL_PRICES_TTL)
+        with REDIS_LATENCY.time(("pipeline",)):
+            await pipe.execute()
+    logger.debug(f"Redis HSET key={ALL_PRICES_KEY} fields={len(mapping)}")
 
 async def get_crypto_prices() -> Optional[Any]:
-    """Get cached snapshot of all crypto prices."""
-    return await get_cached_data(ALL_PRICES_KEY)
+    """Get cached snapshot of all crypto prices (one HGETALL)."""
+    r = await get_redis()
+    with REDIS_LATENCY.time(("hgetall",)):
+        data = await r.hgetall(ALL_PRICES_KEY)
+    if data:
+        logger.debug(f"Redis HIT key={ALL_PRICES_KEY}")
+    else:
+        logger.debug(f"Redis MISS key={ALL_PRICES_KEY}")
+    return [json.loads(value) for value in data.values()] if data else None
 
 async def invalidate_crypto_prices():
     """Force refresh of global crypto prices."""
-    await delete_cached_data(ALL_PRICES_KEY)
\ No newline at end of file
+    await delete_cached_data(ALL_PRICES_KEY)
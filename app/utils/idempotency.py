@@ -0,0 +1,159 @@
+# app/utils/idempotency.py
+import os
+import json
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from redis.exceptions import RedisError
+
+from app.utils.redis_client import get_redis  # async access only
+from app.utils.cache import REDIS_LATENCY
+from app.utils.metrics import Counter
+
+# =========================
+# Idempotency-Key handling for order endpoints
+# The first request with a key claims it with SET NX (an "in flight"
+# marker) and, once handled, stores its response under the same key.
+# A retry with the same key gets the stored response (or 409 while the
+# first is still running) without touching the database. Claim and lookup
+# are one round trip (SET NX GET, Redis >= 7).
+# Keys are scoped per account.
+#
+# A key is released (so the request can be retried) only when nothing can
+# have been written: 5xx responses, and Redis errors from the handler, which
+# only reads Redis (prices) before its DB write. Any other exception keeps
+# the in-flight marker until it expires, because the DB write may already
+# have committed. The handler runs in its own shielded task: if the request
+# is cancelled, the executor thread may still commit, so the task finishes
+# and stores the response for the client's retry.
+# =========================
+IDEMPOTENCY_KEY_PREFIX = "IDEMPOTENCY:"
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", 86400))               # seconds a response is replayed
+IDEMPOTENCY_IN_FLIGHT_TTL = int(os.getenv("IDEMPOTENCY_IN_FLIGHT_TTL", 30))  # seconds, crashed requests
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_STORE_ATTEMPTS = 3
+
+# Handler tasks, referenced so they finish even if their request is cancelled
+_pending: Set[asyncio.Task] = set()
+
+IDEMPOTENT_REQUESTS = Counter(
+    "idempotent_requests_total",
+    "Requests carrying an Idempotency-Key, by outcome (executed / replayed / in_flight / mismatch)",
+    ["outcome"]
+)
+
+
+def request_fingerprint(path: str, payload: Any) -> str:
+    """Hash of what the key was first used for, to detect reuse with another request."""
+    canonical = json.dumps([path, jsonable_encoder(payload)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _stored_response(entry: dict) -> JSONResponse:
+    return JSONResponse(
+        status_code=entry["status"],
+        content=entry["body"],
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+def _as_stored(result: Any) -> tuple:
+    """(status, JSON body) of a handler result: a dict or a JSONResponse."""
+    if isinstance(result, Response):
+        return result.status_code, json.loads(result.body)
+    return 200, jsonable_encoder(result)
+
+
+async def run_idempotent(
+    idempotency_key: Optional[str],
+    account_id: int,
+    path: str,
+    payload: Any,
+    handler: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Runs handler() once per (account, Idempotency-Key); without a key it
+    simply runs it. payload is the request body, used for the fingerprint.
+    """
+    if idempotency_key is None:
+        return await handler()
+
+    if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters"}
+        )
+
+    key = f"{IDEMPOTENCY_KEY_PREFIX}{account_id}:{idempotency_key}"
+    fingerprint = request_fingerprint(path, payload)
+
+    r = await get_redis()
+    marker = json.dumps({"state": "in_flight", "fingerprint": fingerprint})
+    with REDIS_LATENCY.time(("set",)):
+        existing = await r.set(key, marker, ex=IDEMPOTENCY_IN_FLIGHT_TTL, nx=True, get=True)
+
+    if existing is not None:
+        entry = json.loads(existing)
+        if entry["fingerprint"] != fingerprint:
+            IDEMPOTENT_REQUESTS.inc(("mismatch",))
+            return JSONResponse(
+                status_code=422,
+                content={"error": "Idempotency-Key was already used for a different request"}
+            )
+        if entry["state"] == "in_flight":
+            IDEMPOTENT_REQUESTS.inc(("in_flight",))
+            return JSONResponse(
+                status_code=409,
+                content={"error": "A request with this Idempotency-Key is still in progress"}
+            )
+        IDEMPOTENT_REQUESTS.inc(("replayed",))
+        return _stored_response(entry)
+
+    task = asyncio.ensure_future(_execute(r, key, fingerprint, handler))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+    return await asyncio.shield(task)
+
+
+async def _execute(r, key: str, fingerprint: str, handler: Callable[[], Awaitable[Any]]) -> Any:
+    try:
+        result = await handler()
+    except RedisError:
+        await _release(r, key)
+        raise
+
+    status, body = _as_stored(result)
+    if status >= 500:
+        await _release(r, key)
+        return result
+
+    await _store(r, key, {"state": "done", "fingerprint": fingerprint, "status": status, "body": body})
+    IDEMPOTENT_REQUESTS.inc(("executed",))
+    return result
+
+
+async def _release(r, key: str):
+    try:
+        await r.delete(key)
+    except RedisError as e:
+        print(f"⚠️ Idempotency key {key} not released (expires with its marker): {e}")
+
+
+async def _store(r, key: str, entry: dict):
+    """
+    Stores the response after the write; retried, and never raised, so a
+    committed order is not reported to the client as failed.
+    """
+    value = json.dumps(entry)
+    for attempt in range(IDEMPOTENCY_STORE_ATTEMPTS):
+        try:
+            with REDIS_LATENCY.time(("set",)):
+                await r.set(key, value, ex=IDEMPOTENCY_TTL)
+            return
+        except RedisError as e:
+            error = e
+            await asyncio.sleep(0.05 * (attempt + 1))
+    print(f"⚠️ Idempotent response for {key} not stored: {error}")
@@ -0,0 +1,154 @@
+# app/utils/metrics.py
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# =========================
+# Prometheus metrics (text exposition format 0.0.4)
+# Minimal in-process registry: counters, gauges, histograms, plus collectors
+# that read existing stats at scrape time, so hot paths that already keep
+# counters (e.g. the WS ingest loop) pay nothing extra.
+# Values are per process; each worker serves its own /metrics.
+# =========================
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]   # (suffix, labels, value)
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_metrics: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable["MetricFamily"]]] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class MetricFamily:
+    """One metric as rendered: name, type, help and its samples."""
+    __slots__ = ("name", "type", "help", "samples")
+
+    def __init__(self, name: str, type: str, help: str, samples: List[Sample]):
+        self.name = name
+        self.type = type
+        self.help = help
+        self.samples = samples
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self.samples:
+            lines.append(f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        _metrics.append(self)
+
+    def _labels(self, values: Labels) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def collect(self) -> MetricFamily:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def collect(self) -> MetricFamily:
+        return MetricFamily(self.name, self.type, self.help, [
+            ("", self._labels(labels), value) for labels, value in self._values.items()
+        ])
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, labels: Labels = ()):
+        self._values[labels] = value
+
+    def collect(self) -> MetricFamily:
+        return MetricFamily(self.name, self.type, self.help, [
+            ("", self._labels(labels), value) for labels, value in self._values.items()
+        ])
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Labels, List[int]] = {}   # per bucket (non-cumulative), last = +Inf
+        self._sums: Dict[Labels, float] = {}
+
+    def observe(self, value: float, labels: Labels = ()):
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    @contextmanager
+    def time(self, labels: Labels = ()):
+        """Observe the duration of the with-block, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, labels)
+
+    def collect(self) -> MetricFamily:
+        samples: List[Sample] = []
+        for labels, counts in self._counts.items():
+            base = self._labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append(("_bucket", {**base, "le": _format_value(bound)}, cumulative))
+            samples.append(("_sum", base, self._sums[labels]))
+            samples.append(("_count", base, cumulative))
+        return MetricFamily(self.name, self.type, self.help, samples)
+
+
+def register_collector(collector: Callable[[], Iterable[MetricFamily]]):
+    """collector() is called on every scrape and returns MetricFamily objects."""
+    _collectors.append(collector)
+
+
+def render_metrics() -> str:
+    families = [metric.collect() for metric in _metrics]
+    for collector in _collectors:
+        families.extend(collector())
+    return "\n".join(f.render() for f in families) + "\n"
@@ -0,0 +1,48 @@
+# app/utils/price_book.py
+import os
+import time
+from typing import Dict, Optional
+
+# =========================
+# In-process price book
+# Written by the WS ingest loop, read by request handlers before Redis.
+# =========================
+PRICE_BOOK_MAX_AGE = float(os.getenv("PRICE_BOOK_MAX_AGE", 10))  # seconds, matches per-symbol Redis TTL
+
+
+class PriceRecord:
+    """Compact per-symbol price record."""
+    __slots__ = ("symbol", "price", "change", "event_time", "updated_at")
+
+    def __init__(self, symbol: str, price: float, change: str, event_time: Optional[int], updated_at: float):
+        self.symbol = symbol
+        self.price = price
+        self.change = change
+        self.event_time = event_time   # exchange event time (ms)
+        self.updated_at = updated_at   # local monotonic clock (s)
+
+    def as_dict(self) -> dict:
+        """Same keys as the Binance ticker payload cached in Redis."""
+        return {"s": self.symbol, "c": self.price, "P": self.change, "E": self.event_time}
+
+
+_book: Dict[str, PriceRecord] = {}
+
+
+def update_price(symbol: str, price: float, change: str = "0%", event_time: Optional[int] = None):
+    """Record the latest price for a symbol."""
+    symbol = symbol.upper()
+    _book[symbol] = PriceRecord(symbol, float(price), change, event_time, time.monotonic())
+
+
+def get_price(symbol: str, max_age: float = PRICE_BOOK_MAX_AGE) -> Optional[PriceRecord]:
+    """Return the record for a symbol, or None if missing or older than max_age seconds."""
+    record = _book.get(symbol.upper())
+    if record is None or time.monotonic() - record.updated_at > max_age:
+        return None
+    return record
+
+
+def clear():
+    """Drop every record (e.g. when this process stops ingesting)."""
+    _book.clear()
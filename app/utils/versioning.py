@@ -0,0 +1,216 @@
+# app/utils/versioning.py
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from app.utils.redis_client import get_redis  # async access only
+from app.utils.cache import REDIS_LATENCY
+from app.utils.metrics import Counter
+
+# =========================
+# Versioned responses for polled read endpoints
+# Redis counters advance whenever the data behind a response changes:
+#   VERSION:orders:<account>    transactions / positions (every fill)
+#   VERSION:balance:<account>   cash balance (fills, deposits / withdrawals)
+#   VERSION:prices              dashboard snapshot (every conflator flush)
+#   VERSION:symbols             symbol registry (POST /api/symbols/reload)
+# A poll reads its counters (one MGET), derives the ETag from them and
+# answers 304 when the client already has it; otherwise the payload built
+# for the same versions is served from a per-process cache, and only a
+# changed version rebuilds it from SQLite / Redis.
+#
+# Data that also expires on its own (price snapshots, TTL'd in Redis) stops
+# bumping its counter when ingest stops, so for endpoints with a max_age the
+# ETag also carries the current max_age time window: an unchanged version is
+# revalidated at most max_age seconds, then rebuilt from whatever is left.
+#
+# Counters are read before the payload is built, so a cached payload is
+# never older than its version. A missing counter (new key, Redis flushed)
+# starts at the current time in ms rather than 0, so versions never repeat
+# and an old ETag or cached payload cannot match new state.
+# =========================
+VERSION_KEY_PREFIX = "VERSION:"
+ORDERS_VERSION = "orders"
+BALANCE_VERSION = "balance"
+PRICES_VERSION = "prices"
+SYMBOLS_VERSION = "symbols"
+
+VERSIONED_CACHE_MAX_ENTRIES = int(os.getenv("VERSIONED_CACHE_MAX_ENTRIES", 10000))
+
+VERSIONED_RESPONSES = Counter(
+    "versioned_responses_total",
+    "Polled read responses by outcome (not_modified / cached / built)",
+    ["endpoint", "outcome"]
+)
+
+
+def version_key(scope: str, account_id: Optional[int] = None) -> str:
+    if account_id is None:
+        return f"{VERSION_KEY_PREFIX}{scope}"
+    return f"{VERSION_KEY_PREFIX}{scope}:{account_id}"
+
+
+def _initial_version() -> int:
+    return int(time.time() * 1000)
+
+
+async def bump_versions(*keys: str):
+    """
+    Advances the given counters (one pipelined round trip). Called after
+    the write has committed, so a Redis error is logged, not raised.
+    """
+    if not keys:
+        return
+
+    start = _initial_version()
+    try:
+        r = await get_redis()
+        async with r.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, start, nx=True)
+                pipe.incr(key)
+            with REDIS_LATENCY.time(("pipeline",)):
+                await pipe.execute()
+    except Exception as e:
+        print(f"⚠️ Version bump failed ({', '.join(keys)}): {e}")
+
+
+async def bump_account_versions(account_id: int, orders: bool = True, balance: bool = True):
+    """After a committed write to the account's transactions and/or balance."""
+    keys = []
+    if orders:
+        keys.append(version_key(ORDERS_VERSION, account_id))
+    if balance:
+        keys.append(version_key(BALANCE_VERSION, account_id))
+    await bump_versions(*keys)
+
+
+async def get_versions(keys: Sequence[str]) -> Tuple[int, ...]:
+    """Current counters; missing ones are created first."""
+    r = await get_redis()
+    with REDIS_LATENCY.time(("mget",)):
+        values = await r.mget(keys)
+
+    missing = [key for key, value in zip(keys, values) if value is None]
+    if missing:
+        start = _initial_version()
+        async with r.pipeline(transaction=False) as pipe:
+            for key in missing:
+                pipe.set(key, start, nx=True)
+            pipe.mget(keys)
+            with REDIS_LATENCY.time(("pipeline",)):
+                values = (await pipe.execute())[-1]
+
+    return tuple(int(value) for value in values)
+
+# =========================
+# Per-process payload cache
+# =========================
+
+class VersionedCache:
+    """LRU of cache key -> (etag, body, headers, stored_at)."""
+
+    def __init__(self, max_entries: int = VERSIONED_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, bytes, Dict[str, str], float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, etag: str, max_age: Optional[float] = None) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != etag:
+            return None
+        if max_age is not None and time.monotonic() - entry[3] > max_age:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1], entry[2]
+
+    def put(self, key: str, etag: str, body: bytes, headers: Dict[str, str]):
+        self._entries[key] = (etag, body, headers, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+versioned_cache = VersionedCache()
+
+
+def make_etag(cache_key: str, versions: Iterable[int]) -> str:
+    digest = hashlib.blake2s(f"{cache_key}|{'.'.join(map(str, versions))}".encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+async def versioned_response(
+    request: Request,
+    endpoint: str,
+    cache_key: str,
+    version_keys: Sequence[str],
+    build: Callable[[], Awaitable[Any]],
+    max_age: Optional[float] = None
+) -> Response:
+    """
+    Serves build()'s payload for the current versions of version_keys:
+    304 when If-None-Match has its ETag, else the cached body, else a fresh
+    build (cached when it is a 200). cache_key identifies the response
+    (endpoint, account, query); max_age bounds how long an ETag and a cached
+    body are reused for data that also expires on its own (e.g. price
+    snapshots).
+    """
+    try:
+        versions = await get_versions(version_keys)
+    except Exception as e:
+        #Redis unavailable: serve unversioned rather than fail the poll
+        print(f"⚠️ Version lookup failed, serving {endpoint} uncached: {e}")
+        return await build()
+
+    if max_age is not None:
+        #No ticks, no version bumps: the ETag still changes once per window
+        versions = (*versions, int(time.time() // max_age))
+
+    etag = make_etag(cache_key, versions)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "X-Account-Id"}
+
+    if _etag_matches(request, etag):
+        VERSIONED_RESPONSES.inc((endpoint, "not_modified"))
+        return Response(status_code=304, headers=headers)
+
+    cached = versioned_cache.get(cache_key, etag, max_age)
+    if cached is not None:
+        VERSIONED_RESPONSES.inc((endpoint, "cached"))
+        body, extra_headers = cached
+        return Response(content=body, media_type="application/json", headers={**extra_headers, **headers})
+
+    result = await build()
+    VERSIONED_RESPONSES.inc((endpoint, "built"))
+
+    if isinstance(result, Response):
+        if result.status_code != 200:
+            return result
+        body = result.body
+        extra_headers = {
+            k: v for k, v in result.headers.items()
+            if k.lower() not in ("content-length", "content-type")
+        }
+    else:
+        body = JSONResponse(content=jsonable_encoder(result)).body
+        extra_headers = {}
+
+    versioned_cache.put(cache_key, etag, body, extra_headers)
+    return Response(content=body, media_type="application/json", headers={**extra_headers, **headers})
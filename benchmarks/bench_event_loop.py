@@ -0,0 +1,102 @@
+# benchmarks/bench_event_loop.py
+"""
+Tick ingest latency under concurrent order load.
+
+A simulated ingest task wakes every TICK_INTERVAL seconds and records how late
+it ran (event-loop lag). Orders run concurrently in three phases:
+
+  idle      no orders (baseline)
+  executor  buy/sell routes, DB work on the dedicated DB executor
+  blocking  same order logic called synchronously on the event loop
+            (what the routes did before the executor)
+
+Usage:
+    python -m benchmarks.bench_event_loop --orders 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import setup_env, use_local_redis, create_tables, percentiles, format_ms
+
+setup_env()
+
+from app.database.session import db_session  # noqa: E402
+from app.main import OrderRequest, buy_crypto, sell_crypto  # noqa: E402
+from app.models.account import DEFAULT_ACCOUNT_ID  # noqa: E402
+from app.services.order_service import OrderRejected, place_buy, place_sell  # noqa: E402
+from app.utils import price_book  # noqa: E402
+
+TICK_INTERVAL = 0.002
+SYMBOL = "BTCUSDT"
+PRICE = 100.0
+
+
+async def tick_loop(stop: asyncio.Event, lags: list):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK_INTERVAL
+        await asyncio.sleep(TICK_INTERVAL)
+        lags.append(max(0.0, loop.time() - expected))
+        price_book.update_price(SYMBOL, PRICE, "0.0")
+
+
+async def executor_order(i: int):
+    order = OrderRequest(symbol=SYMBOL, quantity=0.01)
+    if i % 2:
+        await sell_crypto(order, account_id=DEFAULT_ACCOUNT_ID, idempotency_key=None)
+    else:
+        await buy_crypto(order, account_id=DEFAULT_ACCOUNT_ID, idempotency_key=None)
+
+
+async def blocking_order(i: int):
+    place = place_sell if i % 2 else place_buy
+    with db_session() as db:
+        try:
+            place(db, SYMBOL, 0.01, PRICE)
+        except OrderRejected:
+            pass
+
+
+async def run_phase(name: str, order_fn, orders: int, concurrency: int, idle_seconds: float):
+    stop = asyncio.Event()
+    lags: list = []
+    ticker = asyncio.create_task(tick_loop(stop, lags))
+
+    started = time.perf_counter()
+    if order_fn is None:
+        await asyncio.sleep(idle_seconds)
+    else:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def guarded(i: int):
+            async with semaphore:
+                await order_fn(i)
+
+        await asyncio.gather(*(guarded(i) for i in range(orders)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+
+    throughput = f"{orders / elapsed:,.0f} orders/s" if order_fn else "-"
+    print(f"{name:<9} ticks={len(lags):<6} {format_ms(percentiles(lags))}  orders: {throughput}")
+
+
+async def main(orders: int, concurrency: int):
+    use_local_redis()
+    create_tables()
+    price_book.update_price(SYMBOL, PRICE, "0.0")
+
+    await run_phase("idle", None, orders, concurrency, idle_seconds=2.0)
+    await run_phase("executor", executor_order, orders, concurrency, 0)
+    await run_phase("blocking", blocking_order, orders, concurrency, 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.concurrency))
@@ -0,0 +1,130 @@
+# benchmarks/bench_ingest.py
+"""
+End-to-end market-data ingest throughput against the local fake feed.
+
+For each --rates value a fake_binance_feed subprocess is started and
+BINANCE_WS_URL points the ingest at it; MarketDataSupervisor then runs the
+real path (sharded websockets -> decode -> price book -> conflator -> Redis)
+for --seconds after a warmup. Reported per rate:
+
+  offered     frames/sec the feed was asked to send (rate x symbols)
+  ticks/s     frames ingested per second
+  ingest      exchange event time -> tick handled, percentiles
+  redis       exchange event time -> tick written to Redis by the conflator
+              (latest tick per symbol at each flush), percentiles
+  cpu/tick    process CPU time of the ingest process per tick (includes
+              fakeredis when it stands in for Redis)
+
+Usage:
+    python -m benchmarks.bench_ingest --symbols 100 --rates 1,10,50 --seconds 10
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import percentiles, format_ms
+
+
+class LatencySink:
+    """Ingest sink recording event time -> handled latency during the window."""
+
+    def __init__(self):
+        self.recording = False
+        self.ticks = 0
+        self.ingest: list = []
+        self.redis: list = []
+
+    def offer(self, tick):
+        if self.recording:
+            self.ticks += 1
+            self.ingest.append(time.time() - tick.event_time / 1000)
+
+    def on_flush(self, ticks, flushed_at: float):
+        if self.recording:
+            self.redis.extend(flushed_at - t.event_time / 1000 for t in ticks)
+
+
+def start_feed(port: int, rate: float, symbols: int) -> subprocess.Popen:
+    feed = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_binance_feed",
+         "--port", str(port), "--rate", str(rate), "--symbols", str(symbols)],
+        stdout=subprocess.PIPE,
+        text=True
+    )
+    if not feed.stdout.readline():  # "fake feed on ..." once listening
+        feed.wait()
+        raise RuntimeError(f"fake feed failed to start (port {port} in use?)")
+    return feed
+
+
+async def run_rate(symbols: int, per_shard: int, seconds: float, warmup: float) -> dict:
+    from app.services.crypto_ws import MarketDataSupervisor
+    from app.services.tick_conflator import TickConflator
+
+    sink = LatencySink()
+    conflator = TickConflator(on_flush=sink.on_flush)
+    supervisor = MarketDataSupervisor(
+        [f"sym{i}usdt" for i in range(symbols)],
+        conflator,
+        sinks=[sink],
+        symbols_per_shard=per_shard
+    )
+    supervisor.start()
+
+    await asyncio.sleep(warmup)
+    sink.recording = True
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+
+    await asyncio.sleep(seconds)
+
+    sink.recording = False
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    await supervisor.stop()
+
+    return {
+        "ticks": sink.ticks,
+        "ticks_per_sec": sink.ticks / elapsed,
+        "ingest": percentiles(sink.ingest),
+        "redis": percentiles(sink.redis),
+        "cpu_per_tick_us": cpu / sink.ticks * 1e6 if sink.ticks else 0.0,
+        "merged": conflator.merged,
+        "shards": len(supervisor.shards),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--rates", default="1,10,50", help="frames/sec per symbol, comma separated")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--symbols-per-shard", type=int, default=50)
+    parser.add_argument("--port", type=int, default=9443)
+    args = parser.parse_args()
+
+    os.environ["BINANCE_WS_URL"] = f"ws://127.0.0.1:{args.port}"
+
+    from benchmarks.common import setup_env, use_local_redis
+    setup_env()
+    use_local_redis()
+
+    for rate in (float(r) for r in args.rates.split(",")):
+        feed = start_feed(args.port, rate, args.symbols)
+        try:
+            result = asyncio.run(run_rate(args.symbols, args.symbols_per_shard, args.seconds, args.warmup))
+        finally:
+            feed.terminate()
+            feed.wait()
+
+        offered = rate * args.symbols
+        print(f"rate={rate:g}/s x {args.symbols} symbols ({result['shards']} shards)  "
+              f"offered={offered:,.0f}/s  ticks/s={result['ticks_per_sec']:,.0f}  "
+              f"cpu/tick={result['cpu_per_tick_us']:.1f}us")
+        print(f"  ingest  {format_ms(result['ingest'])}")
+        print(f"  redis   {format_ms(result['redis'])}")
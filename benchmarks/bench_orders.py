@@ -0,0 +1,316 @@
+# benchmarks/bench_orders.py
+"""
+Order-path load test: mixed concurrent requests against the FastAPI app.
+
+The app is driven in-process through httpx's ASGI transport (no lifespan, so
+no market-data feed); Redis is replaced by fakeredis when installed and the
+price cache is seeded for every symbol. --concurrency clients send --requests
+requests in total, picking endpoints by --mix weights:
+
+  buy       POST /api/order/buy
+  sell      POST /api/order/sell
+  holdings  GET  /api/portfolio/holdings
+  balance   GET  /api/balance
+  batch     POST /api/order/batch (--batch-size orders, buy/sell pairs)
+  transactions  GET /api/transactions
+  dashboard GET  /dashboard/prices
+
+Requests are spread over --accounts simulated traders (X-Account-Id).
+--retries N simulates a retry storm: every POST carries an Idempotency-Key
+and is sent N more times, reported separately as "<endpoint>+retry" (these
+should be replays served from Redis, not new orders).
+--revalidate makes GETs behave like polling browsers: each account resends
+the ETag it last got per endpoint as If-None-Match (304s are counted).
+Per endpoint: throughput, p50/p95/p99/max latency, rejections (4xx) and
+errors (5xx / transport). Results are written to
+benchmarks/results/<git sha>.json; --compare prints the change against an
+earlier results file.
+
+Usage:
+    python -m benchmarks.bench_orders --requests 5000 --concurrency 32
+    python -m benchmarks.bench_orders --accounts 100
+    python -m benchmarks.bench_orders --mix buy=1,sell=1 --requests 2000
+    python -m benchmarks.bench_orders --mix batch=1 --requests 20 --batch-size 100
+    python -m benchmarks.bench_orders --mix buy=1,sell=1 --retries 5
+    python -m benchmarks.bench_orders --mix buy=1,balance=10,transactions=5,dashboard=10 --revalidate
+    python -m benchmarks.bench_orders --compare benchmarks/results/abc1234.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from benchmarks.common import setup_env, use_local_redis, create_tables, percentiles
+
+setup_env()
+
+import httpx  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.database.db import SQLITE_PROFILE, SessionLocal  # noqa: E402
+from app.models.account import DEFAULT_ACCOUNT_ID  # noqa: E402
+from app.services.accounts import create_account  # noqa: E402
+from app.utils import price_book  # noqa: E402
+from app.utils.cache import set_symbol_prices  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "BNBUSDT"]
+ORDER_QUANTITY = 0.01
+DEFAULT_MIX = "buy=3,sell=2,holdings=3,balance=2"
+
+ENDPOINTS = {
+    "buy": ("POST", "/api/order/buy"),
+    "sell": ("POST", "/api/order/sell"),
+    "holdings": ("GET", "/api/portfolio/holdings"),
+    "balance": ("GET", "/api/balance"),
+    "batch": ("POST", "/api/order/batch"),
+    "transactions": ("GET", "/api/transactions"),
+    "dashboard": ("GET", "/dashboard/prices"),
+}
+
+
+def git_sha() -> str:
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD"]) != 0
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint in --mix: {name}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def seed_prices(use_price_book: bool):
+    prices = {symbol: 100.0 * (i + 1) for i, symbol in enumerate(SYMBOLS)}
+    await set_symbol_prices(
+        {s: {"s": s, "c": p, "P": "0.0", "E": None} for s, p in prices.items()},
+        {s: {"symbol": s, "price": p, "change": "0.0"} for s, p in prices.items()},
+        ttl=3600
+    )
+    if use_price_book:
+        for symbol, price in prices.items():
+            price_book.update_price(symbol, price, "0.0")
+
+
+def create_accounts(count: int) -> list:
+    """Default account plus count - 1 new ones."""
+    ids = [DEFAULT_ACCOUNT_ID]
+    with SessionLocal() as db:
+        for i in range(1, count):
+            ids.append(create_account(db, f"bench-{i}")["id"])
+    return ids
+
+
+def batch_body(rng: random.Random, size: int) -> dict:
+    """size orders as buy/sell pairs of one symbol, so every order can fill."""
+    orders = []
+    for _ in range(size // 2):
+        symbol = rng.choice(SYMBOLS)
+        orders.append({"symbol": symbol, "side": "buy", "quantity": ORDER_QUANTITY})
+        orders.append({"symbol": symbol, "side": "sell", "quantity": ORDER_QUANTITY})
+    return {"orders": orders}
+
+
+async def run_load(
+    requests: int,
+    concurrency: int,
+    weights: dict,
+    seed: int,
+    accounts: list,
+    batch_size: int,
+    retries: int = 0,
+    revalidate: bool = False
+) -> dict:
+    rng = random.Random(seed)
+    plan = rng.choices(list(weights), weights=list(weights.values()), k=requests)
+    symbols = [rng.choice(SYMBOLS) for _ in range(requests)]
+    headers = [{"X-Account-Id": str(rng.choice(accounts))} for _ in range(requests)]
+
+    latencies = defaultdict(list)
+    rejected = defaultdict(int)
+    errors = defaultdict(int)
+    replayed = defaultdict(int)
+    not_modified = defaultdict(int)
+    etags = {}  # (endpoint, account header) -> last ETag
+    next_index = 0
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Opening positions so early sells have something to sell
+        for account_id in accounts:
+            for symbol in SYMBOLS:
+                await client.post(
+                    "/api/order/buy",
+                    json={"symbol": symbol, "quantity": ORDER_QUANTITY * 20},
+                    headers={"X-Account-Id": str(account_id)}
+                )
+
+        async def worker():
+            nonlocal next_index
+            while next_index < requests:
+                i = next_index
+                next_index += 1
+                name = plan[i]
+                method, path = ENDPOINTS[name]
+                if name == "batch":
+                    body = batch_body(rng, batch_size)
+                elif method == "POST":
+                    body = {"symbol": symbols[i], "quantity": ORDER_QUANTITY}
+                else:
+                    body = None
+
+                request_headers = headers[i]
+                attempts = 1
+                if retries and method == "POST":
+                    request_headers = {**request_headers, "Idempotency-Key": f"bench-{seed}-{i}"}
+                    attempts += retries
+                etag_key = (name, request_headers["X-Account-Id"])
+                if revalidate and method == "GET" and etag_key in etags:
+                    request_headers = {**request_headers, "If-None-Match": etags[etag_key]}
+
+                for attempt in range(attempts):
+                    label = name if attempt == 0 else f"{name}+retry"
+                    started = time.perf_counter()
+                    try:
+                        response = await client.request(method, path, json=body, headers=request_headers)
+                        status = response.status_code
+                        if response.headers.get("idempotent-replayed"):
+                            replayed[label] += 1
+                        if status == 304:
+                            not_modified[label] += 1
+                        elif revalidate and "etag" in response.headers:
+                            etags[etag_key] = response.headers["etag"]
+                    except Exception:
+                        status = None
+                    latencies[label].append(time.perf_counter() - started)
+
+                    if status is None or status >= 500:
+                        errors[label] += 1
+                    elif status >= 400 and not response.headers.get("idempotent-replayed"):
+                        rejected[label] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for name in [*weights, *(f"{n}+retry" for n in weights)]:
+        count = len(latencies[name])
+        if not count and name not in weights:
+            continue
+        orders_per_request = batch_size if name == "batch" else 1
+        endpoints[name] = {
+            "requests": count,
+            "throughput": round(count / elapsed, 1),
+            "orders_per_sec": round(count * orders_per_request / elapsed, 1) if name in ("buy", "sell", "batch") else None,
+            **{k: round(v * 1000, 3) for k, v in percentiles(latencies[name]).items()},
+            "rejected": rejected[name],
+            "replayed": replayed[name],
+            "not_modified": not_modified[name],
+            "errors": errors[name],
+            "error_rate": round(errors[name] / count, 4) if count else 0.0,
+        }
+
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "throughput": round(sum(len(v) for v in latencies.values()) / elapsed, 1),
+        "endpoints": endpoints,
+    }
+
+
+def print_result(result: dict):
+    meta = result["meta"]
+    print(f"commit {meta['commit']}: {meta['requests']} requests, concurrency {meta['concurrency']}, "
+          f"{meta.get('accounts', 1)} accounts, {meta.get('retries', 0)} retries, "
+          f"{result['throughput']:.1f} req/s total")
+    print(f"{'endpoint':<12} {'req':>7} {'req/s':>9} {'orders/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'max ms':>9} {'4xx':>6} {'5xx':>6} {'replay':>7} {'304':>7}")
+    for name, e in result["endpoints"].items():
+        orders = f"{e['orders_per_sec']:>9.1f}" if e.get("orders_per_sec") is not None else f"{'-':>9}"
+        print(f"{name:<12} {e['requests']:>7} {e['throughput']:>9.1f} {orders} {e['p50']:>9.2f} {e['p95']:>9.2f} "
+              f"{e['p99']:>9.2f} {e['max']:>9.2f} {e['rejected']:>6} {e['errors']:>6} {e.get('replayed', 0):>7} {e.get('not_modified', 0):>7}")
+
+
+def compare(result: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    print(f"\nvs {baseline['meta']['commit']} ({baseline_path})")
+    print(f"{'endpoint':<12} {'req/s':>16} {'p50 ms':>16} {'p99 ms':>16}")
+    for name, e in result["endpoints"].items():
+        b = baseline["endpoints"].get(name)
+        if not b:
+            continue
+        cells = []
+        for key in ("throughput", "p50", "p99"):
+            change = (e[key] - b[key]) / b[key] * 100 if b[key] else 0.0
+            cells.append(f"{e[key]:>8.1f} {change:+6.1f}%")
+        print(f"{name:<12} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight,...")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--accounts", type=int, default=1, help="simulated traders to spread requests over")
+    parser.add_argument("--batch-size", type=int, default=100, help="orders per /api/order/batch request")
+    parser.add_argument("--retries", type=int, default=0, help="resend every POST N times with its Idempotency-Key")
+    parser.add_argument("--revalidate", action="store_true", help="GETs resend their last ETag (If-None-Match)")
+    parser.add_argument("--no-price-book", action="store_true", help="serve prices from (fake)Redis only")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<git sha>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    use_local_redis()
+    create_tables()
+    accounts = create_accounts(max(1, args.accounts))
+
+    async def main():
+        await seed_prices(not args.no_price_book)
+        return await run_load(args.requests, args.concurrency, parse_mix(args.mix), args.seed, accounts, args.batch_size, args.retries, args.revalidate)
+
+    result = asyncio.run(main())
+    commit = git_sha()
+    result["meta"] = {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "accounts": len(accounts),
+        "batch_size": args.batch_size,
+        "retries": args.retries,
+        "revalidate": args.revalidate,
+        "mix": args.mix,
+        "seed": args.seed,
+        "price_book": not args.no_price_book,
+        "sqlite_profile": SQLITE_PROFILE,
+        "python": platform.python_version(),
+    }
+
+    print_result(result)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nsaved {output}")
+
+    if args.compare:
+        compare(result, args.compare)
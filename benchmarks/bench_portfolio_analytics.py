@@ -0,0 +1,177 @@
+# benchmarks/bench_portfolio_analytics.py
+"""
+Time /api/portfolio/analytics math on a large synthetic trade history.
+
+  compute  compute_analytics over N trades already in arrays
+  load     load_trade_history from SQLite (with --load): cold (first call
+           in the process), then warm (cached arrays extended with
+           --new-trades trades committed since)
+  endpoint load + compute, i.e. what /api/portfolio/analytics spends on
+           the history (cold and warm)
+  check    realized P&L / cost basis against a plain-Python FIFO over the
+           first --check trades (sanity check of the vectorized FIFO)
+
+Usage:
+    python -m benchmarks.bench_portfolio_analytics --trades 1000000 --symbols 100
+    python -m benchmarks.bench_portfolio_analytics --trades 200000 --load
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+from benchmarks.common import setup_env, create_tables
+
+setup_env()
+
+from app.services.portfolio_analytics import TradeHistory, compute_analytics, load_trade_history  # noqa: E402
+
+
+def make_history(n: int, n_symbols: int, seed: int = 42) -> TradeHistory:
+    """Random-walk prices; sells never exceed the position held."""
+    rng = random.Random(seed)
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    prices = [rng.uniform(1, 1000) for _ in range(n_symbols)]
+    held = [0.0] * n_symbols
+
+    symbol_idx = np.empty(n, dtype=np.int64)
+    quantity = np.empty(n)
+    price = np.empty(n)
+
+    for i in range(n):
+        s = rng.randrange(n_symbols)
+        prices[s] *= 1 + rng.gauss(0, 0.01)
+        if held[s] > 0 and rng.random() < 0.45:
+            q = -held[s] * rng.uniform(0.1, 1.0)
+        else:
+            q = rng.uniform(0.01, 5)
+        held[s] += q
+        symbol_idx[i], quantity[i], price[i] = s, q, prices[s]
+
+    start = time.time() - 365 * 86400
+    timestamp = start + np.sort(np.random.default_rng(seed).uniform(0, 365 * 86400, n))
+    return TradeHistory(symbols, symbol_idx, quantity, price, timestamp)
+
+
+def reference_fifo(history: TradeHistory, n: int):
+    """Per-symbol realized P&L and remaining cost with a deque per symbol."""
+    lots = defaultdict(deque)
+    realized = defaultdict(float)
+    for s, q, p in zip(history.symbol_idx[:n], history.quantity[:n], history.price[:n]):
+        if q > 0:
+            lots[s].append([q, p])
+            continue
+        remaining = -q
+        while remaining > 1e-12 and lots[s]:
+            lot = lots[s][0]
+            used = min(lot[0], remaining)
+            realized[s] += used * (p - lot[1])
+            lot[0] -= used
+            remaining -= used
+            if lot[0] <= 1e-12:
+                lots[s].popleft()
+    cost = {s: sum(q * p for q, p in queue) for s, queue in lots.items()}
+    return realized, cost
+
+
+def check(history: TradeHistory, n: int):
+    sub = TradeHistory(history.symbols, *(a[:n] for a in history[1:]))
+    result = compute_analytics(sub, {}, float(sub.timestamp[-1]))
+    realized, cost = reference_fifo(history, n)
+
+    by_symbol = {row["symbol"]: row for row in result["symbols"]}
+    worst = 0.0
+    for s, name in enumerate(history.symbols):
+        row = by_symbol.get(name)
+        if row is None:
+            continue
+        worst = max(worst, abs(row["realized_pnl"] - realized[s]), abs(row["cost_basis"] - cost.get(s, 0.0)))
+    print(f"check     {n:,} trades, max abs diff vs Python FIFO: {worst:.4f}")
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def _insert(history: TradeHistory, start: int, stop: int, shift: float = 0.0):
+    from datetime import datetime, timezone
+    from app.database.db import engine
+    from app.models.account import DEFAULT_ACCOUNT_ID
+
+    rows = [
+        (
+            DEFAULT_ACCOUNT_ID,
+            history.symbols[history.symbol_idx[i]],
+            "BUY" if history.quantity[i] > 0 else "SELL",
+            abs(float(history.quantity[i])),
+            float(history.price[i]),
+            datetime.fromtimestamp(history.timestamp[i] + shift, timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+        )
+        for i in range(start, stop)
+    ]
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO transactions (account_id, crypto_symbol, transaction_type, quantity, price, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+
+def load(history: TradeHistory, n: int, new_trades: int, prices: dict):
+    from app.database.db import SessionLocal
+
+    create_tables()  # includes the default account
+    _insert(history, 0, n)
+
+    db = SessionLocal()
+    try:
+        loaded, cold = _timed(load_trade_history, db)
+        _, compute = _timed(compute_analytics, loaded, prices, time.time())
+        print(f"load      {len(loaded.price):>10,} trades  cold {cold * 1000:8.1f} ms")
+        print(f"endpoint  cold {(cold + compute) * 1000:8.1f} ms (load + compute)")
+
+        # Trades committed after the first call: repeat the first ones a year later
+        db.rollback()
+        _insert(history, 0, min(new_trades, n), shift=366 * 86400)
+        loaded, warm = _timed(load_trade_history, db)
+        _, compute = _timed(compute_analytics, loaded, prices, time.time())
+        print(f"load      {len(loaded.price):>10,} trades  warm {warm * 1000:8.1f} ms (+{min(new_trades, n):,} new)")
+        print(f"endpoint  warm {(warm + compute) * 1000:8.1f} ms (load + compute)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--check", type=int, default=50_000)
+    parser.add_argument("--load", action="store_true", help="also time loading the history from SQLite")
+    parser.add_argument("--new-trades", type=int, default=100, help="trades added between cold and warm loads")
+    args = parser.parse_args()
+
+    print(f"generating {args.trades:,} trades over {args.symbols} symbols...")
+    history = make_history(args.trades, args.symbols)
+    prices = {s: float(history.price[history.symbol_idx == i][-1]) * 1.01 for i, s in enumerate(history.symbols)}
+
+    timings = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        result = compute_analytics(history, prices, time.time())
+        timings.append(time.perf_counter() - started)
+
+    print(f"compute   {args.trades:>10,} trades  best={min(timings) * 1000:.1f} ms  "
+          f"median={sorted(timings)[len(timings) // 2] * 1000:.1f} ms")
+    print(f"totals    {result['totals']}")
+    print(f"returns   {result['returns']}")
+
+    if args.check:
+        check(history, min(args.check, args.trades))
+    if args.load:
+        load(history, args.trades, args.new_trades, prices)
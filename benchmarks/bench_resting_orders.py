@@ -0,0 +1,113 @@
+# benchmarks/bench_resting_orders.py
+"""
+Tick-path cost of the resting-order trigger index.
+
+For each --orders count, the index is filled with random LIMIT / STOP_LOSS /
+TAKE_PROFIT orders spread within --spread of each symbol's start price,
+then --ticks random-walk ticks are run through the same per-tick work a
+shard does (decode, price book, conflator, trigger sink). Fired orders
+are only queued (no DB), so the numbers are the ingest-side cost.
+
+Reported per count: us/tick for the whole tick path and for the trigger
+sink alone, ticks/s, and orders triggered.
+
+Usage:
+    python -m benchmarks.bench_resting_orders --orders 0,10000,50000,100000
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from app.services.resting_orders import ORDER_TYPES, RestingOrderTrigger, trigger_direction  # noqa: E402
+from app.services.tick_conflator import TickConflator  # noqa: E402
+from app.services.ticker_decoder import decode_ticker_frame  # noqa: E402
+from app.utils import price_book  # noqa: E402
+
+
+def make_frames(symbols, start, ticks: int, volatility: float, rng: random.Random):
+    """Pre-encoded combined-stream frames, so encoding is not timed."""
+    prices = dict(start)
+    frames = []
+    for i in range(ticks):
+        symbol = symbols[i % len(symbols)]
+        prices[symbol] *= math.exp(rng.gauss(0, volatility))
+        frames.append(json.dumps({
+            "stream": f"{symbol.lower()}@ticker",
+            "data": {"e": "24hrTicker", "E": 1700000000000 + i, "s": symbol, "c": f"{prices[symbol]:.8f}", "P": "0.1"}
+        }))
+    return frames
+
+
+def fill_index(trigger: RestingOrderTrigger, symbols, start, orders: int, spread: float, rng: random.Random):
+    for order_id in range(1, orders + 1):
+        symbol = rng.choice(symbols)
+        side = rng.choice(("BUY", "SELL"))
+        order_type = rng.choice(ORDER_TYPES)
+        direction = trigger_direction(side, order_type)
+        # Place on the not-yet-triggered side of the start price
+        offset = rng.uniform(0.001, spread)
+        trigger_price = start[symbol] * (1 - offset if direction == "below" else 1 + offset)
+        trigger.index.add(order_id, symbol, direction, trigger_price)
+
+
+def run(orders: int, symbols, ticks: int, spread: float, volatility: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    start = {s: rng.uniform(1, 70000) for s in symbols}
+    frames = make_frames(symbols, start, ticks, volatility, rng)
+
+    trigger = RestingOrderTrigger()
+    fill_index(trigger, symbols, start, orders, spread, random.Random(seed + 1))
+    conflator = TickConflator()
+    sinks = [conflator, trigger]
+
+    # Full tick path, as in CombinedCryptoWebSocket.run
+    started = time.perf_counter()
+    for msg in frames:
+        tick = decode_ticker_frame(msg)
+        price_book.update_price(tick.symbol, tick.price, tick.change, tick.event_time)
+        for sink in sinks:
+            sink.offer(tick)
+    elapsed = time.perf_counter() - started
+    triggered = trigger.triggered
+
+    # Trigger sink alone, replaying the same ticks against a fresh index
+    trigger = RestingOrderTrigger()
+    fill_index(trigger, symbols, start, orders, spread, random.Random(seed + 1))
+    decoded = [decode_ticker_frame(msg) for msg in frames]
+    started = time.perf_counter()
+    for tick in decoded:
+        trigger.offer(tick)
+    trigger_elapsed = time.perf_counter() - started
+
+    return {
+        "orders": orders,
+        "us_per_tick": elapsed / ticks * 1e6,
+        "trigger_us_per_tick": trigger_elapsed / ticks * 1e6,
+        "ticks_per_sec": ticks / elapsed,
+        "triggered": triggered,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", default="0,10000,50000,100000", help="resting order counts, comma separated")
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=200000)
+    parser.add_argument("--spread", type=float, default=0.05, help="max trigger distance from start price")
+    parser.add_argument("--volatility", type=float, default=0.0005, help="per-tick log-return stdev")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}USDT" for i in range(args.symbols)]
+    print(f"{'orders':>8} {'us/tick':>9} {'trigger us':>11} {'ticks/s':>10} {'triggered':>10}")
+    for orders in (int(n) for n in args.orders.split(",")):
+        r = run(orders, symbols, args.ticks, args.spread, args.volatility, args.seed)
+        print(f"{r['orders']:>8} {r['us_per_tick']:>9.2f} {r['trigger_us_per_tick']:>11.3f} "
+              f"{r['ticks_per_sec']:>10,.0f} {r['triggered']:>10}")
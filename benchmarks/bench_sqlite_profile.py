@@ -0,0 +1,104 @@
+# benchmarks/bench_sqlite_profile.py
+"""
+Order throughput and holdings read latency per SQLite engine profile.
+
+Each profile (SQLITE_PROFILE=default|tuned) runs in its own process on a
+fresh database: concurrent coroutines place buy/sell orders through the order
+routes while READERS coroutines poll /api/portfolio/holdings (through the
+app, httpx ASGI transport) every READ_INTERVAL.
+
+Usage:
+    python -m benchmarks.bench_sqlite_profile --orders 2000 --readers 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import percentiles, format_ms
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT"]
+READ_INTERVAL = 0.02
+
+
+async def run_workload(orders: int, readers: int) -> dict:
+    import httpx
+    from benchmarks.common import use_local_redis, create_tables
+    from app.main import app, OrderRequest, buy_crypto, sell_crypto
+    from app.models.account import DEFAULT_ACCOUNT_ID
+    from app.utils import price_book
+
+    use_local_redis()
+    create_tables()
+    for symbol in SYMBOLS:
+        price_book.update_price(symbol, 100.0, "0.0")
+
+    done = asyncio.Event()
+    read_latencies: list = []
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    async def reader():
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/api/portfolio/holdings")
+            read_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(READ_INTERVAL)
+
+    async def writer(i: int):
+        order = OrderRequest(symbol=SYMBOLS[i % len(SYMBOLS)], quantity=0.01)
+        if i % 3 == 2:
+            await sell_crypto(order, account_id=DEFAULT_ACCOUNT_ID, idempotency_key=None)
+        else:
+            await buy_crypto(order, account_id=DEFAULT_ACCOUNT_ID, idempotency_key=None)
+
+    reader_tasks = [asyncio.create_task(reader()) for _ in range(readers)]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(i) for i in range(orders)))
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    await asyncio.gather(*reader_tasks)
+    await client.aclose()
+
+    return {
+        "orders_per_sec": orders / elapsed,
+        "holdings_reads": len(read_latencies),
+        "holdings_latency": percentiles(read_latencies),
+    }
+
+
+def run_child(profile: str, orders: int, readers: int) -> dict:
+    env = dict(os.environ, SQLITE_PROFILE=profile)
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_sqlite_profile", "--child",
+         "--orders", str(orders), "--readers", str(readers)],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        from benchmarks.common import setup_env
+        setup_env()
+        print(json.dumps(asyncio.run(run_workload(args.orders, args.readers))))
+        sys.exit(0)
+
+    for profile in ("default", "tuned"):
+        result = run_child(profile, args.orders, args.readers)
+        print(
+            f"{profile:<8} orders: {result['orders_per_sec']:,.0f}/s  "
+            f"holdings reads={result['holdings_reads']:<6} {format_ms(result['holdings_latency'])}"
+        )
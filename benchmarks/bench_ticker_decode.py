@@ -0,0 +1,72 @@
+# benchmarks/bench_ticker_decode.py
+"""
+Single-core throughput of Binance ticker frame handling (messages/sec).
+
+  legacy   json.loads of the whole frame + json.dumps of the full payload
+           (what crypto_ws did per message before decode_ticker_frame)
+  compact  decode_ticker_frame + json.dumps of the compact Tick dict
+           (decoder: orjson when installed, stdlib json otherwise)
+
+Usage:
+    python -m benchmarks.bench_ticker_decode --messages 200000
+"""
+
+import argparse
+import json
+import random
+import time
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from app.services.ticker_decoder import DECODER, decode_ticker_frame  # noqa: E402
+
+
+def make_frame(symbol: str, price: float) -> str:
+    """A 24hr ticker frame in Binance combined-stream format."""
+    now = int(time.time() * 1000)
+    return json.dumps({
+        "stream": f"{symbol.lower()}@ticker",
+        "data": {
+            "e": "24hrTicker", "E": now, "s": symbol,
+            "p": "12.30000000", "P": "1.234", "w": f"{price:.8f}",
+            "x": f"{price:.8f}", "c": f"{price:.8f}", "Q": "0.01000000",
+            "b": f"{price:.8f}", "B": "1.00000000", "a": f"{price:.8f}", "A": "1.00000000",
+            "o": f"{price:.8f}", "h": f"{price:.8f}", "l": f"{price:.8f}",
+            "v": "12345.67800000", "q": "987654321.00000000",
+            "O": now - 86400000, "C": now, "F": 1, "L": 100000, "n": 100000
+        }
+    })
+
+
+def legacy(msg: str):
+    payload = json.loads(msg).get("data")
+    json.dumps(payload)
+    return payload["s"]
+
+
+def compact(msg: str):
+    tick = decode_ticker_frame(msg)
+    json.dumps(tick.as_dict())
+    return tick.symbol
+
+
+def measure(fn, frames) -> float:
+    started = time.perf_counter()
+    for msg in frames:
+        fn(msg)
+    return len(frames) / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    symbols = [f"SYM{i}USDT" for i in range(100)]
+    frames = [make_frame(rng.choice(symbols), rng.uniform(0.0001, 70000)) for _ in range(args.messages)]
+
+    for name, fn in (("legacy", legacy), (f"compact ({DECODER})", compact)):
+        print(f"{name:<16} {measure(fn, frames):>12,.0f} msg/s")
@@ -0,0 +1,66 @@
+# benchmarks/common.py
+# Shared setup for the benchmark scripts (run from the project root:
+#   python -m benchmarks.<name>)
+
+import os
+import tempfile
+from typing import Dict, List
+
+
+def setup_env(db_name: str = "bench.db") -> str:
+    """
+    Points the app at a throwaway SQLite file and fills required settings.
+    Must run before anything under app/ is imported.
+    """
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench-"), db_name)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    for key in ("SECRET_KEY", "BINANCE_API_KEY", "BINANCE_API_SECRET"):
+        os.environ.setdefault(key, "bench")
+    os.environ.setdefault("BINANCE_WS_URL", "wss://stream.binance.com:9443")
+    return db_path
+
+
+def use_local_redis():
+    """
+    Swaps the app's Redis client for an in-process fakeredis instance when
+    fakeredis is installed; otherwise REDIS_URL is used as configured.
+    """
+    try:
+        import fakeredis.aioredis
+    except ImportError:
+        print("fakeredis not installed, using REDIS_URL")
+        return
+
+    import app.utils.redis_client as redis_client
+    redis_client._redis_client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+def create_tables():
+    from app.database.db import Base, engine, SessionLocal
+    from app.database.init_db import ensure_indexes
+    from app.services.accounts import ensure_default_account
+    import app.models  # noqa: F401  (register tables)
+    import app.models.balance  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    ensure_indexes()
+    with SessionLocal() as db:
+        ensure_default_account(db)
+
+
+def percentiles(values: List[float], points=(50, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles plus max; empty input gives zeros."""
+    ordered = sorted(values)
+    if not ordered:
+        return {**{f"p{p}": 0.0 for p in points}, "max": 0.0}
+
+    result = {}
+    for p in points:
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+        result[f"p{p}"] = ordered[index]
+    result["max"] = ordered[-1]
+    return result
+
+
+def format_ms(stats: Dict[str, float]) -> str:
+    return "  ".join(f"{k}={v * 1000:.2f}ms" for k, v in stats.items())
@@ -0,0 +1,113 @@
+# benchmarks/fake_binance_feed.py
+"""
+Local stand-in for the Binance combined-stream endpoint.
+
+Serves /stream?streams=<sym>@ticker/<sym>@ticker/... and pushes 24hrTicker
+frames (full Binance payload) for every requested symbol at --rate frames
+per second per symbol. Prices follow a geometric random walk. Without a
+streams query, --symbols synthetic symbols (SYM0USDT, ...) are served.
+
+Point the app at it with BINANCE_WS_URL=ws://127.0.0.1:9443
+
+Usage:
+    python -m benchmarks.fake_binance_feed --port 9443 --rate 10
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from typing import List
+from urllib.parse import parse_qs, urlparse
+
+import websockets
+
+SEND_INTERVAL = 0.01  # seconds between send batches
+
+
+def ticker_frame(symbol: str, price: float, open_price: float, now_ms: int) -> str:
+    """One combined-stream 24hrTicker frame."""
+    change = price - open_price
+    return json.dumps({
+        "stream": f"{symbol.lower()}@ticker",
+        "data": {
+            "e": "24hrTicker", "E": now_ms, "s": symbol,
+            "p": f"{change:.8f}", "P": f"{change / open_price * 100:.3f}",
+            "w": f"{price:.8f}", "x": f"{open_price:.8f}", "c": f"{price:.8f}", "Q": "0.01000000",
+            "b": f"{price:.8f}", "B": "1.00000000", "a": f"{price:.8f}", "A": "1.00000000",
+            "o": f"{open_price:.8f}", "h": f"{max(price, open_price):.8f}", "l": f"{min(price, open_price):.8f}",
+            "v": "12345.67800000", "q": "987654321.00000000",
+            "O": now_ms - 86400000, "C": now_ms, "F": 1, "L": 100000, "n": 100000
+        }
+    })
+
+
+class RandomWalk:
+    """Geometric random walk per symbol."""
+
+    def __init__(self, symbols: List[str], volatility: float, seed: int):
+        self.rng = random.Random(seed)
+        self.volatility = volatility
+        self.open = {s: self.rng.uniform(0.01, 70000) for s in symbols}
+        self.price = dict(self.open)
+
+    def step(self, symbol: str) -> float:
+        self.price[symbol] *= math.exp(self.rng.gauss(0, self.volatility))
+        return self.price[symbol]
+
+
+def requested_symbols(path: str, default_count: int) -> List[str]:
+    streams = parse_qs(urlparse(path).query).get("streams", [""])[0]
+    symbols = [s.split("@")[0].upper() for s in streams.split("/") if s]
+    return symbols or [f"SYM{i}USDT" for i in range(default_count)]
+
+
+async def stream(ws, symbols: List[str], rate: float, volatility: float, seed: int):
+    """Sends rate frames/sec per symbol, round robin, in SEND_INTERVAL batches."""
+    walk = RandomWalk(symbols, volatility, seed)
+    per_second = rate * len(symbols)
+    started = time.perf_counter()
+    sent = 0
+    index = 0
+
+    while True:
+        due = int((time.perf_counter() - started) * per_second) - sent
+        if due > 0:
+            now_ms = int(time.time() * 1000)
+            for _ in range(due):
+                symbol = symbols[index]
+                index = (index + 1) % len(symbols)
+                await ws.send(ticker_frame(symbol, walk.step(symbol), walk.open[symbol], now_ms))
+            sent += due
+        await asyncio.sleep(SEND_INTERVAL)
+
+
+async def serve(host: str, port: int, rate: float, default_symbols: int, volatility: float, seed: int):
+    async def handler(ws):
+        symbols = requested_symbols(ws.request.path, default_symbols)
+        try:
+            await stream(ws, symbols, rate, volatility, seed)
+        except websockets.ConnectionClosed:
+            pass
+
+    async with websockets.serve(handler, host, port, max_queue=None, compression=None):
+        print(f"fake feed on ws://{host}:{port} ({rate:g} frames/s per symbol)", flush=True)
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9443)
+    parser.add_argument("--rate", type=float, default=1.0, help="frames per second per symbol")
+    parser.add_argument("--symbols", type=int, default=100, help="symbols when the URL names none")
+    parser.add_argument("--volatility", type=float, default=0.0005, help="per-step log-return stdev")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.rate, args.symbols, args.volatility, args.seed))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,16 @@
+# rebuild_lots.py
+# Regenerates the open_lots FIFO ledger and positions from the transaction log.
+from app.database.init_db import init_db
+from app.database.session import SessionLocal
+from app.services.accounts import ensure_default_account
+from app.services.lot_ledger import rebuild_ledger
+import app.models  # noqa: F401  (register tables)
+
+# Migrates pre-account databases (account_id columns) before replaying
+init_db()
+
+db = SessionLocal()
+ensure_default_account(db)
+count = rebuild_ledger(db)
+db.close()
+print(f"✅ Ledger rebuilt ({count} open lots)")
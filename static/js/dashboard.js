@@ -3,6 +3,7 @@
 // ===========================
 
 const API_URL = "/dashboard/prices";
+const PRICE_STREAM_PATH = "/ws/prices";
 
 // ===== Market Overview coins =====
 const MARKET_OVERVIEW_COINS = [
@@ -125,8 +126,64 @@ async function fetchCryptoPrices() {
     }
 }
 
-fetchCryptoPrices();
-setInterval(fetchCryptoPrices, 3000);
+// ===== Live price stream (server push) =====
+// The server sends one snapshot, then batches of changed coins.
+// Falls back to polling while the stream is down.
+const priceState = new Map();
+let pollTimer = null;
+
+function renderPriceState() {
+    const data = Array.from(priceState.values());
+    if (!data.length) return;
+
+    renderCryptoTable(data);
+    updateMarketOverview(data);
+}
+
+function startPolling() {
+    if (pollTimer) return;
+    fetchCryptoPrices();
+    pollTimer = setInterval(fetchCryptoPrices, 3000);
+}
+
+function stopPolling() {
+    clearInterval(pollTimer);
+    pollTimer = null;
+}
+
+function connectPriceStream() {
+    if (!("WebSocket" in window)) {
+        startPolling();
+        return;
+    }
+
+    const protocol = window.location.protocol === "https:" ? "wss" : "ws";
+    const socket = new WebSocket(`${protocol}://${window.location.host}${PRICE_STREAM_PATH}`);
+
+    socket.onopen = () => stopPolling();
+
+    socket.onmessage = (event) => {
+        const msg = JSON.parse(event.data);
+
+        if (msg.type === "snapshot") {
+            priceState.clear();
+        }
+
+        (msg.data || []).forEach(item => {
+            const previous = priceState.get(item.symbol);
+            priceState.set(item.symbol, { ...previous, ...item });
+        });
+
+        renderPriceState();
+    };
+
+    socket.onclose = () => {
+        startPolling();
+        setTimeout(connectPriceStream, 5000);
+    };
+}
+
+connectPriceStream();
 
 // ===== Row click for trading =====
 document.addEventListener("click", (e) => {
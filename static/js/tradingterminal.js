@@ -402,9 +402,19 @@ document.addEventListener("DOMContentLoaded", () => {
      ================================================= */
   async function fetchTodaysTrades() {
     try {
-      const res = await fetch("/api/transactions"); // make sure your API endpoint returns today's transactions
-      if (!res.ok) throw new Error("Failed to fetch trades");
-      const data = await res.json();
+      const startOfDay = new Date();
+      startOfDay.setHours(0, 0, 0, 0);
+      // Cursor-paginated (newest first): follow X-Next-Cursor through the whole day
+      const data = [];
+      let cursor = null;
+      do {
+        const params = new URLSearchParams({ since: startOfDay.toISOString(), limit: 1000 });
+        if (cursor) params.set("cursor", cursor);
+        const res = await fetch(`/api/transactions?${params}`);
+        if (!res.ok) throw new Error("Failed to fetch trades");
+        data.push(...await res.json());
+        cursor = res.headers.get("X-Next-Cursor");
+      } while (cursor);
   
       const tbody = document.getElementById("tradesBody");
       tbody.innerHTML = "";
@@ -102,24 +102,53 @@ function renderTransactions(filter = "", sort = "date-desc") {
 }
 
 // ===== Fetch ALL Transactions (PUBLIC) =====
+// /api/transactions is cursor-paginated (newest first).
+// First load walks every page; refreshes only ask for rows at or after the
+// newest one already loaded (?since=), deduplicated by id.
+const TRANSACTIONS_PAGE_SIZE = 500;
+const transactionsById = new Map();
+let historyLoaded = false;
+let newestTimestamp = null;
+
+async function fetchTransactionPage(cursor, since) {
+  const params = new URLSearchParams({ limit: TRANSACTIONS_PAGE_SIZE });
+  if (cursor) params.set("cursor", cursor);
+  if (since) params.set("since", since);
+
+  // Default HTTP cache: the browser revalidates with If-None-Match
+  // (server sends ETag + Cache-Control: no-cache), so unchanged polls are 304s
+  const res = await fetch(`/api/transactions?${params}`, {
+    method: "GET",
+    headers: { "Accept": "application/json" }
+  });
+  if (!res.ok) throw new Error(res.status);
+
+  return { items: await res.json(), next: res.headers.get("X-Next-Cursor") };
+}
+
 async function fetchTransactions() {
   const container = document.getElementById("transactions-container");
-  container.innerHTML = "Loading transactions...";
+  if (!historyLoaded) container.innerHTML = "Loading transactions...";
 
   try {
-    const res = await fetch("/api/transactions", {
-      method: "GET",
-      cache: "no-store",
-      headers: { "Accept": "application/json" }
-    });
-
-    if (!res.ok) {
-      container.textContent = "⚠️ Failed to load transactions.";
-      return;
-    }
-
-    transactions = await res.json();
-    renderTransactions();
+    const since = historyLoaded ? newestTimestamp : null;
+    let cursor = null;
+    let first = true;
+    do {
+      const page = await fetchTransactionPage(cursor, since);
+      page.items.forEach(tx => transactionsById.set(tx.id, tx));
+      // Pages are newest first: the first row of the first page is the newest
+      if (first && page.items.length) newestTimestamp = page.items[0].timestamp;
+      first = false;
+      cursor = page.next;
+    } while (cursor);
+
+    historyLoaded = true;
+    transactions = Array.from(transactionsById.values());
+    renderTransactions(
+      document.getElementById("transaction-search").value,
+      document.getElementById("transaction-sort").value
+    );
   } catch (err) {
     console.error(err);
     container.textContent = "⚠️ Error loading transactions.";
@@ -0,0 +1,65 @@
+# tests/conftest.py
+import os
+import tempfile
+
+# Settings and the engine are read at import time: point the app at a
+# throwaway SQLite file before anything under app/ is imported.
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='tests-'), 'test.db')}"
+for key in ("SECRET_KEY", "BINANCE_API_KEY", "BINANCE_API_SECRET"):
+    os.environ.setdefault(key, "test")
+os.environ.setdefault("BINANCE_WS_URL", "ws://127.0.0.1:9")
+
+import fakeredis.aioredis  # noqa: E402
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app.utils.redis_client as redis_client  # noqa: E402
+from app.database.db import Base, SessionLocal, engine  # noqa: E402
+from app.database.init_db import ensure_indexes  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.accounts import ensure_default_account  # noqa: E402
+from app.services.portfolio_analytics import trade_history_cache  # noqa: E402
+from app.utils import price_book  # noqa: E402
+from app.utils.versioning import versioned_cache  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Fresh schema (with the default account) and a session on it."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    ensure_indexes()
+    versioned_cache.clear()
+    trade_history_cache.clear()
+    price_book.clear()
+
+    session = SessionLocal()
+    ensure_default_account(session)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def redis():
+    """In-process Redis for idempotency keys, versions and prices."""
+    fake = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    redis_client._redis_client = fake
+    yield fake
+    redis_client._redis_client = None
+
+
+@pytest.fixture
+def client(db, redis):
+    """App without its startup (no market data feed)."""
+    return TestClient(app)
+
+
+@pytest.fixture
+def prices():
+    """Sets live prices in the in-process price book: prices(BTCUSDT=100.0)."""
+    def set_prices(**symbols):
+        for symbol, price in symbols.items():
+            price_book.update_price(symbol, price)
+    return set_prices
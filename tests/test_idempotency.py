@@ -0,0 +1,113 @@
+# tests/test_idempotency.py
+import asyncio
+import json
+
+import pytest
+from fastapi.responses import JSONResponse
+
+from app.models.transaction import Transaction
+from app.utils.idempotency import IDEMPOTENCY_KEY_PREFIX, run_idempotent
+
+BUY = {"symbol": "BTCUSDT", "quantity": 1}
+
+
+def test_replay_returns_stored_response_without_a_second_order(client, db, prices):
+    prices(BTCUSDT=100.0)
+    headers = {"Idempotency-Key": "order-1"}
+
+    first = client.post("/api/order/buy", json=BUY, headers=headers)
+    replay = client.post("/api/order/buy", json=BUY, headers=headers)
+
+    assert first.status_code == replay.status_code == 200
+    assert replay.json() == first.json()
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert db.query(Transaction).count() == 1
+
+
+def test_key_reused_for_another_request_is_rejected(client, db, prices):
+    prices(BTCUSDT=100.0)
+    headers = {"Idempotency-Key": "order-2"}
+
+    assert client.post("/api/order/buy", json=BUY, headers=headers).status_code == 200
+    other = client.post("/api/order/buy", json={**BUY, "quantity": 2}, headers=headers)
+
+    assert other.status_code == 422
+    assert db.query(Transaction).count() == 1
+
+
+def test_keys_are_scoped_per_account(client, db, prices):
+    prices(BTCUSDT=100.0)
+    account = client.post("/api/accounts", json={"name": "alice"}).json()
+    headers = {"Idempotency-Key": "order-3"}
+
+    client.post("/api/order/buy", json=BUY, headers=headers)
+    other = client.post("/api/order/buy", json=BUY, headers={**headers, "X-Account-Id": str(account["id"])})
+
+    assert other.status_code == 200
+    assert "Idempotent-Replayed" not in other.headers
+    assert db.query(Transaction).count() == 2
+
+
+def test_rejected_order_is_replayed_too(client, db, prices):
+    prices(BTCUSDT=100.0)
+    headers = {"Idempotency-Key": "order-4"}
+    sell = {"symbol": "BTCUSDT", "quantity": 1}
+
+    first = client.post("/api/order/sell", json=sell, headers=headers)
+    client.post("/api/order/buy", json=BUY)  # would make the sell valid now
+    replay = client.post("/api/order/sell", json=sell, headers=headers)
+
+    assert first.status_code == replay.status_code == 400
+    assert replay.json() == first.json()
+
+
+@pytest.mark.asyncio
+async def test_in_flight_request_gets_409(redis):
+    release = asyncio.Event()
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        await release.wait()
+        return {"ok": True}
+
+    first = asyncio.create_task(run_idempotent("slow", 1, "/order/buy", BUY, handler))
+    await asyncio.sleep(0.01)
+
+    duplicate = await run_idempotent("slow", 1, "/order/buy", BUY, handler)
+    assert duplicate.status_code == 409
+
+    release.set()
+    assert await first == {"ok": True}
+    replay = await run_idempotent("slow", 1, "/order/buy", BUY, handler)
+    assert json.loads(replay.body) == {"ok": True}
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_still_stores_its_response(redis):
+    async def handler():
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    request = asyncio.create_task(run_idempotent("cancelled", 1, "/order/buy", BUY, handler))
+    await asyncio.sleep(0.01)
+    request.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await request
+    await asyncio.sleep(0.1)
+
+    entry = json.loads(await redis.get(f"{IDEMPOTENCY_KEY_PREFIX}1:cancelled"))
+    assert entry["state"] == "done" and entry["body"] == {"ok": True}
+
+
+@pytest.mark.asyncio
+async def test_server_error_releases_the_key(redis):
+    async def failing():
+        return JSONResponse(status_code=503, content={"error": "unavailable"})
+
+    response = await run_idempotent("retry", 1, "/order/buy", BUY, failing)
+
+    assert response.status_code == 503
+    assert await redis.get(f"{IDEMPOTENCY_KEY_PREFIX}1:retry") is None
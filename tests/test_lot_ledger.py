@@ -0,0 +1,145 @@
+# tests/test_lot_ledger.py
+import random
+
+from app.models.account import Account, DEFAULT_ACCOUNT_ID
+from app.models.open_lot import OpenLot
+from app.models.position import Position
+from app.services.lot_ledger import get_positions, ledger_needs_rebuild, rebuild_ledger, reserve_sell
+from app.services.order_service import OrderRejected, place_batch, place_buy, place_sell
+
+SYMBOLS = ("BTCUSDT", "ETHUSDT", "SOLUSDT")
+
+
+def random_orders(n: int, seed: int = 7):
+    """
+    (side, symbol, quantity, price) with partial and full sells of earlier
+    buys. Quantities are multiples of 1/1024, so running totals are exact
+    and a full sell leaves no float dust.
+    """
+    rng = random.Random(seed)
+    held = dict.fromkeys(SYMBOLS, 0)   # units of 1/1024
+    orders = []
+    for _ in range(n):
+        symbol = rng.choice(SYMBOLS)
+        price = round(rng.uniform(1, 100), 2)
+        if held[symbol] and rng.random() < 0.4:
+            units = held[symbol] if rng.random() < 0.3 else rng.randint(1, held[symbol])
+            held[symbol] -= units
+            orders.append(("SELL", symbol, units / 1024, price))
+        else:
+            units = rng.randint(1, 5000)
+            held[symbol] += units
+            orders.append(("BUY", symbol, units / 1024, price))
+    return orders
+
+
+def ledger_state(db, account_id: int = DEFAULT_ACCOUNT_ID):
+    """Open lots (per symbol, FIFO order) and open positions, costs rounded."""
+    db.expire_all()
+    lots = sorted(
+        (lot.crypto_symbol, lot.transaction_id, lot.quantity, lot.price)
+        for lot in db.query(OpenLot).filter(OpenLot.account_id == account_id)
+    )
+    positions = sorted(
+        (p["symbol"], p["quantity"], round(p["cost_basis"], 6))
+        for p in get_positions(db, account_id)
+    )
+    return lots, positions
+
+
+def test_single_orders_match_rebuild(db):
+    for side, symbol, quantity, price in random_orders(300):
+        place = place_buy if side == "BUY" else place_sell
+        place(db, symbol, quantity, price)
+
+    incremental = ledger_state(db)
+    rebuild_ledger(db)
+    assert ledger_state(db) == incremental
+    assert incremental[1]  # something is still held
+
+
+def test_batch_matches_rebuild(db):
+    orders = random_orders(300, seed=11)
+    for start in range(0, len(orders), 50):
+        chunk = orders[start:start + 50]
+        result = place_batch(
+            db, [(side, symbol, quantity) for side, symbol, quantity, _ in chunk],
+            {symbol: price for _, symbol, _, price in chunk}
+        )
+        assert result["committed"] and not result["rejected"], result
+
+    incremental = ledger_state(db)
+    rebuild_ledger(db)
+    assert ledger_state(db) == incremental
+
+
+def test_batch_matches_single_orders(db):
+    db.add(Account(id=2, name="batch"))
+    db.commit()
+
+    # One price per symbol: the batch takes a single snapshot
+    prices = {symbol: float(i + 10) for i, symbol in enumerate(SYMBOLS)}
+    orders = [(side, symbol, quantity) for side, symbol, quantity, _ in random_orders(60, seed=3)]
+
+    singles = []
+    for side, symbol, quantity in orders:
+        place = place_buy if side == "BUY" else place_sell
+        singles.append(place(db, symbol, quantity, prices[symbol], account_id=DEFAULT_ACCOUNT_ID))
+
+    batch = place_batch(db, orders, prices, account_id=2)
+
+    assert batch["committed"] and batch["executed"] == len(orders)
+    assert [r["balance"] for r in batch["results"]] == [r["balance"] for r in singles]
+
+    # Same positions and lots (lots point at each account's own transactions)
+    batch_lots, batch_positions = ledger_state(db, 2)
+    single_lots, single_positions = ledger_state(db, DEFAULT_ACCOUNT_ID)
+    assert batch_positions == single_positions
+    assert [(s, q, p) for s, _, q, p in batch_lots] == [(s, q, p) for s, _, q, p in single_lots]
+
+
+def test_atomic_batch_rejection_writes_nothing(db):
+    place_buy(db, "BTCUSDT", 1, 100)
+    before = ledger_state(db)
+
+    result = place_batch(db, [("BUY", "BTCUSDT", 1), ("SELL", "BTCUSDT", 5)], {"BTCUSDT": 100.0}, atomic=True)
+
+    assert not result["committed"]
+    assert [r["status"] for r in result["results"]] == ["rolled_back", "rejected"]
+    assert "balance" not in result["results"][0]
+    assert result["results"][0]["message"] != "Order executed"
+    assert ledger_state(db) == before
+
+
+def test_reserve_sell_refuses_oversell(db):
+    place_buy(db, "ETHUSDT", 2, 10)
+
+    assert not reserve_sell(db, "ETH", 3)
+    assert reserve_sell(db, "ETH", 2)
+    db.rollback()
+
+    try:
+        place_sell(db, "ETHUSDT", 3, 10)
+    except OrderRejected as e:
+        assert e.content["available"] == 2
+    else:
+        raise AssertionError("oversell accepted")
+    db.rollback()
+    assert ledger_state(db)[1] == [("ETH", 2.0, 20.0)]
+
+
+def test_ledger_needs_rebuild_after_positions_are_lost(db):
+    assert not ledger_needs_rebuild(db)  # empty log
+
+    place_buy(db, "BTCUSDT", 1, 100)
+    assert not ledger_needs_rebuild(db)
+
+    # A start that migrated the tables but stopped before the rebuild
+    db.query(OpenLot).delete()
+    db.query(Position).delete()
+    db.commit()
+    assert ledger_needs_rebuild(db)
+
+    rebuild_ledger(db)
+    assert not ledger_needs_rebuild(db)
+    assert ledger_state(db)[1] == [("BTC", 1.0, 100.0)]
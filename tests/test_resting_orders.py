@@ -0,0 +1,49 @@
+# tests/test_resting_orders.py
+from app.services.resting_orders import ABOVE, BELOW, TriggerIndex, trigger_direction
+
+
+def test_trigger_directions():
+    assert trigger_direction("BUY", "LIMIT") == BELOW
+    assert trigger_direction("BUY", "TAKE_PROFIT") == BELOW
+    assert trigger_direction("BUY", "STOP_LOSS") == ABOVE
+    assert trigger_direction("SELL", "LIMIT") == ABOVE
+    assert trigger_direction("SELL", "TAKE_PROFIT") == ABOVE
+    assert trigger_direction("SELL", "STOP_LOSS") == BELOW
+
+
+def test_fires_at_or_through_the_trigger_and_only_once():
+    index = TriggerIndex()
+    index.add(1, "BTCUSDT", BELOW, 100.0)
+    index.add(2, "BTCUSDT", BELOW, 90.0)
+    index.add(3, "BTCUSDT", ABOVE, 120.0)
+    index.add(4, "ETHUSDT", BELOW, 100.0)
+
+    assert index.check("BTCUSDT", 110.0) == []
+    assert index.check("BTCUSDT", 100.0) == [1]
+    assert index.check("BTCUSDT", 50.0) == [2]
+    assert index.check("BTCUSDT", 50.0) == []
+    assert index.check("BTCUSDT", 125.0) == [3]
+    assert len(index) == 1 and 4 in index
+
+
+def test_discarded_orders_never_fire():
+    index = TriggerIndex()
+    index.add(1, "BTCUSDT", ABOVE, 100.0)
+    index.add(2, "BTCUSDT", ABOVE, 100.0)
+    index.discard(1)
+    index.discard(1)
+
+    assert index.check("BTCUSDT", 100.0) == [2]
+    assert len(index) == 0
+
+
+def test_compaction_keeps_live_orders():
+    index = TriggerIndex()
+    stale = TriggerIndex.COMPACT_MIN_STALE + 10
+    for order_id in range(stale + 5):
+        index.add(order_id, "BTCUSDT", BELOW, 100.0 - order_id * 0.01)
+    for order_id in range(stale):
+        index.discard(order_id)
+
+    assert len(index) == 5
+    assert sorted(index.check("BTCUSDT", 0.0)) == list(range(stale, stale + 5))
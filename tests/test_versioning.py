@@ -0,0 +1,46 @@
+# tests/test_versioning.py
+from app.utils import versioning
+from app.utils.cache import ALL_PRICES_TTL
+
+
+def test_unchanged_balance_is_revalidated_with_304(client):
+    first = client.get("/api/balance")
+    again = client.get("/api/balance", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200 and first.json() == {"balance": 100000.0}
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_write_changes_the_etag(client):
+    etag = client.get("/api/balance").headers["ETag"]
+    client.post("/api/balance/update", json={"action": "add", "amount": 5})
+
+    response = client.get("/api/balance", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json() == {"balance": 100005.0}
+    assert response.headers["ETag"] != etag
+
+
+def test_etags_are_per_account(client):
+    account = client.post("/api/accounts", json={"name": "bob", "balance": 7}).json()
+    etag = client.get("/api/balance").headers["ETag"]
+
+    response = client.get("/api/balance", headers={"If-None-Match": etag, "X-Account-Id": str(account["id"])})
+
+    assert response.status_code == 200 and response.json() == {"balance": 7.0}
+
+
+def test_price_etag_expires_without_ticks(client, monkeypatch):
+    first = client.get("/dashboard/prices")
+    etag = first.headers["ETag"]
+    assert client.get("/dashboard/prices", headers={"If-None-Match": etag}).status_code == 304
+
+    # No flush bumps the prices version, but the snapshot window has passed
+    now = versioning.time.time()
+    monkeypatch.setattr(versioning.time, "time", lambda: now + ALL_PRICES_TTL + 1)
+    response = client.get("/dashboard/prices", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag